@@ -1,91 +1,112 @@
 #!/usr/bin/env python3
-import openpyxl
+"""
+Análisis de libros Excel: resumen por hoja (dimensiones, filas con datos,
+encabezados y etiquetas detectadas) con el escáner de solo lectura de
+workbook_scanner.py.
+
+Sin argumentos analiza el libro maestro. Acepta varios libros o carpetas, que
+se escanean en paralelo hoja por hoja.
+
+Uso:
+    python3 analyze_excel.py
+    python3 analyze_excel.py --match turquesa ines --preview 30
+    python3 analyze_excel.py archive/ otro.xlsx --workers 4 --json
+    python3 analyze_excel.py --sheet "CALCULOS DE MATERIALES TURQUESA" --json
+"""
+import argparse
 import json
-from collections import defaultdict
-
-# Cargar el archivo Excel
-wb = openpyxl.load_workbook('CALCULADORA MATERIALES AQUAM.xlsx', data_only=True)
-
-# Listar todas las hojas
-print("=" * 80)
-print("HOJAS DISPONIBLES EN EL ARCHIVO:")
-print("=" * 80)
-for idx, sheet_name in enumerate(wb.sheetnames, 1):
-    print(f"{idx}. {sheet_name}")
-
-print("\n" + "=" * 80)
-print("BUSCANDO HOJAS RELACIONADAS CON 'TURQUESA' E 'INÉS':")
-print("=" * 80)
-
-# Buscar hojas relevantes
-turquesa_sheets = []
-for sheet_name in wb.sheetnames:
-    if 'turquesa' in sheet_name.lower() or 'ines' in sheet_name.lower() or 'inés' in sheet_name.lower():
-        turquesa_sheets.append(sheet_name)
-        print(f"✓ Encontrada: {sheet_name}")
-
-if not turquesa_sheets:
-    print("No se encontraron hojas con 'Turquesa' o 'Inés' en el nombre")
-else:
-    print(f"\nTotal de hojas relevantes: {len(turquesa_sheets)}")
-
-# Función para extraer datos de una hoja
-def extract_sheet_data(sheet_name):
-    sheet = wb[sheet_name]
-    data = {}
+import sys
+import time
+import unicodedata
+from pathlib import Path
 
-    print(f"\n{'=' * 80}")
-    print(f"ANÁLISIS DE HOJA: {sheet_name}")
-    print(f"{'=' * 80}")
+from workbook_scanner import scan_paths
 
-    # Extraer dimensiones
-    print(f"Dimensiones: {sheet.max_row} filas x {sheet.max_column} columnas")
-
-    # Extraer todos los valores no vacíos
-    values = []
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=1, max_row=min(50, sheet.max_row), values_only=True), 1):
-        row_data = []
-        for col_idx, cell in enumerate(row, 1):
-            if cell is not None and str(cell).strip():
-                row_data.append({
-                    'col': col_idx,
-                    'value': cell
-                })
-        if row_data:
-            values.append({
-                'row': row_idx,
-                'data': row_data
-            })
-
-    # Mostrar primeras filas con datos
-    print(f"\nPrimeras filas con datos (hasta 30):")
-    for item in values[:30]:
-        row_num = item['row']
-        row_str = f"Fila {row_num}: "
-        cells = []
-        for cell_data in item['data']:
-            cells.append(f"Col{cell_data['col']}={cell_data['value']}")
-        print(row_str + " | ".join(cells))
-
-    return values
-
-# Extraer datos de las hojas relevantes
-sheets_data = {}
-for sheet_name in turquesa_sheets:
-    sheets_data[sheet_name] = extract_sheet_data(sheet_name)
-
-# Si hay exactamente 2 hojas, hacer comparación
-if len(turquesa_sheets) == 2:
-    print(f"\n{'=' * 80}")
-    print(f"COMPARACIÓN ENTRE: {turquesa_sheets[0]} VS {turquesa_sheets[1]}")
-    print(f"{'=' * 80}")
+DEFAULT_EXCEL_PATH = Path(__file__).parent / 'CALCULADORA MATERIALES AQUAM.xlsx'
+
+
+def _normalize(text):
+    """Minúsculas y sin acentos, para buscar 'ines' en 'INÉS'"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
 
-    sheet1_data = sheets_data[turquesa_sheets[0]]
-    sheet2_data = sheets_data[turquesa_sheets[1]]
 
-    print(f"\n{turquesa_sheets[0]}: {len(sheet1_data)} filas con datos")
-    print(f"{turquesa_sheets[1]}: {len(sheet2_data)} filas con datos")
+def sheet_filter(names=None, match=None):
+    """
+    Filtro de hojas para scan_paths
 
-print("\n" + "=" * 80)
-print("ANÁLISIS COMPLETADO")
-print("=" * 80)
+    Args:
+        names: Nombres exactos de hojas
+        match: Textos a buscar en el nombre (sin distinguir mayúsculas ni acentos)
+    """
+    if not names and not match:
+        return None
+    wanted = set(names or ())
+    patterns = [_normalize(pattern) for pattern in match or ()]
+    return lambda name: name in wanted or any(pattern in _normalize(name) for pattern in patterns)
+
+
+def print_summary(summary):
+    """Resumen de una hoja en formato legible"""
+    print(f"\n{'=' * 80}")
+    if 'error' in summary:
+        print(f"✗ {summary['file']} {summary.get('sheet', '')}: {summary['error']}")
+        return
+
+    print(f"ANÁLISIS DE HOJA: {summary['sheet']}  ({Path(summary['file']).name})")
+    print(f"{'=' * 80}")
+    print(f"Dimensiones: {summary['maxRow']} filas x {summary['maxColumn']} columnas "
+          f"(rango usado {summary['usedRange']}, declarado {summary['declaredDimensions']})")
+    print(f"Filas con datos: {summary['nonEmptyRows']} | Celdas con datos: {summary['nonEmptyCells']}")
+
+    if summary['headings']:
+        print("\nEncabezados:")
+        for heading in summary['headings']:
+            print(f"  Fila {heading['row']}: {heading['text']}")
+
+    if summary['labels']:
+        print(f"\nEtiquetas ({len(summary['labels'])}):")
+        for label in summary['labels']:
+            values = ' | '.join(str(value) for value in label['values'])
+            print(f"  Fila {label['row']}: {label['label']} = {values}")
+
+    if summary.get('preview'):
+        print(f"\nPrimeras filas con datos (hasta {len(summary['preview'])}):")
+        for item in summary['preview']:
+            cells = [f"Col{cell['col']}={cell['value']}" for cell in item['data']]
+            print(f"Fila {item['row']}: " + " | ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resumen por hoja de libros Excel (solo lectura)')
+    parser.add_argument('paths', nargs='*', default=[str(DEFAULT_EXCEL_PATH)],
+                        help='Libros .xlsx o carpetas (por defecto el libro maestro)')
+    parser.add_argument('--sheet', action='append', dest='sheets', metavar='NOMBRE',
+                        help='Hoja a analizar (se puede repetir)')
+    parser.add_argument('--match', nargs='+', metavar='TEXTO',
+                        help='Analizar solo las hojas cuyo nombre contiene alguno de estos textos')
+    parser.add_argument('--workers', type=int, default=0, help='Procesos en paralelo (0 = uno por núcleo)')
+    parser.add_argument('--preview', type=int, default=0, metavar='N',
+                        help='Incluir las primeras N filas con datos de cada hoja')
+    parser.add_argument('--json', action='store_true', help='Imprimir una línea JSON por hoja')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    summaries = scan_paths(args.paths, sheet_filter(args.sheets, args.match),
+                           workers=args.workers, preview_rows=args.preview)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        for summary in summaries:
+            print(json.dumps(summary, ensure_ascii=False, default=str))
+    else:
+        for summary in summaries:
+            print_summary(summary)
+        sheets = sum(1 for summary in summaries if 'error' not in summary)
+        print(f"\n✅ {sheets} hojas analizadas en {elapsed:.2f} s")
+
+    return 1 if any('error' in summary for summary in summaries) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
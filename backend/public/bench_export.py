@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la exportación a Excel con proyectos sintéticos.
+
+Genera proyectos de tamaño creciente (ítems de plomería, cargas eléctricas,
+roles de mano de obra), con y sin imágenes de bomba/filtro y con distintas
+combinaciones de `sections`, y los exporta con cada motor. Cada caso corre
+en un proceso aparte y registra tiempo total, pico de memoria (RSS), tamaño
+del archivo y tiempo por sección. Los resultados se agregan como JSON-lines
+a un archivo para compararlos en el tiempo.
+
+Uso:
+    python3 bench_export.py                          # matriz completa
+    python3 bench_export.py --quick                  # solo 10 y 1.000 ítems
+    python3 bench_export.py --sizes 10000 --backends fast openpyxl
+    python3 bench_export.py --compare benchmarks/base.jsonl --threshold 0.2
+"""
+import argparse
+import contextlib
+import json
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_RESULTS = Path(__file__).parent / 'benchmarks' / 'results.jsonl'
+
+# Motores a comparar: libro independiente con openpyxl (normal y write-only),
+# escritor XML directo, y hoja agregada al libro maestro
+BACKENDS = ('openpyxl', 'streaming', 'fast', 'master')
+
+SIZES = (10, 1000, 10000)
+
+# Combinaciones de secciones: todas, o solo materiales (sin análisis,
+# mano de obra, secuencia ni normas)
+SECTION_PROFILES = {
+    'all': {},
+    'materials': {
+        'hydraulicAnalysis': False, 'electricalAnalysis': False,
+        'labor': False, 'sequence': False, 'standards': False,
+    },
+}
+
+PUMP_IMAGE = '/public/pool-images/acquam-page-03.png'
+FILTER_IMAGE = '/public/pool-images/acquam-page-04.png'
+
+
+# ===== GENERADOR DE PROYECTOS SINTÉTICOS =====
+
+def make_project(items, loads=None, roles=None, images=True, sections='all'):
+    """
+    Proyecto sintético con `items` ítems de plomería.
+
+    Args:
+        items: Cantidad de ítems de plomería
+        loads: Cargas eléctricas (por defecto items // 10, mínimo 1)
+        roles: Roles de mano de obra (por defecto items // 100, mínimo 1)
+        images: Incluir imágenes de bomba, filtro y bomba recomendada
+        sections: Clave de SECTION_PROFILES
+    """
+    loads = loads if loads is not None else max(1, items // 10)
+    roles = roles if roles is not None else max(1, items // 100)
+    diameters = ('20mm', '25mm', '32mm', '40mm', '50mm', '63mm')
+
+    return {
+        'projectId': f'BENCH{items}',
+        'projectName': f'Benchmark {items}',
+        'clientName': f'Cliente {items}',
+        'address': 'Calle Falsa 123',
+        'responsible': 'Benchmark',
+        'pool': {'name': 'Turquesa', 'length': 6.5, 'width': 3.1, 'shallowDepth': 1.0,
+                 'deepDepth': 1.5, 'volume': 25.3, 'waterMirrorArea': 20.15},
+        'excavation': {'length': 7.5, 'width': 4.1, 'depth': 1.6, 'volume': 49.2},
+        'supportBed': {'materials': {'cement': 5, 'sand': 2.1, 'mixed': 0}},
+        'sidewalk': {'materials': {'cement': 12, 'sand': 1.5, 'stone': 1.2, 'mesh': 4}},
+        'plumbing': {'items': [
+            {'name': f'Item {n}', 'diameter': diameters[n % len(diameters)], 'type': 'PVC',
+             'quantity': n % 17 + 1, 'observations': f'Observación {n}'}
+            for n in range(items)
+        ]},
+        'electrical': {
+            'watts': 1100, 'amps': 5,
+            'pump': {'power': '1 HP', **({'imageUrl': PUMP_IMAGE} if images else {})},
+            'filter': {'diameter': '500mm', **({'imageUrl': FILTER_IMAGE} if images else {})},
+            'consumptionBreakdown': [{'item': f'Carga {n}', 'watts': 100 + n} for n in range(loads)],
+        },
+        'labor': {'roles': [
+            {'role': f'Rol {n}', 'tasks': n % 5 + 1, 'hours': n % 40 + 1, 'cost': 1000.0 * (n + 1)}
+            for n in range(roles)
+        ]},
+        'hydraulicAnalysis': {
+            'totalDynamicHead': 9.5,
+            'frictionLoss': {'suction': 1.2, 'return': 1.4, 'total': 2.6},
+            'singularLoss': {'suction': 0.5, 'return': 0.7, 'total': 1.2},
+            'velocityChecks': [{'lineType': 'Succión', 'velocity': 1.8, 'isOk': True}],
+            'warnings': ['Velocidad alta en retorno'],
+            'recommendedPump': {'name': 'Bomba 1HP', 'flowRate': '12 m3/h', 'description': 'Autocebante',
+                                **({'imageUrl': PUMP_IMAGE} if images else {})},
+        },
+        'electricalAnalysis': {
+            'totalPowerInstalled': 1100, 'totalPowerDemand': 950, 'totalCurrent': 5.4,
+            'cable': {'section': 2.5, 'voltageDrop': 1.2, 'currentCapacity': 18},
+            'protection': {'breakerSize': 16, 'rcdSize': 25},
+            'loads': [{'name': f'Equipo {n}', 'power': 100 + n, 'current': 0.5, 'powerFactor': 0.9,
+                       'efficiency': 0.85} for n in range(loads)],
+            'operatingCost': {'dailyKwh': 6, 'monthlyCost': 27, 'annualCost': 324},
+        },
+        'sections': dict(SECTION_PROFILES[sections]),
+    }
+
+
+def iter_cases(sizes, backends, images_options=(True, False), profiles=tuple(SECTION_PROFILES)):
+    for items in sizes:
+        for images in images_options:
+            for sections in profiles:
+                for backend in backends:
+                    yield {'items': items, 'images': images, 'sections': sections, 'backend': backend}
+
+
+# ===== EJECUCIÓN DE UN CASO (en un proceso aparte) =====
+
+def run_case(case, workdir):
+    """Ejecuta un caso en este proceso y devuelve sus métricas"""
+    import export_to_excel as exporter
+    from excel_layout import iter_layout
+    from export_metrics import ExportMetrics
+
+    project_data = make_project(case['items'], images=case['images'], sections=case['sections'])
+    output = Path(workdir) / 'bench.xlsx'
+    # Tiempo por sección (generar + escribir cada fila), ver export_metrics.py
+    metrics = ExportMetrics()
+    section_times = metrics.sections
+    rows = metrics.timed_rows(iter_layout(project_data))
+    backend = case['backend']
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        if backend == 'fast':
+            exporter._write_fast_workbook(output, exporter.project_sheet_name(project_data), project_data, rows=rows)
+        elif backend == 'master':
+            shutil.copy(exporter.DEFAULT_EXCEL_PATH, output)
+            wb = exporter._load_workbook(output)
+            exporter._write_project_sheet(wb, project_data, rows=rows)
+            exporter.save_workbook(wb, output)
+        else:
+            streaming = backend == 'streaming'
+            wb = exporter._new_workbook(streaming)
+            exporter._write_project_sheet(wb, project_data, streaming=streaming, rows=rows)
+            exporter.save_workbook(wb, output)
+    wall = time.perf_counter() - started
+
+    return {
+        'wallSeconds': round(wall, 4),
+        'peakRssKb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'fileBytes': output.stat().st_size,
+        'sectionSeconds': {key: round(value, 4) for key, value in section_times.items()},
+        # Carga del libro maestro, guardado y demás trabajo fuera de las filas
+        'otherSeconds': round(wall - sum(section_times.values()), 4),
+    }
+
+
+def run_in_subprocess(case):
+    """Corre el caso en un proceso nuevo para medir su pico de memoria por separado"""
+    result = subprocess.run(
+        [sys.executable, __file__, '--run-case', json.dumps(case)],
+        capture_output=True, text=True, cwd=Path(__file__).parent,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Caso {case} falló:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# ===== RESULTADOS =====
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def case_key(case):
+    return f"{case['backend']}/{case['items']}/{'img' if case['images'] else 'noimg'}/{case['sections']}"
+
+
+def load_results(path):
+    """Último resultado de cada caso en un archivo de resultados"""
+    latest = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                latest[record['case']] = record
+    return latest
+
+
+def compare_results(baseline, current, threshold):
+    """Casos cuyo tiempo o memoria empeoró más que `threshold` (0.2 = 20%)"""
+    regressions = []
+    for key, record in current.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ('wallSeconds', 'peakRssKb'):
+            if base[metric] and record[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{key}: {metric} {base[metric]} -> {record[metric]} "
+                    f"(+{(record[metric] / base[metric] - 1):.0%})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de export_to_excel.py con proyectos sintéticos')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='Cantidad de ítems de plomería')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--quick', action='store_true', help='Solo 10 y 1.000 ítems, con imágenes y todas las secciones')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones por caso (se guarda la mediana)')
+    parser.add_argument('--results', default=str(DEFAULT_RESULTS), help='Archivo JSON-lines de resultados')
+    parser.add_argument('--compare', metavar='FILE', help='Comparar contra otro archivo de resultados')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Tolerancia de regresión (0.2 = 20%%)')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        with tempfile.TemporaryDirectory() as workdir:
+            print(json.dumps(run_case(json.loads(args.run_case), workdir)))
+        return 0
+
+    if args.quick:
+        cases = list(iter_cases([10, 1000], args.backends, images_options=(True,), profiles=('all',)))
+    else:
+        cases = list(iter_cases(args.sizes, args.backends))
+
+    run_info = {
+        'runAt': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'host': platform.node(),
+    }
+
+    results_path = Path(args.results)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    current = {}
+    with open(results_path, 'a', encoding='utf-8') as results_file:
+        for case in cases:
+            runs = [run_in_subprocess(case) for _ in range(max(1, args.repeat))]
+            best = sorted(runs, key=lambda run: run['wallSeconds'])[len(runs) // 2]
+            record = {**run_info, 'case': case_key(case), **case, **best,
+                      'wallSecondsRuns': [run['wallSeconds'] for run in runs]}
+            if len(runs) > 1:
+                record['wallSecondsStdev'] = round(statistics.stdev(record['wallSecondsRuns']), 4)
+            results_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            results_file.flush()
+            current[record['case']] = record
+            print(f"{record['case']:<40} {record['wallSeconds']:>8.3f} s "
+                  f"{record['peakRssKb'] / 1024:>8.1f} MB {record['fileBytes'] / 1024:>9.1f} KB")
+
+    print(f"📄 Resultados agregados a {results_path}")
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare), current, args.threshold)
+        for regression in regressions:
+            print(f"⚠ {regression}")
+        print(f"{'❌' if regressions else '✅'} {len(regressions)} regresiones (tolerancia {args.threshold:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
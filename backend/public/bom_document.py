@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Modelo del listado de materiales (BOM) independiente del formato.
+
+El diseño de la hoja (excel_layout.py) se recorre una sola vez y cada fila
+se convierte en un BomRow con tipos: sección, descripción, especificación,
+cantidad numérica, unidad y observaciones; los ítems llevan además el id
+de su material en el catálogo (material_catalog.py), el mismo que usan los
+scripts de análisis del libro. Desde el documento se escriben
+el .xlsx (con las mismas filas y estilos de siempre), CSV, JSON-lines y,
+si pyarrow está instalado, Parquet. Así compras y análisis leen las
+exportaciones sin volver a parsear Excel.
+"""
+import contextlib
+import csv
+import json
+import re
+from collections import namedtuple
+
+from excel_layout import SECTIONS_BY_KEY, iter_layout, project_sheet_name
+from material_catalog import default_catalog
+
+# Fila del BOM:
+#   section / section_title: clave y título de la sección
+#   row: fila de la hoja
+#   kind: 'title' (título de sección), 'item' (material o equipo con
+#         cantidad), 'measure' (medición o cálculo), 'labor', 'header',
+#         'total', 'warning' o 'note'
+#   spec / unit / quantity / observations: campos tipados según las
+#         columnas que declara la sección en excel_layout.SECTIONS; None en
+#         las secciones y líneas sin columnas tipadas
+#   quantity: cantidad numérica (int/float) o None
+#   value: texto original de la columna Cantidad (ej: '1100 W', '$90,000.00')
+#   sheet_row: SheetRow original, para renderizar el .xlsx sin cambios
+BomRow = namedtuple('BomRow', [
+    'section', 'section_title', 'row', 'kind', 'description', 'spec',
+    'unit', 'quantity', 'value', 'observations', 'image', 'sheet_row',
+])
+
+# Columnas de los formatos tabulares, en orden
+TABLE_COLUMNS = (
+    'projectId', 'sheetName', 'section', 'sectionTitle', 'row', 'kind', 'description', 'materialId',
+    'spec', 'unit', 'quantity', 'value', 'observations',
+)
+
+# '1100 W', '$90,000.00', '25.30 m³', '-3', '0.85'
+QUANTITY_PATTERN = re.compile(r'^\s*(\$)?\s*(-?\d[\d,]*(?:\.\d+)?)\s*(.*?)\s*$')
+
+
+def parse_quantity(value):
+    """
+    Separa cantidad y unidad de un valor de la columna Cantidad
+
+    Returns:
+        (cantidad numérica o None, unidad o None)
+    """
+    if isinstance(value, bool) or value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        return value, None
+
+    match = QUANTITY_PATTERN.match(str(value))
+    if not match:
+        return None, None
+    currency, number, suffix = match.groups()
+    number = number.replace(',', '')
+    quantity = float(number) if '.' in number else int(number)
+    return quantity, '$' if currency else (suffix or None)
+
+
+class BomDocument:
+    """
+    Documento del BOM de un proyecto: datos del encabezado y filas tipadas.
+
+    `header_rows` guarda las filas fijas del encabezado de la hoja; junto con
+    las filas de sección permiten reconstruir la hoja completa (sheet_rows).
+    """
+
+    def __init__(self, project_data):
+        self.project_id = project_data.get('projectId')
+        self.project_name = project_data.get('projectName')
+        self.sheet_name = project_sheet_name(project_data)
+        self.header = {}
+        self.header_rows = []
+        self.rows = []
+
+        titles = {}
+        for key, sheet_row in iter_layout(project_data):
+            if key == 'header':
+                self.header_rows.append(sheet_row)
+                # Filas 'Etiqueta | valor' (Fecha, Cliente, Domicilio, ...)
+                if set(sheet_row.cells) == {'B', 'C'}:
+                    self.header[sheet_row.cells['B']] = sheet_row.cells['C']
+                continue
+            if key not in titles:
+                # Primera fila de la sección: su título
+                titles[key] = sheet_row.cells.get('B')
+            self.rows.append(_bom_row(key, titles[key], sheet_row))
+
+    def sheet_rows(self):
+        """Todas las filas de la hoja (SheetRow) en orden, para los escritores .xlsx"""
+        yield from self.header_rows
+        for bom_row in self.rows:
+            yield bom_row.sheet_row
+
+    def keyed_rows(self):
+        """Filas de la hoja como (clave de sección o 'header', SheetRow), para las métricas"""
+        for sheet_row in self.header_rows:
+            yield 'header', sheet_row
+        for bom_row in self.rows:
+            yield bom_row.section, bom_row.sheet_row
+
+    def items(self):
+        """Filas de materiales y equipos (secciones de materiales, con cantidad)"""
+        return [bom_row for bom_row in self.rows if is_material(bom_row)]
+
+    def records(self):
+        """Filas como diccionarios con las columnas de TABLE_COLUMNS (sin títulos de sección)"""
+        catalog = default_catalog()
+        for bom_row in self.rows:
+            if bom_row.kind == 'title':
+                continue
+            yield {
+                'projectId': self.project_id,
+                'sheetName': self.sheet_name,
+                'section': bom_row.section,
+                'sectionTitle': bom_row.section_title,
+                'row': bom_row.row,
+                'kind': bom_row.kind,
+                'description': bom_row.description,
+                'materialId': catalog.resolve(bom_row.description) if is_material(bom_row) else None,
+                'spec': bom_row.spec,
+                'unit': bom_row.unit,
+                'quantity': bom_row.quantity,
+                'value': bom_row.value,
+                'observations': bom_row.observations,
+            }
+
+    def to_dict(self):
+        return {
+            'projectId': self.project_id,
+            'projectName': self.project_name,
+            'sheetName': self.sheet_name,
+            'header': self.header,
+            'rows': list(self.records()),
+        }
+
+
+def is_material(bom_row):
+    """
+    True si la fila es un material o equipo: un ítem de una sección de
+    materiales. Las cargas del análisis eléctrico ('Bomba de filtrado'), el
+    desglose de consumo o la mano de obra no se resuelven en el catálogo.
+    """
+    return bom_row.kind == 'item' and SECTIONS_BY_KEY[bom_row.section].kind == 'item'
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _column_text(cells, columns):
+    """Texto de una columna, o de varias unidas con espacios ('40mm PVC')"""
+    if isinstance(columns, str):
+        return _text(cells.get(columns))
+    parts = [str(cells[column]) for column in columns if cells.get(column) not in (None, '', '-')]
+    return ' '.join(parts) or None
+
+
+def _bom_row(section, section_title, sheet_row):
+    cells = sheet_row.cells
+    style = (sheet_row.styles or {}).get('B')
+    layout = SECTIONS_BY_KEY[section]
+    # Sin columnas tipadas: la sección no tiene cantidades o la línea es 'note'
+    columns = {} if style == 'section' or sheet_row.kind == 'note' else (layout.columns or {})
+
+    fields = {name: _column_text(cells, column) for name, column in columns.items()}
+    value = cells.get(columns['quantity']) if 'quantity' in columns else None
+    quantity, parsed_unit = parse_quantity(value)
+
+    if style == 'section':
+        kind = 'title'
+    elif style in ('header', 'total', 'warning'):
+        kind = style
+    elif quantity is not None:
+        kind = sheet_row.kind or layout.kind
+    else:
+        kind = 'note'
+    if quantity is None:
+        # Encabezados de tabla ('Equipo | Potencia (W) | Corriente (A)') y notas
+        fields.pop('spec', None)
+        fields.pop('unit', None)
+
+    return BomRow(
+        section=section,
+        section_title=section_title,
+        row=sheet_row.row,
+        kind=kind,
+        description=_text(cells.get('B')),
+        spec=fields.get('spec'),
+        unit=fields.get('unit') or parsed_unit,
+        quantity=quantity,
+        value=_text(value),
+        observations=fields.get('observations'),
+        image=sheet_row.image,
+        sheet_row=sheet_row,
+    )
+
+
+def build_document(project_data):
+    """Construye el documento BOM de un proyecto"""
+    return BomDocument(project_data)
+
+
+# ===== RENDERIZADORES TABULARES =====
+
+def render_csv(document, output):
+    """
+    Escribe las filas del BOM en CSV (UTF-8 con BOM para que Excel respete acentos)
+
+    Args:
+        document: BomDocument
+        output: Ruta o stream de texto
+    """
+    with _open_text(output, encoding='utf-8-sig', newline='') as stream:
+        writer = csv.DictWriter(stream, fieldnames=TABLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(document.records())
+
+
+def render_jsonl(document, output):
+    """Escribe una línea JSON por fila del BOM"""
+    with _open_text(output, encoding='utf-8') as stream:
+        for record in document.records():
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def render_parquet(document, output):
+    """
+    Escribe las filas del BOM en Parquet (columnar). Requiere pyarrow.
+
+    La cantidad se guarda como float64 para que la columna tenga un solo tipo.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('La salida Parquet requiere pyarrow (pip install pyarrow)') from None
+
+    records = list(document.records())
+    columns = {name: [record[name] for record in records] for name in TABLE_COLUMNS}
+    columns['quantity'] = [None if q is None else float(q) for q in columns['quantity']]
+    schema = pa.schema([
+        (name, pa.int32() if name == 'row' else pa.float64() if name == 'quantity' else pa.string())
+        for name in TABLE_COLUMNS
+    ])
+    pq.write_table(pa.table(columns, schema=schema), output)
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'jsonl': render_jsonl,
+    'parquet': render_parquet,
+}
+
+
+@contextlib.contextmanager
+def _open_text(output, **kwargs):
+    """Abre una ruta en modo texto o usa un stream ya abierto sin cerrarlo"""
+    if hasattr(output, 'write'):
+        yield output
+        return
+    with open(output, 'w', **kwargs) as stream:
+        yield stream
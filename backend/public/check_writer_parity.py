@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Verificación de paridad entre motores de escritura.
+
+Exporta cada proyecto con el motor openpyxl (normal y streaming) y con el
+motor 'fast', vuelve a abrir los libros con openpyxl y compara con el normal
+celda por celda: nombre de hoja, valores, estilo
+con nombre, fuente, anchos de columna, altos de fila e imágenes (posición,
+tamaño y contenido). Sale con código 1 si encuentra diferencias.
+
+Uso:
+    python3 check_writer_parity.py proyecto.json [otro.json ...]
+    python3 check_writer_parity.py --batch proyectos.jsonl
+    python3 check_writer_parity.py --edge-cases     # casos límite incluidos (NaN, infinito)
+"""
+import argparse
+import contextlib
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+import openpyxl
+
+from export_to_excel import export_project_workbook, load_payload, load_projects_file
+
+
+def non_finite_project():
+    """Proyecto con cantidades NaN e infinitas (JSON acepta NaN/Infinity en Python)"""
+    nan, inf = float('nan'), float('inf')
+    return {
+        'projectId': 'NONFINITE',
+        'projectName': 'Cantidades no finitas',
+        'clientName': 'Paridad',
+        'pool': {'name': 'Prueba', 'length': 6, 'width': 3, 'volume': inf, 'waterMirrorArea': nan},
+        'supportBed': {'materials': {'cement': nan, 'sand': inf, 'mixed': -inf}},
+        'plumbing': {'items': [{'name': 'Codo 90°', 'diameter': '40mm', 'quantity': nan, 'type': 'PVC'}]},
+    }
+
+
+def invalid_title_project():
+    """Proyecto cuyo nombre de hoja tiene caracteres que Excel no admite y más de 31 caracteres"""
+    return {
+        'projectId': 'BADTITLE',
+        'projectName': 'Nombre de hoja inválido',
+        'clientName': 'Pérez / Hijos [Obra*2]: ¿Fase? \\ final',
+        'pool': {'name': 'Turquesa', 'length': 6, 'width': 3},
+        'supportBed': {'materials': {'cement': 5}},
+    }
+
+
+# Casos límite que se verifican con --edge-cases
+EDGE_CASES = {
+    'no-finitos': non_finite_project,
+    'nombre-de-hoja': invalid_title_project,
+}
+
+# Motores comparados contra el primero: (nombre, motor, streaming)
+ENGINES = (
+    ('openpyxl', 'openpyxl', False),
+    ('fast', 'fast', False),
+    ('streaming', 'openpyxl', True),
+)
+
+
+def sheet_snapshot(path, sheet_name=None):
+    """Contenido comparable de una hoja del libro (por defecto la primera)"""
+    wb = openpyxl.load_workbook(path)
+    ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+    cells = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value is None and cell.style == 'Normal':
+                continue
+            font = cell.font
+            cells[cell.coordinate] = (
+                cell.value,
+                cell.style,
+                font.name,
+                font.sz,
+                bool(font.b),
+                bool(font.i),
+                _color(font.color),
+            )
+    return {
+        'title': ws.title,
+        'cells': cells,
+        'widths': {key: dim.width for key, dim in ws.column_dimensions.items() if dim.customWidth},
+        'heights': {key: dim.height for key, dim in ws.row_dimensions.items() if dim.height},
+        'images': sorted(
+            (img.anchor._from.row, img.anchor._from.col, img.width, img.height,
+             hashlib.sha1(img._data()).hexdigest())
+            for img in ws._images
+        ),
+    }
+
+
+def _color(color):
+    if color is None:
+        return None
+    return (color.type, color.rgb if color.type == 'rgb' else color.theme)
+
+
+def compare(expected, actual):
+    """Lista de diferencias legibles entre dos snapshots"""
+    diffs = []
+    if expected['title'] != actual['title']:
+        diffs.append(f"nombre de hoja: {expected['title']!r} != {actual['title']!r}")
+    for ref in sorted(set(expected['cells']) | set(actual['cells'])):
+        if expected['cells'].get(ref) != actual['cells'].get(ref):
+            diffs.append(f"{ref}: {expected['cells'].get(ref)} != {actual['cells'].get(ref)}")
+    for key in ('widths', 'heights', 'images'):
+        if expected[key] != actual[key]:
+            diffs.append(f"{key}: {expected[key]} != {actual[key]}")
+    return diffs
+
+
+def check_project(project_data, workdir):
+    snapshots = {}
+    for name, engine, streaming in ENGINES:
+        path = Path(workdir) / f"{name}.xlsx"
+        with contextlib.redirect_stdout(sys.stderr):
+            export_project_workbook(path, project_data, engine=engine, streaming=streaming)
+        snapshots[name] = sheet_snapshot(path)
+
+    (expected_name, _, _), *others = ENGINES
+    return [
+        f"[{name}] {diff}"
+        for name, _, _ in others
+        for diff in compare(snapshots[expected_name], snapshots[name])
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara los motores de escritura openpyxl y fast')
+    parser.add_argument('projects', nargs='*', help='Archivos JSON/MessagePack de proyectos')
+    parser.add_argument('--batch', help='Lote de proyectos (JSON array o JSON-lines)')
+    parser.add_argument('--edge-cases', action='store_true', help='Verificar también EDGE_CASES')
+    args = parser.parse_args(argv)
+
+    projects = [(path, load_payload(path)) for path in args.projects]
+    if args.batch:
+        projects += [(f"{args.batch}[{n}]", data) for n, data in enumerate(load_projects_file(args.batch))]
+    if args.edge_cases:
+        projects += [(f"[{name}]", build()) for name, build in EDGE_CASES.items()]
+    if not projects:
+        parser.error('Indicar al menos un proyecto o --edge-cases')
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, project_data in projects:
+            diffs = check_project(project_data, workdir)
+            if diffs:
+                failures += 1
+                print(f"✗ {label}: {len(diffs)} diferencias")
+                for diff in diffs[:20]:
+                    print(f"    {diff}")
+            else:
+                print(f"✓ {label}")
+
+    print(f"{'✅' if not failures else '❌'} {len(projects) - failures}/{len(projects)} proyectos con paridad")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Imágenes de equipos para la exportación a Excel.
+
+- ThumbnailCache: miniaturas ya redimensionadas al tamaño de la exportación
+  (por el factor de DPI) y recomprimidas en JPEG o PNG optimizado dentro de
+  un presupuesto de bytes, guardadas en disco y en memoria con clave (ruta,
+  mtime, tamaño, configuración), para no procesar la foto original en cada
+  exportación.
+- shared_image + save_workbook: una misma imagen usada varias veces en el
+  libro (bomba, filtro, bomba recomendada) se guarda una sola vez dentro
+  del .xlsx.
+
+openpyxl (dibujos y escritor) y PIL se importan al primer uso: importar este
+módulo no los carga.
+"""
+import functools
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+import datetime
+
+# Carpeta de caché de la exportación (no se sirve por HTTP)
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'EXPORT_CACHE_DIR',
+    Path(__file__).parent / '.export-cache',
+))
+
+
+# Procesamiento de las imágenes incrustadas (configurable por entorno):
+#   scale: factor de DPI sobre el tamaño en pantalla (2 = nítidas en pantallas
+#          de alta densidad e impresión)
+#   format: 'auto' (JPEG, o PNG si la imagen tiene transparencia), 'jpeg' o 'png'
+#   quality: calidad JPEG inicial
+#   max_bytes: presupuesto por imagen; si se supera se baja la calidad JPEG
+#              (hasta MIN_JPEG_QUALITY), se reduce el PNG a paleta y, como
+#              último recurso, se usa factor 1
+ImageSettings = namedtuple('ImageSettings', ['scale', 'format', 'quality', 'max_bytes'])
+
+DEFAULT_IMAGE_SETTINGS = ImageSettings(
+    scale=float(os.environ.get('EXPORT_IMAGE_SCALE', 2)),
+    format=os.environ.get('EXPORT_IMAGE_FORMAT', 'auto'),
+    quality=int(os.environ.get('EXPORT_IMAGE_QUALITY', 85)),
+    max_bytes=int(os.environ.get('EXPORT_IMAGE_MAX_KB', 32)) * 1024,
+)
+
+# Bytes de miniaturas que la caché mantiene en memoria (el resto queda en disco)
+DEFAULT_MEMORY_MAX_BYTES = int(os.environ.get('EXPORT_THUMBNAIL_MEMORY_MB', 32)) * 1024 * 1024
+
+IMAGE_FORMATS = ('auto', 'jpeg', 'png')
+MIN_JPEG_QUALITY = 40
+
+
+class ThumbnailCache:
+    """
+    Caché de miniaturas con clave (ruta, mtime, tamaño de archivo, ancho, alto,
+    configuración de ImageSettings).
+
+    Primero busca en memoria (útil en el worker persistente) y después en
+    disco, así la miniatura se genera una sola vez por versión de la imagen.
+    La memoria se limita a max_bytes: al superarlo se descartan las
+    miniaturas menos usadas (siguen en disco).
+    """
+
+    def __init__(self, cache_dir=None, settings=DEFAULT_IMAGE_SETTINGS, max_bytes=DEFAULT_MEMORY_MAX_BYTES):
+        if settings.format not in IMAGE_FORMATS:
+            raise ValueError(f"Formato de imagen desconocido: {settings.format} "
+                             f"(opciones: {', '.join(IMAGE_FORMATS)})")
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / 'thumbnails'
+        self.settings = settings
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()  # clave -> bytes, de la menos a la más usada
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.source_bytes = 0  # originales procesados (misses)
+        self.output_bytes = 0  # miniaturas generadas (misses)
+
+    def get(self, image_path, width, height):
+        """
+        Devuelve los bytes (JPEG o PNG) de la imagen para mostrarla a width×height
+
+        Args:
+            image_path: Ruta de la imagen original
+            width: Ancho en pantalla, en píxeles
+            height: Alto en pantalla, en píxeles
+        """
+        image_path = Path(image_path)
+        stat = image_path.stat()
+        key = (f"{image_path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}:{width}x{height}:"
+               f"{':'.join(map(str, self.settings))}")
+
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return data
+
+        cache_file = self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.img"
+        if cache_file.exists():
+            data = cache_file.read_bytes()
+            self.hits += 1
+        else:
+            data = render_thumbnail(image_path, width, height, self.settings)
+            self.misses += 1
+            self.source_bytes += stat.st_size
+            self.output_bytes += len(data)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, cache_file)
+
+        self._remember(key, data)
+        return data
+
+    def _remember(self, key, data):
+        """Guarda la miniatura en memoria y descarta las menos usadas si se supera max_bytes"""
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._memory),
+            'bytes': self._memory_bytes,
+            'sourceBytes': self.source_bytes,
+            'outputBytes': self.output_bytes,
+        }
+
+
+def render_thumbnail(image_path, width, height, settings=DEFAULT_IMAGE_SETTINGS):
+    """
+    Redimensiona y recomprime una imagen para incrustarla en el libro
+
+    Args:
+        image_path: Ruta de la imagen original
+        width: Ancho en pantalla, en píxeles
+        height: Alto en pantalla, en píxeles
+        settings: ImageSettings
+
+    Returns:
+        Bytes JPEG o PNG
+    """
+    from PIL import Image as PILImage
+
+    size = (max(1, round(width * settings.scale)), max(1, round(height * settings.scale)))
+    with PILImage.open(image_path) as img:
+        # Los JPEG se decodifican ya reducidos (mucho más rápido con fotos grandes)
+        img.draft('RGB', size)
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        # La imagen se muestra estirada a width×height, igual que antes
+        thumb = img.resize(size, PILImage.LANCZOS)
+
+    fmt = settings.format
+    if fmt == 'auto':
+        fmt = 'png' if has_alpha else 'jpeg'
+    data = _encode_jpeg(thumb, settings) if fmt == 'jpeg' else _encode_png(thumb, settings)
+
+    if len(data) > settings.max_bytes and settings.scale > 1:
+        return render_thumbnail(image_path, width, height, settings._replace(scale=1))
+    return data
+
+
+def _encode_jpeg(image, settings):
+    """JPEG con la mayor calidad que entra en el presupuesto (mínimo MIN_JPEG_QUALITY)"""
+    from PIL import Image as PILImage
+
+    if image.mode == 'RGBA':
+        # JPEG no tiene transparencia: fondo blanco como la celda
+        background = PILImage.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    quality = settings.quality
+    while True:
+        data = _save(image, 'JPEG', quality=quality, optimize=True)
+        if len(data) <= settings.max_bytes or quality <= MIN_JPEG_QUALITY:
+            return data
+        quality = max(MIN_JPEG_QUALITY, quality - 10)
+
+
+def _encode_png(image, settings):
+    """PNG optimizado; si no entra en el presupuesto, con paleta de 256 colores"""
+    data = _save(image, 'PNG', optimize=True)
+    if len(data) > settings.max_bytes:
+        from PIL import Image as PILImage
+
+        method = PILImage.Quantize.FASTOCTREE if image.mode == 'RGBA' else PILImage.Quantize.MEDIANCUT
+        data = min(data, _save(image.quantize(256, method=method), 'PNG', optimize=True), key=len)
+    return data
+
+
+def _save(image, fmt, **options):
+    buffer = BytesIO()
+    image.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def _openpyxl_classes():
+    """Clases que extienden openpyxl, definidas al primer uso"""
+    from openpyxl.drawing.image import Image as XLImage
+    from openpyxl.writer.excel import ExcelWriter
+
+    class SharedImage(XLImage):
+        """
+        Imagen cuyo archivo dentro del .xlsx se nombra por el hash del contenido,
+        así varias apariciones de la misma imagen apuntan a un único archivo.
+        """
+
+        def __init__(self, data):
+            super().__init__(BytesIO(data))
+            self._bytes = data
+            self._digest = hashlib.sha1(data).hexdigest()[:16]
+
+        def _data(self):
+            return self._bytes
+
+        @property
+        def path(self):
+            return f"/xl/media/image_{self._digest}.{self.format}"
+
+    class DedupExcelWriter(ExcelWriter):
+        """ExcelWriter que escribe una sola vez cada archivo de imagen"""
+
+        def _write_images(self):
+            written = set()
+            for img in self._images:
+                if img.path in written:
+                    continue
+                written.add(img.path)
+                self._archive.writestr(img.path[1:], img._data())
+
+    return SharedImage, DedupExcelWriter
+
+
+def shared_image(data):
+    """
+    Imagen de openpyxl para `ws.add_image` a partir de los bytes del archivo;
+    las repeticiones de los mismos bytes se guardan una sola vez en el libro.
+    """
+    shared_image_class, _ = _openpyxl_classes()
+    return shared_image_class(data)
+
+
+def save_workbook(wb, filename):
+    """
+    Equivalente a `wb.save(filename)` pero deduplicando imágenes repetidas.
+
+    Args:
+        wb: Libro a guardar
+        filename: Ruta o stream binario
+    """
+    if wb.read_only:
+        raise TypeError("Workbook is read-only")
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+
+    with ZipFile(filename, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+        wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+        _, writer_class = _openpyxl_classes()
+        writer_class(wb, archive).save()
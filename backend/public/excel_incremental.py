@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Actualización incremental de la hoja de un proyecto.
+
+Con las secciones registradas en el índice de hojas (rango de filas y
+huella de cada una), al volver a exportar un proyecto solo se reescriben
+las secciones cuya huella cambió. Si una sección crece o se achica, las
+filas siguientes se desplazan junto con sus altos e imágenes.
+"""
+from copy import copy
+
+from openpyxl.utils.cell import coordinate_from_string
+
+
+def update_sections(ws, stored_sections, plan, write_rows):
+    """
+    Reescribe en `ws` el encabezado y las secciones que cambiaron.
+
+    Args:
+        ws: Hoja existente del proyecto (libro normal, no write-only)
+        stored_sections: Secciones registradas en el índice, en orden
+            [{key, firstRow, lastRow, fingerprint}]
+        plan: LayoutPlan nuevo del proyecto
+        write_rows: Función(ws, filas) que escribe SheetRow en la hoja
+
+    Returns:
+        Lista de claves de las secciones reescritas, o None si la hoja no se
+        puede actualizar por partes (cambiaron las secciones habilitadas o
+        su orden) y hay que reescribirla completa. Con None la hoja no se
+        modificó.
+    """
+    new_sections = [key for key in plan.sections if key != 'header']
+    if [section['key'] for section in stored_sections] != new_sections:
+        return None
+
+    # Verificar antes de tocar la hoja que los rangos viejos y nuevos coinciden
+    shift = 0
+    for section in stored_sections:
+        first, last = plan.sections[section['key']]
+        if section['firstRow'] + shift != first:
+            return None
+        shift += (last - first) - (section['lastRow'] - section['firstRow'])
+
+    # El encabezado es chico y tiene la fecha: se reescribe siempre
+    header = plan.section_rows('header') if 'header' in plan.sections else []
+    write_rows(ws, header)
+
+    fingerprints = plan.fingerprints
+    changed = []
+    for section in stored_sections:
+        key = section['key']
+        if fingerprints[key] == section['fingerprint']:
+            continue
+
+        first, last = plan.sections[key]
+        old_count = section['lastRow'] - section['firstRow'] + 1
+        new_count = last - first + 1
+        if new_count > old_count:
+            insert_rows(ws, first + old_count, new_count - old_count)
+        elif new_count < old_count:
+            delete_rows(ws, first + new_count, old_count - new_count)
+
+        clear_rows(ws, first, new_count)
+        write_rows(ws, plan.section_rows(key))
+        changed.append(key)
+
+    # Mantener las imágenes en orden de fila, como en una hoja recién escrita
+    ws._images.sort(key=_image_row)
+    return changed
+
+
+def clear_rows(ws, first, count):
+    """Borra celdas, imágenes y altos de las filas first..first+count-1"""
+    last = first + count - 1
+    for row, col in [coord for coord in ws._cells if first <= coord[0] <= last]:
+        del ws._cells[(row, col)]
+    ws._images = [img for img in ws._images if not first <= _image_row(img) <= last]
+    for row in range(first, last + 1):
+        if row in ws.row_dimensions:
+            del ws.row_dimensions[row]
+
+
+def insert_rows(ws, idx, amount):
+    """ws.insert_rows que además desplaza altos de fila e imágenes"""
+    ws.insert_rows(idx, amount)
+    _shift_row_attributes(ws, idx, amount)
+
+
+def delete_rows(ws, idx, amount):
+    """ws.delete_rows que además quita/desplaza altos de fila e imágenes"""
+    clear_rows(ws, idx, amount)
+    ws.delete_rows(idx, amount)
+    _shift_row_attributes(ws, idx + amount, -amount)
+
+
+def _shift_row_attributes(ws, start, amount):
+    """Mueve altos de fila e imágenes desde la fila `start` en `amount` filas"""
+    moved = sorted((row for row in ws.row_dimensions if row >= start), reverse=amount > 0)
+    for row in moved:
+        dim = copy(ws.row_dimensions[row])
+        del ws.row_dimensions[row]
+        dim.index = row + amount
+        ws.row_dimensions[row + amount] = dim
+
+    for img in ws._images:
+        if _image_row(img) >= start:
+            _move_image(img, amount)
+
+
+def _image_row(img):
+    """Fila (1-based) donde está anclada la imagen"""
+    if isinstance(img.anchor, str):
+        return coordinate_from_string(img.anchor)[1]
+    return img.anchor._from.row + 1
+
+
+def _move_image(img, amount):
+    if isinstance(img.anchor, str):
+        column, row = coordinate_from_string(img.anchor)
+        img.anchor = f"{column}{row + amount}"
+        return
+    img.anchor._from.row += amount
+    to = getattr(img.anchor, 'to', None)
+    if to is not None:
+        to.row += amount
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Motor de diseño de la hoja de proyecto.
+
+Cada sección de la hoja (EXCAVACIÓN, CAMA DE APOYO, ...) se declara en
+SECTIONS: las secciones fijas como una lista de campos y las que dependen de
+tablas del proyecto (plomería, cargas, roles) con una función que genera sus
+líneas. El motor recorre las secciones, asigna los números de fila y produce
+el plan completo de la hoja, que luego consume cualquier escritor (celda por
+celda, write-only, ...) o se devuelve como JSON para una vista previa.
+"""
+import hashlib
+import json
+import re
+from collections import namedtuple
+from datetime import datetime
+
+# Fila de la hoja: celdas {columna: valor}, estilos {columna: clave de
+# excel_styles.STYLE_DEFINITIONS}, imagen opcional (URL) en la columna A y
+# tipo de fila para el BOM (ver Line)
+SheetRow = namedtuple('SheetRow', ['row', 'cells', 'styles', 'image', 'kind'], defaults=(None, None, None))
+
+# Línea de una sección, todavía sin número de fila. `kind` reemplaza el tipo
+# de fila que la sección da en el BOM: 'measure' para una medición dentro de
+# una sección de materiales, 'note' para una fila sin campos tipados.
+Line = namedtuple('Line', ['cells', 'styles', 'image', 'kind'], defaults=(None, None, None))
+
+# Campo de una sección fija: etiqueta, ruta del valor en project_data y
+# unidad (fija o tomada de `unit_path`, con `unit` como valor por defecto)
+Field = namedtuple('Field', ['label', 'path', 'unit', 'unit_path'], defaults=(None, None))
+
+# Sección de la hoja:
+#   key: clave en project_data['sections'] que la habilita
+#   title: título de la sección
+#   lines: tupla de Field/str (sección fija) o función(project_data) -> líneas
+#   when: condición extra opcional función(project_data) -> bool
+#   columns: columnas de los campos tipados del BOM ({campo: columna o tupla
+#            de columnas que se unen}); None si sus filas no tienen cantidades
+#   kind: tipo de fila en el BOM de las líneas con cantidad: 'item' (material
+#         o equipo a comprar), 'measure' (medición o cálculo) o 'labor'
+Section = namedtuple('Section', ['key', 'title', 'lines', 'when', 'columns', 'kind'],
+                     defaults=(None, None, 'item'))
+
+# Columnas tipadas del BOM (bom_document.py)
+MATERIAL_COLUMNS = {'spec': 'C', 'unit': 'D', 'quantity': 'E', 'observations': 'F'}
+# En plomería la columna D es el tipo de caño (PVC), parte de la especificación
+PLUMBING_COLUMNS = {'spec': ('C', 'D'), 'quantity': 'E', 'observations': 'F'}
+MEASURE_COLUMNS = {'unit': 'D', 'quantity': 'E', 'observations': 'F'}
+LABOR_COLUMNS = {'quantity': 'E'}
+
+# Mediciones de la sección de equipos (no son equipos a comprar)
+ELECTRICAL_MEASURES = ('Consumo total', 'Amperaje')
+
+# Versión del formato de la hoja: incrementarla al cambiar filas o estilos
+# invalida las exportaciones cacheadas (export_cache.py)
+LAYOUT_VERSION = 1
+
+COLUMN_WIDTHS = {'A': 2, 'B': 50, 'C': 15, 'D': 12, 'E': 12, 'F': 30}
+COLUMNS = 'ABCDEF'
+
+# Nombres de hoja: Excel no admite más de 31 caracteres ni estos caracteres
+# (la misma expresión que openpyxl.workbook.child.INVALID_TITLE_REGEX)
+MAX_SHEET_NAME = 31
+INVALID_SHEET_NAME_CHARACTERS = re.compile(r'[\\*?:/\[\]]')
+
+# Las secciones empiezan en esta fila, debajo del encabezado del proyecto
+FIRST_SECTION_ROW = 14
+
+
+def project_sheet_name(project_data):
+    """Nombre de hoja del proyecto (máximo 31 caracteres, sin caracteres prohibidos)"""
+    pool = project_data.get('pool', {})
+    return sanitize_sheet_name(f"{pool.get('name', 'Piscina')} - {project_data.get('clientName', 'Cliente')}")
+
+
+def sanitize_sheet_name(name):
+    """
+    Nombre de hoja válido: los caracteres que Excel no admite (/ \\ : [ ] * ?)
+    se reemplazan por '-' y se trunca a 31 caracteres
+    """
+    name = INVALID_SHEET_NAME_CHARACTERS.sub('-', str(name))[:MAX_SHEET_NAME]
+    return name or 'Hoja'
+
+
+def validate_sheet_name(name):
+    """
+    Rechaza un nombre de hoja que dejaría el libro ilegible, como openpyxl al
+    asignar Worksheet.title (que además solo advierte si supera 31 caracteres)
+
+    Raises:
+        ValueError: nombre vacío, con caracteres prohibidos o de más de 31 caracteres
+    """
+    if not name:
+        raise ValueError('El nombre de hoja no puede estar vacío')
+    match = INVALID_SHEET_NAME_CHARACTERS.search(name)
+    if match:
+        raise ValueError(f"Carácter inválido {match.group(0)!r} en el nombre de hoja {name!r}")
+    if len(name) > MAX_SHEET_NAME:
+        raise ValueError(f"El nombre de hoja {name!r} supera los {MAX_SHEET_NAME} caracteres")
+    return name
+
+
+def _get(data, path, default):
+    """Lee `path` ('excavation.length') con la misma semántica que dict.get"""
+    *parents, key = path.split('.')
+    for part in parents:
+        data = data.get(part, {})
+    return data.get(key, default)
+
+
+# ===== ENCABEZADO DEL PROYECTO (filas fijas 2-12) =====
+
+def _header_rows(project_data):
+    pool = project_data.get('pool', {})
+
+    # Fila 2: Título
+    yield SheetRow(2, {'B': 'Materiales e Instalación de Piscina'}, {'B': 'title'})
+
+    # Fila 4-8: Información del proyecto (etiquetas en negrita)
+    yield SheetRow(4, {'B': 'Fecha', 'C': datetime.now().strftime('%Y-%m-%d')}, {'B': 'header'})
+    yield SheetRow(5, {'B': 'Cliente', 'C': project_data.get('clientName', '-')}, {'B': 'header'})
+    yield SheetRow(6, {'B': 'Domicilio', 'C': project_data.get('address', '-')}, {'B': 'header'})
+    yield SheetRow(7, {
+        'B': 'Piscina',
+        'C': f"{pool.get('name', '-')} ({pool.get('length', 0)}×{pool.get('width', 0)} m x {pool.get('shallowDepth', 0)} a {pool.get('deepDepth', 0)} metros de profundidad)",
+    }, {'B': 'header'})
+    yield SheetRow(8, {
+        'B': 'Volumen',
+        'C': f"{pool.get('volume', 0):.2f} m³ / Espejo de agua: {pool.get('waterMirrorArea', 0):.2f} m²",
+    }, {'B': 'header'})
+
+    # Fila 10: Encabezados de tabla
+    yield SheetRow(10, {
+        'B': 'Materiales / Consumible',
+        'C': 'Diámetro/Tipo',
+        'D': 'Unidad',
+        'E': 'Cantidad',
+        'F': 'Observaciones',
+    }, dict.fromkeys('BCDEF', 'header'))
+
+    # Fila 12: Responsable
+    yield SheetRow(12, {'B': project_data.get('responsible', 'Jesús Olguin')}, {'B': 'header'})
+
+
+# ===== SECCIONES CON TABLAS DEL PROYECTO =====
+
+def _plumbing_lines(project_data):
+    # Items de plomería con detalles completos
+    plumbing_items = project_data.get('plumbing', {}).get('items', [])
+    if not plumbing_items:
+        yield Line({'B': 'Sin items de plomería especificados'})
+        return
+
+    for item in plumbing_items:
+        yield Line({
+            'B': item.get('name', '-'),
+            'C': item.get('diameter', '-'),
+            'D': item.get('type', 'PVC'),
+            'E': item.get('quantity', 0),
+            'F': item.get('observations', '-'),
+        })
+
+
+def _electrical_lines(project_data):
+    electrical = project_data.get('electrical', {})
+
+    # Bomba (con imagen si está disponible, en la columna A)
+    pump = electrical.get('pump', {})
+    yield Line({
+        'B': 'Bomba',
+        'C': pump.get('power', '-'),
+        'E': 1,
+        'F': pump.get('observations', '-'),
+    }, image=pump.get('imageUrl', None))
+
+    # Filtro (con imagen si está disponible)
+    filter_data = electrical.get('filter', {})
+    yield Line({
+        'B': 'Filtro',
+        'C': filter_data.get('diameter', '-'),
+        'E': 1,
+        'F': filter_data.get('observations', '-'),
+    }, image=filter_data.get('imageUrl', None))
+
+    # Especificaciones eléctricas
+    watts_label, amps_label = ELECTRICAL_MEASURES
+    yield Line({'B': watts_label, 'E': f"{electrical.get('watts', 0)} W"}, kind='measure')
+    yield Line({'B': amps_label, 'E': f"{electrical.get('amps', 0)} A"}, kind='measure')
+
+    # Consumo desglosado
+    consumption = electrical.get('consumptionBreakdown', [])
+    if consumption:
+        yield Line({'B': 'Desglose de consumo:'}, {'B': 'header'})
+        for item in consumption:
+            yield Line({'B': f"  {item.get('item', '-')}", 'E': f"{item.get('watts', 0)} W"}, kind='measure')
+
+
+def _hydraulic_lines(project_data):
+    hydraulic_analysis = project_data['hydraulicAnalysis']
+
+    # TDH (Total Dynamic Head)
+    tdh = hydraulic_analysis.get('totalDynamicHead', 0)
+    yield Line({
+        'B': 'TDH Total (Altura Dinámica Total)',
+        'E': f"{tdh:.2f} m",
+        'F': 'Altura que debe vencer la bomba',
+    })
+
+    # Pérdidas por fricción y singulares (el total va en negrita)
+    friction = hydraulic_analysis.get('frictionLoss', {})
+    yield Line({'B': 'Pérdida por fricción (succión)', 'E': f"{friction.get('suction', 0):.2f} m"})
+    yield Line({'B': 'Pérdida por fricción (retorno)', 'E': f"{friction.get('return', 0):.2f} m"})
+    yield Line({'B': 'Pérdida por fricción total', 'E': f"{friction.get('total', 0):.2f} m"}, {'B': 'header'})
+
+    singular = hydraulic_analysis.get('singularLoss', {})
+    yield Line({'B': 'Pérdida singular (accesorios succión)', 'E': f"{singular.get('suction', 0):.2f} m"})
+    yield Line({'B': 'Pérdida singular (accesorios retorno)', 'E': f"{singular.get('return', 0):.2f} m"})
+    yield Line({'B': 'Pérdida singular total', 'E': f"{singular.get('total', 0):.2f} m"}, {'B': 'header'})
+
+    # Validaciones de velocidad
+    velocity_checks = hydraulic_analysis.get('velocityChecks', [])
+    if velocity_checks:
+        yield Line({'B': 'Validación de velocidades:'}, {'B': 'header'})
+        for check in velocity_checks:
+            status = '✓ OK' if check.get('isOk', False) else '⚠ Fuera de rango'
+            yield Line({
+                'B': f"  {check.get('lineType', '-')}: {check.get('velocity', 0):.2f} m/s - {status}",
+                'F': 'Rango óptimo: 1.5-2.5 m/s',
+            })
+
+    # Advertencias
+    warnings = hydraulic_analysis.get('warnings', [])
+    if warnings:
+        yield Line({'B': 'Advertencias:'}, {'B': 'header'})
+        for warning in warnings:
+            yield Line({'B': f"  ⚠ {warning}"}, {'B': 'warning'})
+
+    # Bomba recomendada
+    recommended_pump = hydraulic_analysis.get('recommendedPump', None)
+    if recommended_pump:
+        yield Line({'B': 'Bomba seleccionada según TDH:'}, {'B': 'header'})
+        yield Line({
+            'B': f"  {recommended_pump.get('name', '-')}",
+            'C': recommended_pump.get('flowRate', '-'),
+            'F': recommended_pump.get('description', '-'),
+        }, image=recommended_pump.get('imageUrl', None))
+
+
+def _electrical_analysis_lines(project_data):
+    electrical_analysis = project_data['electricalAnalysis']
+
+    # Potencia total
+    total_power = electrical_analysis.get('totalPowerInstalled', 0)
+    demand_power = electrical_analysis.get('totalPowerDemand', 0)
+    total_current = electrical_analysis.get('totalCurrent', 0)
+
+    yield Line({'B': 'Potencia instalada total', 'E': f"{total_power:.0f} W"})
+    yield Line({
+        'B': 'Potencia de demanda (con simultaneidad)',
+        'E': f"{demand_power:.0f} W",
+        'F': 'Considera factor de simultaneidad',
+    })
+    yield Line({
+        'B': 'Corriente total calculada',
+        'E': f"{total_current:.2f} A",
+        'F': 'Con factor de potencia y eficiencia',
+    }, {'B': 'header'})
+
+    # Cable dimensionado
+    cable = electrical_analysis.get('cable', {})
+    yield Line({
+        'B': 'Cable recomendado',
+        'C': f"{cable.get('section', '-')} mm²",
+        'F': f"Caída de tensión: {cable.get('voltageDrop', 0):.2f}% (máx 3%)",
+    })
+    yield Line({'B': 'Capacidad de corriente del cable', 'E': f"{cable.get('currentCapacity', 0):.1f} A"})
+
+    # Protecciones
+    protection = electrical_analysis.get('protection', {})
+    yield Line({
+        'B': 'Interruptor termomagnético (Breaker)',
+        'C': f"{protection.get('breakerSize', 0)} A",
+        'F': 'Curva C recomendada',
+    })
+    yield Line({
+        'B': 'Diferencial (RCD)',
+        'C': f"{protection.get('rcdSize', 0)} A / 30 mA",
+        'F': 'Obligatorio para piscinas',
+    })
+
+    # Cargas individuales
+    loads = electrical_analysis.get('loads', [])
+    if loads:
+        yield Line({'B': 'Desglose de cargas eléctricas:'}, {'B': 'header'})
+        yield Line({
+            'B': 'Equipo',
+            'C': 'Potencia (W)',
+            'D': 'Corriente (A)',
+            'E': 'FP (cos φ)',
+            'F': 'Observaciones',
+        }, dict.fromkeys('BCDEF', 'header'))
+        for load in loads:
+            # Tabla propia (potencia, corriente, cos φ): sin campos tipados en el BOM
+            yield Line({
+                'B': load.get('name', '-'),
+                'C': f"{load.get('power', 0)} W",
+                'D': f"{load.get('current', 0):.2f} A",
+                'E': f"{load.get('powerFactor', 1):.2f}",
+                'F': f"Eficiencia: {load.get('efficiency', 1):.0%}",
+            }, kind='note')
+
+    # Costo operativo
+    operating_cost = electrical_analysis.get('operatingCost', {})
+    if operating_cost:
+        yield Line({'B': 'Costo operativo estimado:'}, {'B': 'header'})
+        yield Line({'B': 'Consumo diario', 'E': f"{operating_cost.get('dailyKwh', 0):.2f} kWh"})
+        yield Line({
+            'B': 'Costo mensual estimado',
+            'E': f"${operating_cost.get('monthlyCost', 0):.2f}",
+            'F': '8 hrs/día promedio',
+        })
+        yield Line({'B': 'Costo anual estimado', 'E': f"${operating_cost.get('annualCost', 0):.2f}"})
+
+    # Advertencias eléctricas
+    elec_warnings = electrical_analysis.get('warnings', [])
+    if elec_warnings:
+        yield Line({'B': 'Advertencias eléctricas:'}, {'B': 'header'})
+        for warning in elec_warnings:
+            yield Line({'B': f"  ⚠ {warning}"}, {'B': 'warning'})
+
+
+def _labor_lines(project_data):
+    roles = project_data.get('labor', {}).get('roles', [])
+    if not roles:
+        yield Line({'B': 'Sin mano de obra especificada'})
+        return
+
+    yield Line({'B': 'Rol', 'C': 'Tareas', 'D': 'Horas', 'E': 'Costo'}, dict.fromkeys('BCDE', 'header'))
+
+    total_labor_cost = 0
+    for role in roles:
+        yield Line({
+            'B': role.get('role', '-'),
+            'C': role.get('tasks', 0),
+            'D': role.get('hours', 0),
+            'E': f"${role.get('cost', 0):,.2f}",
+        })
+        total_labor_cost += role.get('cost', 0)
+
+    # Total de mano de obra
+    yield Line({'B': 'TOTAL MANO DE OBRA', 'E': f"${total_labor_cost:,.2f}"}, {'B': 'total', 'E': 'total'})
+
+
+# ===== DECLARACIÓN DE SECCIONES (en orden de aparición) =====
+
+SECTIONS = (
+    Section('excavation', 'EXCAVACIÓN', (
+        Field('Longitud de excavación', 'excavation.length', unit='m'),
+        Field('Ancho de excavación', 'excavation.width', unit='m'),
+        Field('Profundidad de excavación', 'excavation.depth', unit='m'),
+        Field('Volumen total de excavación', 'excavation.volume', unit='m³'),
+    ), columns=MEASURE_COLUMNS, kind='measure'),
+    Section('supportBed', 'CAMA DE APOYO', (
+        Field('Cemento para la cama', 'supportBed.materials.cement', 'bolsas', 'supportBed.materials.cementUnit'),
+        Field('Arena gruesa', 'supportBed.materials.sand', 'm³', 'supportBed.materials.sandUnit'),
+        Field('Mixto para la cama', 'supportBed.materials.mixed', 'm³', 'supportBed.materials.mixedUnit'),
+    ), columns=MATERIAL_COLUMNS),
+    Section('sidewalk', 'VEREDA', (
+        Field('Cemento para vereda', 'sidewalk.materials.cement', 'bolsas', 'sidewalk.materials.cementUnit'),
+        Field('Arena para vereda', 'sidewalk.materials.sand', 'm³', 'sidewalk.materials.sandUnit'),
+        Field('Piedra para vereda', 'sidewalk.materials.stone', 'm³', 'sidewalk.materials.stoneUnit'),
+        Field('Malla sima', 'sidewalk.materials.mesh', 'unidad', 'sidewalk.materials.meshUnit'),
+    ), columns=MATERIAL_COLUMNS),
+    Section('plumbing', 'PLOMERÍA Y MATERIALES PVC', _plumbing_lines, columns=PLUMBING_COLUMNS),
+    Section('electrical', 'INSTALACIÓN ELÉCTRICA Y EQUIPOS', _electrical_lines, columns=MATERIAL_COLUMNS),
+    Section('hydraulicAnalysis', 'ANÁLISIS HIDRÁULICO PROFESIONAL', _hydraulic_lines,
+            when=lambda project_data: bool(project_data.get('hydraulicAnalysis', None)),
+            columns=MEASURE_COLUMNS, kind='measure'),
+    Section('electricalAnalysis', 'ANÁLISIS ELÉCTRICO PROFESIONAL', _electrical_analysis_lines,
+            when=lambda project_data: bool(project_data.get('electricalAnalysis', None)),
+            columns=MEASURE_COLUMNS, kind='measure'),
+    Section('labor', 'MANO DE OBRA', _labor_lines, columns=LABOR_COLUMNS, kind='labor'),
+    Section('sequence', 'SECUENCIA DE TRABAJO', (
+        '1. Marcado y replanteo del terreno',
+        '2. Excavación según dimensiones especificadas',
+        '3. Preparación de cama de apoyo',
+        '4. Instalación de la piscina',
+        '5. Instalación hidráulica (plomería)',
+        '6. Instalación eléctrica y equipos',
+        '7. Relleno y compactación',
+        '8. Construcción de vereda perimetral',
+        '9. Pruebas de funcionamiento',
+    )),
+    Section('standards', 'NORMAS Y OBSERVACIONES', (
+        '• Todos los materiales deben cumplir con normas IRAM vigentes',
+        '• La instalación eléctrica debe ser realizada por electricista matriculado',
+        '• Los equipos deben instalarse en lugar ventilado y protegido',
+        '• Realizar prueba de estanqueidad antes del llenado final',
+        '• Coordinar con albañil para trabajos de vereda y relleno',
+    )),
+)
+
+SECTION_KEYS = tuple(section.key for section in SECTIONS)
+SECTIONS_BY_KEY = {section.key: section for section in SECTIONS}
+
+
+def _section_lines(section, project_data):
+    """Líneas del cuerpo de una sección (sin el título)"""
+    if callable(section.lines):
+        yield from section.lines(project_data)
+        return
+
+    for spec in section.lines:
+        if isinstance(spec, str):
+            yield Line({'B': spec})
+        else:
+            unit = _get(project_data, spec.unit_path, spec.unit) if spec.unit_path else spec.unit
+            yield Line({'B': spec.label, 'D': unit, 'E': _get(project_data, spec.path, 0)})
+
+
+def enabled_sections(project_data):
+    """Secciones que se incluyen en la hoja según `sections` y los datos presentes"""
+    toggles = project_data.get('sections', {})
+    return [
+        section for section in SECTIONS
+        if toggles.get(section.key, True) and (section.when is None or section.when(project_data))
+    ]
+
+
+def iter_layout(project_data):
+    """
+    Recorre el diseño de la hoja asignando números de fila.
+
+    Es un generador: las tablas grandes se pueden volcar a medida que se
+    generan, sin armar antes la hoja en memoria.
+
+    Yields:
+        (clave de sección o 'header', SheetRow)
+    """
+    for sheet_row in _header_rows(project_data):
+        yield 'header', sheet_row
+
+    current_row = FIRST_SECTION_ROW
+    for section in enabled_sections(project_data):
+        yield section.key, SheetRow(current_row, {'B': section.title}, {'B': 'section'})
+        current_row += 1
+
+        for line in _section_lines(section, project_data):
+            yield section.key, SheetRow(current_row, line.cells, line.styles, line.image, line.kind)
+            current_row += 1
+
+        # Fila en blanco entre secciones
+        current_row += 1
+
+
+def iter_sheet_rows(project_data):
+    """Filas de la hoja del proyecto en orden (SheetRow), una por vez"""
+    for _, sheet_row in iter_layout(project_data):
+        yield sheet_row
+
+
+class LayoutPlan:
+    """
+    Plan completo de la hoja: filas con su número y rango de cada sección.
+    Se calcula en una sola pasada sobre project_data.
+    """
+
+    def __init__(self, project_data):
+        self.sheet_name = project_sheet_name(project_data)
+        self.rows = []
+        self._keys = []  # clave de sección de cada fila de `rows`
+        self.sections = {}  # clave -> [primera fila, última fila]
+        self._digests = {}  # clave -> hash del contenido de la sección
+
+        for key, sheet_row in iter_layout(project_data):
+            self.rows.append(sheet_row)
+            self._keys.append(key)
+            if key in self.sections:
+                self.sections[key][1] = sheet_row.row
+            else:
+                self.sections[key] = [sheet_row.row, sheet_row.row]
+                self._digests[key] = hashlib.sha256()
+            # La huella usa la posición relativa: no cambia si la sección se desplaza
+            offset = sheet_row.row - self.sections[key][0]
+            self._digests[key].update(json.dumps(
+                [offset, sheet_row.cells, sheet_row.styles, sheet_row.image],
+                sort_keys=True, default=str,
+            ).encode('utf-8'))
+
+    @property
+    def fingerprints(self):
+        """Huella de cada sección ({clave: hash}), para la actualización incremental"""
+        return {key: digest.hexdigest() for key, digest in self._digests.items()}
+
+    def section_rows(self, key):
+        """Filas de una sección"""
+        first, last = self.sections[key]
+        return [sheet_row for sheet_row in self.rows if first <= sheet_row.row <= last]
+
+    def keyed_rows(self):
+        """Filas con la clave de su sección, como las produce iter_layout"""
+        return zip(self._keys, self.rows)
+
+    def section_entries(self):
+        """Secciones (sin el encabezado) en el formato del índice de hojas"""
+        fingerprints = self.fingerprints
+        return [
+            {'key': key, 'firstRow': first, 'lastRow': last, 'fingerprint': fingerprints[key]}
+            for key, (first, last) in self.sections.items()
+            if key != 'header'
+        ]
+
+    @property
+    def last_row(self):
+        return self.rows[-1].row if self.rows else 0
+
+    def to_dict(self):
+        """Representación JSON del plan (vista previa sin generar el .xlsx)"""
+        return {
+            'sheetName': self.sheet_name,
+            'columnWidths': COLUMN_WIDTHS,
+            'lastRow': self.last_row,
+            'sections': [
+                {'key': key, 'firstRow': first, 'lastRow': last}
+                for key, (first, last) in self.sections.items()
+            ],
+            'rows': [
+                {
+                    'row': sheet_row.row,
+                    'cells': sheet_row.cells,
+                    'styles': sheet_row.styles or {},
+                    'image': sheet_row.image,
+                }
+                for sheet_row in self.rows
+            ],
+        }
+
+
+def plan_layout(project_data):
+    """Calcula el plan de la hoja sin construir ningún libro"""
+    return LayoutPlan(project_data)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Registro de estilos con nombre (NamedStyle) para las hojas exportadas.
+
+Los estilos se registran una vez por libro y las celdas los referencian por
+nombre, en lugar de crear y asignar objetos Font celda por celda.
+
+Las fuentes se declaran como FontSpec (sin openpyxl): el motor 'fast' las
+usa sin cargar openpyxl y los objetos Font se crean recién al registrar los
+estilos en un libro.
+"""
+from collections import namedtuple
+
+# Fuente de un estilo; color en ARGB como lo guarda openpyxl
+FontSpec = namedtuple('FontSpec', ['name', 'size', 'bold', 'color'], defaults=(False, None))
+
+# clave -> (nombre del estilo en el libro, fuente)
+STYLE_DEFINITIONS = {
+    'title': ('AQUAM Título', FontSpec('Arial', 14, bold=True)),
+    'header': ('AQUAM Encabezado', FontSpec('Arial', 11, bold=True)),
+    'section': ('AQUAM Sección', FontSpec('Arial', 12, bold=True)),
+    'normal': ('AQUAM Normal', FontSpec('Arial', 10)),
+    'total': ('AQUAM Total', FontSpec('Arial', 11, bold=True)),
+    # Las advertencias conservan la fuente por defecto del libro, como antes
+    # del registro de estilos
+    'warning': ('AQUAM Advertencia', FontSpec('Calibri', 11)),
+}
+
+STYLE_NAMES = {key: name for key, (name, _) in STYLE_DEFINITIONS.items()}
+
+
+def register_styles(wb):
+    """
+    Registra los estilos de la exportación en `wb` si todavía no existen.
+    Es idempotente: en un libro que ya los tiene no hace nada.
+    """
+    from openpyxl.styles import Font, NamedStyle
+
+    existing = set(wb.style_names)
+    for name, font in STYLE_DEFINITIONS.values():
+        if name not in existing:
+            wb.add_named_style(NamedStyle(name=name, font=Font(
+                name=font.name, size=font.size, bold=font.bold, color=font.color)))
+
+
+def style_name(key):
+    """Nombre del estilo registrado para una clave ('title', 'header', ...)"""
+    return STYLE_NAMES[key]
+
+
+def apply_row_style(ws, row, columns, key):
+    """
+    Aplica un estilo a varias columnas de una fila.
+
+    Args:
+        ws: Hoja de trabajo (normal, no write-only)
+        row: Número de fila
+        columns: Iterable de letras de columna ('BCDEF') o índices
+        key: Clave del estilo
+    """
+    from openpyxl.utils import column_index_from_string
+
+    name = STYLE_NAMES[key]
+    for col in columns:
+        column = col if isinstance(col, int) else column_index_from_string(col)
+        ws.cell(row=row, column=column).style = name
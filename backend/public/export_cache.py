@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Caché de exportaciones por contenido.
+
+La clave es el hash del proyecto canonicalizado junto con la versión del
+diseño de la hoja, las secciones habilitadas, la fecha de la hoja y la
+versión de las imágenes referenciadas. Si un proyecto se vuelve a
+descargar sin cambios, se devuelven los bytes del .xlsx ya generado.
+
+Los archivos viven en <EXPORT_CACHE_DIR>/exports y se descartan por
+antigüedad y por tamaño total (los menos usados primero).
+"""
+import hashlib
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from excel_images import DEFAULT_CACHE_DIR, DEFAULT_IMAGE_SETTINGS
+from excel_layout import LAYOUT_VERSION, enabled_sections
+from sheet_index import canonical_json
+
+# Límites por defecto (configurables por entorno)
+DEFAULT_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_MB', 200)) * 1024 * 1024
+DEFAULT_MAX_AGE = int(os.environ.get('EXPORT_CACHE_MAX_AGE_HOURS', 24 * 7)) * 3600
+
+_template_version = None
+
+
+def template_version():
+    """
+    Versión del formato de la hoja: LAYOUT_VERSION más el hash de los módulos
+    que definen filas, estilos, imágenes y el escritor rápido, para que cualquier cambio
+    invalide la caché.
+    """
+    global _template_version
+    if _template_version is None:
+        digest = hashlib.sha256()
+        here = Path(__file__).parent
+        for name in ('excel_layout.py', 'excel_styles.py', 'excel_images.py', 'xlsx_fast_writer.py'):
+            digest.update((here / name).read_bytes())
+        _template_version = f"{LAYOUT_VERSION}:{digest.hexdigest()[:12]}"
+    return _template_version
+
+
+def _image_versions(data, base_dir):
+    """(url, mtime, tamaño) de cada imageUrl del proyecto que exista en disco"""
+    found = []
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == 'imageUrl' and isinstance(item, str) and item:
+                    path = base_dir / item.lstrip('/')
+                    try:
+                        stat = path.stat()
+                        found.append((item, stat.st_mtime_ns, stat.st_size))
+                    except OSError:
+                        found.append((item, None, None))
+                else:
+                    stack.append(item)
+        elif isinstance(value, list):
+            stack.extend(value)
+    return sorted(found, key=lambda entry: entry[0])
+
+
+def export_cache_key(project_data, streaming=False, engine='openpyxl'):
+    """
+    Clave de la exportación de un proyecto a un libro independiente.
+
+    Incluye la fecha del día porque la hoja la muestra en el encabezado.
+    """
+    payload = {
+        'project': project_data,
+        'template': template_version(),
+        'sections': [section.key for section in enabled_sections(project_data)],
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'images': _image_versions(project_data, Path(__file__).parent.parent),
+        'imageSettings': list(DEFAULT_IMAGE_SETTINGS),
+        'streaming': bool(streaming),
+        'engine': engine,
+    }
+    return hashlib.sha256(canonical_json(payload).encode('utf-8')).hexdigest()
+
+
+class ExportCache:
+    """
+    Caché en disco de libros .xlsx generados, con clave por contenido.
+
+    Los contadores (hits, misses, evictions) se exponen con stats() y el
+    worker los publica en su respuesta de health.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / 'exports'
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.xlsx"
+
+    def get(self, key):
+        """Bytes del .xlsx cacheado o None"""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self.max_age:
+                path.unlink()
+                self.evictions += 1
+                raise FileNotFoundError(path)
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Marcar como usado recientemente (el mtime ordena el descarte)
+        os.utime(path)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Descarta entradas vencidas y, si se supera max_bytes, las menos usadas"""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob('*.xlsx'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+            self.evictions += 1
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        entries = list(self.cache_dir.glob('*.xlsx')) if self.cache_dir.exists() else []
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': sum(path.stat().st_size for path in entries if path.exists()),
+        }
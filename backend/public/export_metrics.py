@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Métricas estructuradas de una exportación.
+
+Con la instrumentación activada el exportador mide la carga del libro, el
+cálculo del diseño, cada sección de la hoja (excavación ... normas), la
+incrustación de imágenes y el guardado, y cuenta filas escritas, imágenes
+agregadas y bytes generados. El resultado es un objeto JSON (to_dict) que
+se imprime, se agrega a un archivo de métricas o vuelve en la respuesta
+del worker.
+
+Las fases no se superponen: el tiempo de las filas escritas durante otra
+fase (por ejemplo el guardado del motor 'fast' o de una hoja write-only,
+que generan las filas mientras escriben el archivo) se descuenta de esa
+fase y queda en `sections`. El tiempo de imágenes ya está incluido en la
+sección de su fila y se informa además por separado.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+
+class ExportMetrics:
+    """
+    Acumula tiempos (en segundos) y contadores de una exportación.
+
+    Uso:
+        metrics = ExportMetrics(mode='workbook', engine='fast')
+        with metrics.phase('templateLoad'):
+            ...
+        for sheet_row in metrics.timed_rows(plan.keyed_rows()):
+            ...
+    """
+
+    def __init__(self, **context):
+        self.context = context  # modo, motor, proyecto, ...
+        self.phases = {}  # fase -> segundos
+        self.sections = {}  # clave de sección -> segundos
+        self.rows = 0
+        self.images = 0
+        self.image_seconds = 0.0
+        self.bytes = 0
+        self._row_seconds = 0.0  # total de las filas, para descontarlo de las fases
+        self._started = time.perf_counter()
+        self.total_seconds = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Mide una fase; acumula si la misma fase se repite"""
+        started = time.perf_counter()
+        rows_before = self._row_seconds
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started - (self._row_seconds - rows_before)
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def timed_rows(self, keyed_rows):
+        """
+        Filas de la hoja que acumulan en `sections` el tiempo transcurrido
+        entre una fila y la siguiente (generar + escribir) en su sección.
+
+        Args:
+            keyed_rows: Iterable de (clave de sección o 'header', SheetRow)
+
+        Yields:
+            SheetRow
+        """
+        last_key, last_time = None, time.perf_counter()
+        for key, sheet_row in keyed_rows:
+            now = time.perf_counter()
+            if last_key is not None:
+                self._add_section(last_key, now - last_time)
+            last_key, last_time = key, now
+            self.rows += 1
+            yield sheet_row
+        if last_key is not None:
+            self._add_section(last_key, time.perf_counter() - last_time)
+
+    def _add_section(self, key, seconds):
+        self.sections[key] = self.sections.get(key, 0.0) + seconds
+        self._row_seconds += seconds
+
+    def image(self, load):
+        """
+        Ejecuta `load()` midiendo el tiempo de la imagen; cuenta las que
+        devuelven datos (las agregadas a la hoja).
+        """
+        started = time.perf_counter()
+        try:
+            data = load()
+        finally:
+            self.image_seconds += time.perf_counter() - started
+        if data:
+            self.images += 1
+        return data
+
+    def count_bytes(self, output):
+        """Registra el tamaño del .xlsx generado (ruta o stream binario)"""
+        try:
+            if hasattr(output, 'getbuffer'):
+                self.bytes = output.getbuffer().nbytes
+            elif hasattr(output, 'tell'):
+                self.bytes = output.tell()
+            else:
+                self.bytes = os.path.getsize(output)
+        except OSError:
+            # Stream sin posición (pipe): el tamaño queda sin registrar
+            pass
+
+    def finish(self):
+        """Fija el tiempo total de la exportación"""
+        self.total_seconds = time.perf_counter() - self._started
+
+    def to_dict(self):
+        if self.total_seconds is None:
+            self.finish()
+        total = self.total_seconds
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            **self.context,
+            'totalMs': _ms(total),
+            'phasesMs': {
+                **{name: _ms(seconds) for name, seconds in self.phases.items()},
+                'sections': _ms(self._row_seconds),
+                'images': _ms(self.image_seconds),
+            },
+            'sectionsMs': {key: _ms(seconds) for key, seconds in self.sections.items()},
+            'rows': self.rows,
+            'images': self.images,
+            'bytes': self.bytes,
+        }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def emit_metrics(metrics, target):
+    """
+    Publica las métricas como una línea JSON
+
+    Args:
+        metrics: ExportMetrics
+        target: '-' para stdout o ruta de un archivo de métricas (se agrega
+            una línea por exportación)
+    """
+    line = json.dumps(metrics.to_dict(), ensure_ascii=False)
+    if target == '-':
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+        return
+    with open(target, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
@@ -1,13 +1,96 @@
 #!/usr/bin/env python3
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.drawing.image import Image as XLImage
 import sys
 import json
-from datetime import datetime
+import time
+import argparse
+import contextlib
 import os
+from io import BytesIO
 from pathlib import Path
 
+try:
+    import orjson  # Decodificador JSON rápido (opcional)
+except ImportError:
+    orjson = None
+
+# openpyxl, PIL y los módulos que los usan (archivo, actualización
+# incremental, pool de procesos) se importan al primer uso: un --plan, un
+# --help o una exportación con el motor 'fast' no los cargan
+# (ver startup_bench.py)
+from excel_images import ThumbnailCache, save_workbook, shared_image
+from excel_styles import apply_row_style, register_styles, style_name
+from sheet_index import SheetIndex, content_hash, project_key
+from export_cache import ExportCache, export_cache_key
+import xlsx_fast_writer
+from bom_document import RENDERERS, build_document
+from export_metrics import ExportMetrics, emit_metrics
+from excel_layout import (
+    COLUMNS, COLUMN_WIDTHS, iter_layout, iter_sheet_rows, plan_layout, project_sheet_name, validate_sheet_name,
+)
+
+# Libro maestro por defecto (junto a este script)
+DEFAULT_EXCEL_PATH = Path(__file__).parent / 'CALCULADORA MATERIALES AQUAM.xlsx'
+
+# Miniaturas de equipos reutilizadas entre exportaciones
+THUMBNAILS = ThumbnailCache()
+
+# Extensiones de archivos de entrada en MessagePack
+MSGPACK_EXTENSIONS = ('.msgpack', '.mpk')
+
+# Motores de escritura de libros independientes: 'openpyxl' (por defecto) y
+# 'fast', que genera el XML directamente (xlsx_fast_writer.py)
+ENGINES = ('openpyxl', 'fast')
+DEFAULT_ENGINE = os.environ.get('EXCEL_EXPORT_ENGINE', 'openpyxl')
+
+# Código de salida con el que el worker (modo stdin) pide ser relanzado
+RESTART_EXIT_CODE = 75
+
+
+class TemplateCache:
+    """
+    Mantiene en memoria los libros Excel ya parseados para no repetir
+    `openpyxl.load_workbook` en cada exportación.
+
+    Cada entrada se valida contra el mtime del archivo: si otro proceso lo
+    modificó, el libro se vuelve a cargar.
+    """
+
+    def __init__(self):
+        self._books = {}  # ruta -> (mtime, workbook)
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, excel_path):
+        excel_path = str(excel_path)
+        mtime = os.path.getmtime(excel_path)
+        cached = self._books.get(excel_path)
+        if cached and cached[0] == mtime:
+            self.hits += 1
+            return cached[1]
+
+        wb = _load_workbook(excel_path)
+        self._books[excel_path] = (mtime, wb)
+        self.loads += 1
+        return wb
+
+    def mark_saved(self, excel_path, wb):
+        """Registra que `wb` es el contenido actual del archivo recién guardado"""
+        excel_path = str(excel_path)
+        self._books[excel_path] = (os.path.getmtime(excel_path), wb)
+
+    def invalidate(self, excel_path=None):
+        if excel_path is None:
+            self._books.clear()
+        else:
+            self._books.pop(str(excel_path), None)
+
+    def stats(self):
+        return {
+            'templates': list(self._books.keys()),
+            'loads': self.loads,
+            'hits': self.hits,
+        }
+
 def add_image_to_cell(ws, image_url, cell_ref, width=100, height=100):
     """
     Agrega una imagen a una celda del Excel si existe
@@ -22,10 +105,31 @@ def add_image_to_cell(ws, image_url, cell_ref, width=100, height=100):
     Returns:
         True si se agregó la imagen, False si no
     """
+    data = load_thumbnail(image_url, cell_ref, width, height)
+    if data is None:
+        return False
+
+    # Las repeticiones de la misma imagen se guardan una sola vez en el libro
+    img = shared_image(data)
+    img.width = width
+    img.height = height
+
+    # Agregar a la celda
+    ws.add_image(img, cell_ref)
+    return True
+
+def load_thumbnail(image_url, cell_ref, width=100, height=100):
+    """
+    Miniatura JPEG/PNG de una imagen del proyecto (caché en memoria y disco,
+    ver ImageSettings en excel_images.py)
+
+    Returns:
+        Bytes de la imagen, o None si la URL no es válida o la imagen no existe
+    """
     try:
         # Construir ruta absoluta desde la URL relativa
         if not image_url or not image_url.startswith('/'):
-            return False
+            return None
 
         # Ruta base del proyecto
         base_path = Path(__file__).parent.parent  # backend/
@@ -33,558 +137,989 @@ def add_image_to_cell(ws, image_url, cell_ref, width=100, height=100):
 
         if not image_path.exists():
             print(f"⚠ Imagen no encontrada: {image_path}")
-            return False
-
-        # Crear objeto de imagen
-        img = XLImage(str(image_path))
+            return None
 
-        # Redimensionar
-        img.width = width
-        img.height = height
-
-        # Agregar a la celda
-        ws.add_image(img, cell_ref)
+        data = THUMBNAILS.get(image_path, width, height)
         print(f"✓ Imagen agregada: {image_path.name} en {cell_ref}")
-        return True
+        return data
     except Exception as e:
         print(f"Error al agregar imagen {image_url}: {e}")
-        return False
+        return None
 
-def export_project_to_excel(excel_path, project_data):
+def export_project_to_excel(excel_path, project_data, cache=None, archive=None, incremental=False, metrics=None):
     """
     Exporta un proyecto a una nueva hoja en el Excel siguiendo el formato existente
 
     Args:
         excel_path: Ruta al archivo Excel
         project_data: Diccionario con los datos del proyecto
+        cache: TemplateCache opcional para reutilizar el libro ya cargado
+        archive: Opciones de workbook_archive.archive_sheets (keep_days,
+            archive_dir, shard_by) para mover antes de guardar las hojas viejas
+        incremental: Si la hoja ya existe, reescribir solo las secciones
+            cuya huella cambió (ver excel_incremental.py)
+        metrics: ExportMetrics opcional (ver export_metrics.py)
+
+    El índice de hojas (sheet_index.py) junto al libro se actualiza después
+    de guardar.
     """
 
     # Cargar el libro existente
-    wb = openpyxl.load_workbook(excel_path)
+    with _phase(metrics, 'templateLoad'):
+        if cache is not None:
+            wb = cache.get(excel_path)
+        else:
+            wb = _load_workbook(excel_path)
+
+    with SheetIndex(excel_path) as index:
+        try:
+            key, sheet_name = _resolve_sheet_name(index, wb, project_data)
+            with _phase(metrics, 'layout'):
+                plan = plan_layout(project_data)
+            changed = None
+            if incremental:
+                with _phase(metrics, 'incrementalUpdate'):
+                    changed = _update_project_sheet(index, key, wb, sheet_name, plan, metrics)
+            if changed is None:
+                _write_project_sheet(wb, project_data, sheet_name=sheet_name,
+                                     rows=_plan_rows(plan, metrics), metrics=metrics)
+            else:
+                print(f"♻️ Secciones actualizadas: {', '.join(changed) or 'ninguna'}")
+            archived = []
+            if archive:
+                from workbook_archive import archive_sheets
+
+                with _phase(metrics, 'archive'):
+                    archived = archive_sheets(wb, excel_path, **archive)
+                if archived:
+                    print(f"📦 {len(archived)} hojas viejas movidas al archivo")
+            with _phase(metrics, 'save'):
+                save_workbook(wb, excel_path)
+        except Exception:
+            # El libro en memoria puede haber quedado a medio modificar
+            if cache is not None:
+                cache.invalidate(excel_path)
+            raise
+
+        if cache is not None:
+            cache.mark_saved(excel_path, wb)
+
+        with _phase(metrics, 'index'):
+            # Registrar antes de marcar el archivo: con keep_days=0 la hoja
+            # recién exportada también puede haberse archivado
+            _record_sheet(index, key, wb, sheet_name, project_data, plan)
+            for entry in archived:
+                index.mark_archived(entry['sheet'], entry['archive'], entry['archiveSheet'])
+
+    if metrics is not None:
+        metrics.count_bytes(excel_path)
+        metrics.finish()
+    print(f"✅ Hoja '{sheet_name}' agregada exitosamente al Excel")
+    return sheet_name
+
+def export_project_workbook(output, project_data, streaming=False, export_cache=None, engine='openpyxl',
+                            metrics=None):
+    """
+    Exporta un proyecto a un libro nuevo e independiente.
+
+    El libro maestro no se abre ni se modifica: el costo de la exportación
+    no depende de cuántos proyectos se exportaron antes y varias
+    exportaciones pueden correr en paralelo sin pisarse.
+
+    Args:
+        output: Ruta del .xlsx a generar o stream binario (ej: io.BytesIO)
+        project_data: Diccionario con los datos del proyecto
+        streaming: Usar una hoja write-only (memoria constante para tablas grandes)
+        export_cache: ExportCache opcional; si el mismo proyecto ya se exportó
+            se devuelven los bytes guardados sin regenerar la hoja
+        engine: Motor de escritura (ver ENGINES): 'openpyxl' o 'fast'
+            (XML directo, ver xlsx_fast_writer.py)
+        metrics: ExportMetrics opcional (ver export_metrics.py)
+
+    Returns:
+        Nombre de la hoja creada
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de escritura desconocido: {engine} (opciones: {', '.join(ENGINES)})")
+
+    key = None
+    if export_cache is not None:
+        with _phase(metrics, 'cacheLookup'):
+            key = export_cache_key(project_data, streaming, engine)
+            data = export_cache.get(key)
+        if data is not None:
+            _write_output(output, data)
+            sheet_name = project_sheet_name(project_data)
+            if metrics is not None:
+                metrics.context['cached'] = True
+                metrics.bytes = len(data)
+                metrics.finish()
+            print(f"♻️ Hoja '{sheet_name}' servida desde la caché de exportaciones")
+            return sheet_name
+
+    rows = None
+    if metrics is not None:
+        rows = metrics.timed_rows(iter_layout(project_data))
+
+    if engine == 'fast':
+        sheet_name = project_sheet_name(project_data)
+        save = lambda target: _write_fast_workbook(target, sheet_name, project_data, rows=rows, metrics=metrics)
+    else:
+        with _phase(metrics, 'templateLoad'):
+            wb = _new_workbook(streaming)
+        sheet_name = _write_project_sheet(wb, project_data, streaming=streaming, rows=rows, metrics=metrics)
+        save = lambda target: save_workbook(wb, target)
+
+    with _phase(metrics, 'save'):
+        if key is not None:
+            buffer = BytesIO()
+            save(buffer)
+            data = buffer.getvalue()
+            export_cache.put(key, data)
+            _write_output(output, data)
+        elif hasattr(output, 'write'):
+            save(output)
+        else:
+            _save_atomic(save, output)
+
+    if metrics is not None:
+        metrics.context['cached'] = False
+        if key is not None:
+            metrics.bytes = len(data)
+        else:
+            metrics.count_bytes(output)
+        metrics.finish()
+    print(f"✅ Hoja '{sheet_name}' exportada en un libro independiente")
+    return sheet_name
+
+def export_project_documents(project_data, outputs, engine='openpyxl', streaming=False, metrics=None):
+    """
+    Construye el documento BOM del proyecto una vez y lo escribe en varios
+    formatos (ver bom_document.py).
+
+    Args:
+        project_data: Diccionario con los datos del proyecto
+        outputs: {formato: ruta o stream} con formatos 'xlsx', 'csv', 'jsonl'
+            y 'parquet' (este último requiere pyarrow)
+        engine: Motor de escritura del .xlsx
+        streaming: Con el motor openpyxl, hoja write-only
+        metrics: ExportMetrics opcional (ver export_metrics.py); mide también
+            los formatos del BOM en la fase 'bom'
+
+    Returns:
+        BomDocument construido
+    """
+    unknown = set(outputs) - {'xlsx', *RENDERERS}
+    if unknown:
+        raise ValueError(f"Formatos desconocidos: {', '.join(sorted(unknown))}")
+
+    with _phase(metrics, 'layout'):
+        document = build_document(project_data)
+
+    if outputs.get('xlsx') is not None:
+        output = outputs['xlsx']
+        rows = document.sheet_rows() if metrics is None else metrics.timed_rows(document.keyed_rows())
+        if engine == 'fast':
+            save = lambda target: _write_fast_workbook(target, document.sheet_name, project_data,
+                                                       rows=rows, metrics=metrics)
+        else:
+            with _phase(metrics, 'templateLoad'):
+                wb = _new_workbook(streaming)
+            _write_project_sheet(wb, project_data, streaming=streaming,
+                                 sheet_name=document.sheet_name, rows=rows, metrics=metrics)
+            save = lambda target: save_workbook(wb, target)
+        with _phase(metrics, 'save'):
+            if hasattr(output, 'write'):
+                save(output)
+            else:
+                _save_atomic(save, output)
+        if metrics is not None:
+            metrics.count_bytes(output)
+
+    with _phase(metrics, 'bom'):
+        for fmt, renderer in RENDERERS.items():
+            if outputs.get(fmt) is not None:
+                renderer(document, outputs[fmt])
+
+    if metrics is not None:
+        metrics.finish()
+    formats = ', '.join(fmt for fmt, output in outputs.items() if output is not None)
+    print(f"✅ Hoja '{document.sheet_name}' exportada ({formats})")
+    return document
+
+def export_projects_to_excel(excel_path, projects, output=None, cache=None, streaming=False, workers=None):
+    """
+    Exporta varios proyectos en una sola pasada: el libro se carga una vez,
+    se construyen todas las hojas y se guarda una sola vez.
+
+    Un proyecto con errores no aborta el lote: su hoja parcial se descarta y
+    el error queda registrado en el resultado.
+
+    Args:
+        excel_path: Ruta al libro maestro (se modifica si no hay `output`)
+        projects: Lista de diccionarios con los datos de cada proyecto
+        output: Ruta o stream binario para generar un libro independiente
+        cache: TemplateCache opcional para reutilizar el libro ya cargado
+        streaming: Con `output`, escribir hojas write-only (memoria constante)
+        workers: Con `output`, construir las hojas en paralelo con este número
+            de procesos (0 = uno por núcleo; ver parallel_export.py)
+
+    Returns:
+        Lista con un resultado por proyecto, en el mismo orden:
+        {'index', 'projectId', 'ok', 'sheetName'} o {'index', 'projectId', 'ok', 'error'}
+    """
+    if workers is not None:
+        if output is None:
+            raise ValueError('La exportación en paralelo genera un libro independiente: indicar output')
+        return _export_projects_parallel(projects, output, workers)[0]
+
+    if output is not None:
+        wb = _new_workbook(streaming)
+    elif cache is not None:
+        wb = cache.get(excel_path)
+    else:
+        wb = _load_workbook(excel_path)
+
+    # El índice de hojas solo acompaña al libro maestro
+    sheet_index = SheetIndex(excel_path) if output is None else None
+    claimed = {}  # nombre de hoja -> clave del proyecto, dentro de este lote
+    plans = {}  # nombre de hoja -> LayoutPlan (secciones para el índice)
+
+    results = []
+    for index, project_data in enumerate(projects):
+        result = {'index': index, 'projectId': project_data.get('projectId')}
+        sheets_before = set(wb.sheetnames)
+        try:
+            sheet_name = None
+            rows = None
+            if sheet_index is not None:
+                key, sheet_name = _resolve_sheet_name(sheet_index, wb, project_data, claimed)
+                claimed[sheet_name] = key
+                plans[sheet_name] = plan_layout(project_data)
+                rows = plans[sheet_name].rows
+            result['sheetName'] = _write_project_sheet(wb, project_data, streaming=streaming and output is not None,
+                                                       sheet_name=sheet_name, rows=rows)
+            result['ok'] = True
+            print(f"✓ [{index + 1}/{len(projects)}] {result['sheetName']}")
+        except Exception as e:
+            if sheet_name is not None:
+                claimed.pop(sheet_name, None)
+            # Descartar la hoja a medio construir
+            for name in set(wb.sheetnames) - sheets_before:
+                if hasattr(wb[name], 'close'):
+                    # Hoja write-only: cerrar su stream antes de quitarla
+                    wb[name].close()
+                del wb[name]
+            result['ok'] = False
+            result['error'] = str(e)
+            print(f"✗ [{index + 1}/{len(projects)}] Error: {e}")
+        results.append(result)
 
-    # Extraer datos anidados
-    pool = project_data.get('pool', {})
-    excavation = project_data.get('excavation', {})
-    support_bed = project_data.get('supportBed', {})
-    sidewalk = project_data.get('sidewalk', {})
-    plumbing = project_data.get('plumbing', {})
-    electrical = project_data.get('electrical', {})
-    labor = project_data.get('labor', {})
-    sections = project_data.get('sections', {})
+    try:
+        if not wb.sheetnames:
+            raise ValueError('Ningún proyecto del lote pudo exportarse')
+
+        try:
+            if output is None:
+                save_workbook(wb, excel_path)
+            elif hasattr(output, 'write'):
+                save_workbook(wb, output)
+            else:
+                _save_atomic(wb, output)
+        except Exception:
+            if cache is not None and output is None:
+                cache.invalidate(excel_path)
+            raise
+
+        if cache is not None and output is None:
+            cache.mark_saved(excel_path, wb)
+
+        if sheet_index is not None:
+            for project_data, result in zip(projects, results):
+                if result['ok']:
+                    _record_sheet(sheet_index, claimed[result['sheetName']], wb, result['sheetName'],
+                                  project_data, plans[result['sheetName']])
+    finally:
+        if sheet_index is not None:
+            sheet_index.close()
+
+    exported = sum(1 for r in results if r['ok'])
+    print(f"✅ Lote exportado: {exported}/{len(projects)} hojas")
+    return results
+
+def load_projects_file(path, fmt=None):
+    """
+    Lee un lote de proyectos desde un archivo JSON (array), JSON-lines o
+    MessagePack (array). Con '-' se lee desde stdin.
+    """
+    raw = _read_source(path)
+    if _detect_format(path, raw, fmt) == 'msgpack':
+        return _msgpack_loads(raw)
 
-    # Crear nombre de hoja basado en el proyecto
-    sheet_name = f"{pool.get('name', 'Piscina')} - {project_data.get('clientName', 'Cliente')}"[:31]  # Max 31 caracteres
+    if raw.lstrip().startswith(b'['):
+        return decode_json(raw)
+    return [decode_json(line) for line in raw.splitlines() if line.strip()]
+
+def load_payload(source, fmt=None):
+    """
+    Lee los datos de un proyecto desde un archivo o stdin ('-').
+
+    Args:
+        source: Ruta del archivo o '-' para stdin
+        fmt: 'json', 'msgpack' o None para detectarlo (extensión / primer byte)
+    """
+    raw = _read_source(source)
+    if _detect_format(source, raw, fmt) == 'msgpack':
+        return _msgpack_loads(raw)
+    return decode_json(raw)
+
+def decode_json(data):
+    """Decodifica JSON (str o bytes) con orjson si está instalado"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _read_source(source):
+    if source == '-':
+        return sys.stdin.buffer.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+def _detect_format(source, raw, fmt=None):
+    if fmt:
+        return fmt
+    if str(source).endswith(MSGPACK_EXTENSIONS):
+        return 'msgpack'
+    # Un documento JSON empieza con '{', '[' o espacios; un mapa/array
+    # MessagePack empieza con un byte de control (0x80-0x9f, 0xdc-0xdf)
+    first = raw.lstrip()[:1]
+    if first and first[0] >= 0x80:
+        return 'msgpack'
+    return 'json'
+
+def _msgpack_loads(raw):
+    try:
+        import msgpack
+    except ImportError:
+        raise RuntimeError('Para leer MessagePack hay que instalar msgpack (pip install msgpack)')
+    return msgpack.unpackb(raw, raw=False)
+
+def _load_workbook(excel_path):
+    import openpyxl
+
+    return openpyxl.load_workbook(excel_path)
+
+def _new_workbook(streaming=False):
+    """Libro vacío (sin la hoja por defecto) para exportaciones independientes"""
+    import openpyxl
+
+    if streaming:
+        return openpyxl.Workbook(write_only=True)
+
+    wb = openpyxl.Workbook()
+    # Quitar la hoja vacía que trae el libro nuevo
+    wb.remove(wb.active)
+    return wb
+
+def _save_atomic(wb, output_path):
+    """
+    Guarda en un archivo temporal y lo renombra, para no exponer archivos a medio escribir
+
+    Args:
+        wb: Libro, o función(destino) que escribe el .xlsx
+        output_path: Ruta final
+
+    Returns:
+        Lo que devuelva la función de escritura (None con un libro)
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        result = None
+        if callable(wb):
+            result = wb(tmp_path)
+        else:
+            save_workbook(wb, tmp_path)
+        os.replace(tmp_path, output_path)
+        return result
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def _write_output(output, data):
+    """Escribe bytes ya generados en un stream o, de forma atómica, en una ruta"""
+    if hasattr(output, 'write'):
+        output.write(data)
+        return
+    output_path = Path(output)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def _phase(metrics, name):
+    """Fase medida en `metrics`, o un contexto vacío sin instrumentación"""
+    return metrics.phase(name) if metrics is not None else contextlib.nullcontext()
+
+def _metered(metrics, load_image):
+    """Cargador de imágenes del motor 'fast' que mide y cuenta cada imagen"""
+    return lambda url, cell_ref: metrics.image(lambda: load_image(url, cell_ref))
+
+def _plan_rows(plan, metrics):
+    """Filas del plan; con métricas, medidas por sección"""
+    if metrics is None:
+        return plan.rows
+    return metrics.timed_rows(plan.keyed_rows())
+
+# Tamaño de las imágenes de equipos y alto de su fila
+IMAGE_SIZE = 80
+IMAGE_ROW_HEIGHT = 60
+
+def _write_fast_workbook(output, sheet_name, project_data, rows=None, metrics=None):
+    """Libro independiente con el motor 'fast' (XML directo, sin openpyxl)"""
+    load_image = lambda url, cell_ref: load_thumbnail(url, cell_ref, IMAGE_SIZE, IMAGE_SIZE)
+    if metrics is not None:
+        load_image = _metered(metrics, load_image)
+    xlsx_fast_writer.write_workbook(
+        output, sheet_name, rows if rows is not None else iter_sheet_rows(project_data),
+        load_image=load_image,
+        image_size=IMAGE_SIZE,
+        image_row_height=IMAGE_ROW_HEIGHT,
+    )
+
+def _export_projects_parallel(projects, output, workers=None):
+    """
+    Lote con las hojas construidas en un pool de procesos y unidas en un
+    solo libro (ver parallel_export.py)
+
+    Returns:
+        (resultados por proyecto, rendimiento del lote)
+    """
+    from parallel_export import iter_sheet_parts, throughput, worker_count
+
+    started = time.perf_counter()
+    workers = worker_count(workers)
+    results = []
+    save = lambda target: xlsx_fast_writer.write_sheets(
+        target, iter_sheet_parts(projects, results, workers), IMAGE_SIZE)
+    sheets = save(output) if hasattr(output, 'write') else _save_atomic(save, output)
+
+    stats = throughput(sheets, time.perf_counter() - started, workers)
+    exported = sum(1 for r in results if r['ok'])
+    print(f"✅ Lote exportado: {exported}/{len(projects)} hojas")
+    print(f"⚡ {stats['sheets']} hojas en {stats['seconds']} s con {workers} procesos "
+          f"({stats['sheetsPerSecond']} hojas/s)")
+    return results, stats
+
+def _resolve_sheet_name(index, wb, project_data, claimed=None):
+    """Clave del proyecto en el índice y nombre de hoja sin colisiones"""
+    base_name = project_sheet_name(project_data)
+    key = project_key(project_data, base_name)
+    return key, index.resolve_sheet_name(key, base_name, wb.sheetnames, claimed)
+
+def _record_sheet(index, key, wb, sheet_name, project_data, plan):
+    """Registra en el índice la hoja recién guardada y sus secciones"""
+    index.record(
+        key, sheet_name,
+        content_hash=content_hash(project_data),
+        row_count=wb[sheet_name].max_row if sheet_name in wb.sheetnames else plan.last_row,
+        client_name=project_data.get('clientName'),
+        sections=plan.section_entries(),
+    )
+
+def _update_project_sheet(index, key, wb, sheet_name, plan, metrics=None):
+    """
+    Actualización incremental de una hoja existente.
+
+    Returns:
+        Secciones reescritas, o None si hay que reescribir la hoja completa
+        (hoja nueva, sin secciones en el índice o modificada fuera del exportador)
+    """
+    entry = index.get(key)
+    if sheet_name not in wb.sheetnames or not entry or entry['sheet_name'] != sheet_name:
+        return None
+    ws = wb[sheet_name]
+    stored = index.sections(key)
+    if not stored or entry['row_count'] != ws.max_row:
+        return None
+    from excel_incremental import update_sections
+
+    return update_sections(ws, stored, plan, lambda ws, rows: _write_rows(ws, rows, metrics))
+
+def _write_project_sheet(wb, project_data, streaming=False, sheet_name=None, rows=None, metrics=None):
+    """
+    Crea (o reemplaza) la hoja del proyecto dentro de `wb`
+
+    Args:
+        wb: Libro destino
+        project_data: Diccionario con los datos del proyecto
+        streaming: Si es True, `wb` es un libro write-only y las filas se
+            escriben a medida que se generan (memoria constante)
+        sheet_name: Nombre ya resuelto con el índice de hojas (por defecto
+            el nombre derivado del proyecto)
+        rows: Filas ya calculadas (LayoutPlan.rows); por defecto se generan
+        metrics: ExportMetrics opcional; cuenta y mide las imágenes
+
+    Returns:
+        Nombre de la hoja creada
+    """
+    # Las mismas reglas que el motor 'fast': openpyxl solo advierte si supera 31 caracteres
+    sheet_name = validate_sheet_name(sheet_name or project_sheet_name(project_data))
 
     # Si ya existe, eliminarla
     if sheet_name in wb.sheetnames:
         del wb[sheet_name]
 
+    # Estilos con nombre: se registran una sola vez por libro
+    register_styles(wb)
+
     # Crear nueva hoja
     ws = wb.create_sheet(sheet_name)
 
-    # Configurar estilos
-    title_font = Font(name='Arial', size=14, bold=True)
-    header_font = Font(name='Arial', size=11, bold=True)
-    normal_font = Font(name='Arial', size=10)
-    section_font = Font(name='Arial', size=12, bold=True)
-
-    # Fila 2: Título
-    ws['B2'] = 'Materiales e Instalación de Piscina'
-    ws['B2'].font = title_font
-
-    # Fila 4-8: Información del proyecto
-    ws['B4'] = 'Fecha'
-    ws['C4'] = datetime.now().strftime('%Y-%m-%d')
-    ws['B5'] = 'Cliente'
-    ws['C5'] = project_data.get('clientName', '-')
-    ws['B6'] = 'Domicilio'
-    ws['C6'] = project_data.get('address', '-')
-    ws['B7'] = 'Piscina'
-    ws['C7'] = f"{pool.get('name', '-')} ({pool.get('length', 0)}×{pool.get('width', 0)} m x {pool.get('shallowDepth', 0)} a {pool.get('deepDepth', 0)} metros de profundidad)"
-    ws['B8'] = 'Volumen'
-    ws['C8'] = f"{pool.get('volume', 0):.2f} m³ / Espejo de agua: {pool.get('waterMirrorArea', 0):.2f} m²"
-
-    # Aplicar negrita a las etiquetas
-    for row in [4, 5, 6, 7, 8]:
-        ws[f'B{row}'].font = header_font
-
-    # Fila 10: Encabezados de tabla
-    ws['B10'] = 'Materiales / Consumible'
-    ws['C10'] = 'Diámetro/Tipo'
-    ws['D10'] = 'Unidad'
-    ws['E10'] = 'Cantidad'
-    ws['F10'] = 'Observaciones'
-    for col in ['B', 'C', 'D', 'E', 'F']:
-        ws[f'{col}10'].font = header_font
-
-    # Fila 12: Responsable
-    ws['B12'] = project_data.get('responsible', 'Jesús Olguin')
-    ws['B12'].font = header_font
-
-    current_row = 14
-
-    # ===== SECCIÓN: EXCAVACIÓN =====
-    if sections.get('excavation', True):
-        ws[f'B{current_row}'] = 'EXCAVACIÓN'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Longitud de excavación'
-        ws[f'D{current_row}'] = 'm'
-        ws[f'E{current_row}'] = excavation.get('length', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Ancho de excavación'
-        ws[f'D{current_row}'] = 'm'
-        ws[f'E{current_row}'] = excavation.get('width', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Profundidad de excavación'
-        ws[f'D{current_row}'] = 'm'
-        ws[f'E{current_row}'] = excavation.get('depth', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Volumen total de excavación'
-        ws[f'D{current_row}'] = 'm³'
-        ws[f'E{current_row}'] = excavation.get('volume', 0)
-        current_row += 2
-
-    # ===== SECCIÓN: CAMA DE APOYO =====
-    if sections.get('supportBed', True):
-        ws[f'B{current_row}'] = 'CAMA DE APOYO'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        materials = support_bed.get('materials', {})
-        ws[f'B{current_row}'] = 'Cemento para la cama'
-        ws[f'D{current_row}'] = materials.get('cementUnit', 'bolsas')
-        ws[f'E{current_row}'] = materials.get('cement', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Arena gruesa'
-        ws[f'D{current_row}'] = materials.get('sandUnit', 'm³')
-        ws[f'E{current_row}'] = materials.get('sand', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Mixto para la cama'
-        ws[f'D{current_row}'] = materials.get('mixedUnit', 'm³')
-        ws[f'E{current_row}'] = materials.get('mixed', 0)
-        current_row += 2
-
-    # ===== SECCIÓN: VEREDA =====
-    if sections.get('sidewalk', True):
-        ws[f'B{current_row}'] = 'VEREDA'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        materials = sidewalk.get('materials', {})
-        ws[f'B{current_row}'] = 'Cemento para vereda'
-        ws[f'D{current_row}'] = materials.get('cementUnit', 'bolsas')
-        ws[f'E{current_row}'] = materials.get('cement', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Arena para vereda'
-        ws[f'D{current_row}'] = materials.get('sandUnit', 'm³')
-        ws[f'E{current_row}'] = materials.get('sand', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Piedra para vereda'
-        ws[f'D{current_row}'] = materials.get('stoneUnit', 'm³')
-        ws[f'E{current_row}'] = materials.get('stone', 0)
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Malla sima'
-        ws[f'D{current_row}'] = materials.get('meshUnit', 'unidad')
-        ws[f'E{current_row}'] = materials.get('mesh', 0)
-        current_row += 2
-
-    # ===== SECCIÓN: PLOMERÍA =====
-    if sections.get('plumbing', True):
-        ws[f'B{current_row}'] = 'PLOMERÍA Y MATERIALES PVC'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        # Items de plomería con detalles completos
-        plumbing_items = plumbing.get('items', [])
-        if plumbing_items:
-            for item in plumbing_items:
-                ws[f'B{current_row}'] = item.get('name', '-')
-                ws[f'C{current_row}'] = item.get('diameter', '-')
-                ws[f'D{current_row}'] = item.get('type', 'PVC')
-                ws[f'E{current_row}'] = item.get('quantity', 0)
-                ws[f'F{current_row}'] = item.get('observations', '-')
-                current_row += 1
-        else:
-            ws[f'B{current_row}'] = 'Sin items de plomería especificados'
-            current_row += 1
-
-        current_row += 1
-
-    # ===== SECCIÓN: ELÉCTRICA =====
-    if sections.get('electrical', True):
-        ws[f'B{current_row}'] = 'INSTALACIÓN ELÉCTRICA Y EQUIPOS'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        # Bomba (con imagen si está disponible)
-        pump = electrical.get('pump', {})
-        pump_image_url = pump.get('imageUrl', None)
-
-        ws[f'B{current_row}'] = 'Bomba'
-        ws[f'C{current_row}'] = pump.get('power', '-')
-        ws[f'E{current_row}'] = 1
-        ws[f'F{current_row}'] = pump.get('observations', '-')
-
-        # Intentar agregar imagen de la bomba
-        if pump_image_url:
-            # La imagen se inserta en la columna A de las siguientes filas
-            image_added = add_image_to_cell(ws, pump_image_url, f'A{current_row}', width=80, height=80)
-            if image_added:
-                ws.row_dimensions[current_row].height = 60  # Ajustar altura de fila
-
-        current_row += 1
-
-        # Filtro (con imagen si está disponible)
-        filter_data = electrical.get('filter', {})
-        filter_image_url = filter_data.get('imageUrl', None)
-
-        ws[f'B{current_row}'] = 'Filtro'
-        ws[f'C{current_row}'] = filter_data.get('diameter', '-')
-        ws[f'E{current_row}'] = 1
-        ws[f'F{current_row}'] = filter_data.get('observations', '-')
-
-        # Intentar agregar imagen del filtro
-        if filter_image_url:
-            image_added = add_image_to_cell(ws, filter_image_url, f'A{current_row}', width=80, height=80)
-            if image_added:
-                ws.row_dimensions[current_row].height = 60  # Ajustar altura de fila
-
-        current_row += 1
-
-        # Especificaciones eléctricas
-        ws[f'B{current_row}'] = 'Consumo total'
-        ws[f'E{current_row}'] = f"{electrical.get('watts', 0)} W"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Amperaje'
-        ws[f'E{current_row}'] = f"{electrical.get('amps', 0)} A"
-        current_row += 1
-
-        # Consumo desglosado
-        consumption = electrical.get('consumptionBreakdown', [])
-        if consumption:
-            ws[f'B{current_row}'] = 'Desglose de consumo:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-            for item in consumption:
-                ws[f'B{current_row}'] = f"  {item.get('item', '-')}"
-                ws[f'E{current_row}'] = f"{item.get('watts', 0)} W"
-                current_row += 1
-
-        current_row += 1
-
-    # ===== SECCIÓN: ANÁLISIS HIDRÁULICO PROFESIONAL =====
-    hydraulic_analysis = project_data.get('hydraulicAnalysis', None)
-    if sections.get('hydraulicAnalysis', True) and hydraulic_analysis:
-        ws[f'B{current_row}'] = 'ANÁLISIS HIDRÁULICO PROFESIONAL'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        # TDH (Total Dynamic Head)
-        tdh = hydraulic_analysis.get('totalDynamicHead', 0)
-        ws[f'B{current_row}'] = 'TDH Total (Altura Dinámica Total)'
-        ws[f'E{current_row}'] = f"{tdh:.2f} m"
-        ws[f'F{current_row}'] = 'Altura que debe vencer la bomba'
-        current_row += 1
-
-        # Pérdidas por fricción
-        friction = hydraulic_analysis.get('frictionLoss', {})
-        ws[f'B{current_row}'] = 'Pérdida por fricción (succión)'
-        ws[f'E{current_row}'] = f"{friction.get('suction', 0):.2f} m"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Pérdida por fricción (retorno)'
-        ws[f'E{current_row}'] = f"{friction.get('return', 0):.2f} m"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Pérdida por fricción total'
-        ws[f'E{current_row}'] = f"{friction.get('total', 0):.2f} m"
-        ws[f'B{current_row}'].font = header_font
-        current_row += 1
-
-        # Pérdidas singulares
-        singular = hydraulic_analysis.get('singularLoss', {})
-        ws[f'B{current_row}'] = 'Pérdida singular (accesorios succión)'
-        ws[f'E{current_row}'] = f"{singular.get('suction', 0):.2f} m"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Pérdida singular (accesorios retorno)'
-        ws[f'E{current_row}'] = f"{singular.get('return', 0):.2f} m"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Pérdida singular total'
-        ws[f'E{current_row}'] = f"{singular.get('total', 0):.2f} m"
-        ws[f'B{current_row}'].font = header_font
-        current_row += 1
-
-        # Validaciones de velocidad
-        velocity_checks = hydraulic_analysis.get('velocityChecks', [])
-        if velocity_checks:
-            ws[f'B{current_row}'] = 'Validación de velocidades:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-            for check in velocity_checks:
-                line_type = check.get('lineType', '-')
-                velocity = check.get('velocity', 0)
-                is_ok = check.get('isOk', False)
-                status = '✓ OK' if is_ok else '⚠ Fuera de rango'
-                ws[f'B{current_row}'] = f"  {line_type}: {velocity:.2f} m/s - {status}"
-                ws[f'F{current_row}'] = 'Rango óptimo: 1.5-2.5 m/s'
-                current_row += 1
-
-        # Advertencias
-        warnings = hydraulic_analysis.get('warnings', [])
-        if warnings:
-            ws[f'B{current_row}'] = 'Advertencias:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-            for warning in warnings:
-                ws[f'B{current_row}'] = f"  ⚠ {warning}"
-                current_row += 1
-
-        # Bomba recomendada
-        recommended_pump = hydraulic_analysis.get('recommendedPump', None)
-        if recommended_pump:
-            ws[f'B{current_row}'] = 'Bomba seleccionada según TDH:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-
-            pump_name = recommended_pump.get('name', '-')
-            pump_flow_rate = recommended_pump.get('flowRate', '-')
-            pump_description = recommended_pump.get('description', '-')
-            pump_image_url = recommended_pump.get('imageUrl', None)
-
-            ws[f'B{current_row}'] = f"  {pump_name}"
-            ws[f'C{current_row}'] = pump_flow_rate
-            ws[f'F{current_row}'] = pump_description
-
-            # Intentar agregar imagen de la bomba recomendada
-            if pump_image_url:
-                image_added = add_image_to_cell(ws, pump_image_url, f'A{current_row}', width=80, height=80)
-                if image_added:
-                    ws.row_dimensions[current_row].height = 60  # Ajustar altura de fila
-
-            current_row += 1
-
-        current_row += 1
-
-    # ===== SECCIÓN: ANÁLISIS ELÉCTRICO PROFESIONAL =====
-    electrical_analysis = project_data.get('electricalAnalysis', None)
-    if sections.get('electricalAnalysis', True) and electrical_analysis:
-        ws[f'B{current_row}'] = 'ANÁLISIS ELÉCTRICO PROFESIONAL'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        # Potencia total
-        total_power = electrical_analysis.get('totalPowerInstalled', 0)
-        demand_power = electrical_analysis.get('totalPowerDemand', 0)
-        total_current = electrical_analysis.get('totalCurrent', 0)
-
-        ws[f'B{current_row}'] = 'Potencia instalada total'
-        ws[f'E{current_row}'] = f"{total_power:.0f} W"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Potencia de demanda (con simultaneidad)'
-        ws[f'E{current_row}'] = f"{demand_power:.0f} W"
-        ws[f'F{current_row}'] = 'Considera factor de simultaneidad'
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Corriente total calculada'
-        ws[f'E{current_row}'] = f"{total_current:.2f} A"
-        ws[f'F{current_row}'] = 'Con factor de potencia y eficiencia'
-        ws[f'B{current_row}'].font = header_font
-        current_row += 1
-
-        # Cable dimensionado
-        cable = electrical_analysis.get('cable', {})
-        ws[f'B{current_row}'] = 'Cable recomendado'
-        ws[f'C{current_row}'] = f"{cable.get('section', '-')} mm²"
-        ws[f'F{current_row}'] = f"Caída de tensión: {cable.get('voltageDrop', 0):.2f}% (máx 3%)"
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Capacidad de corriente del cable'
-        ws[f'E{current_row}'] = f"{cable.get('currentCapacity', 0):.1f} A"
-        current_row += 1
-
-        # Protecciones
-        protection = electrical_analysis.get('protection', {})
-        ws[f'B{current_row}'] = 'Interruptor termomagnético (Breaker)'
-        ws[f'C{current_row}'] = f"{protection.get('breakerSize', 0)} A"
-        ws[f'F{current_row}'] = 'Curva C recomendada'
-        current_row += 1
-
-        ws[f'B{current_row}'] = 'Diferencial (RCD)'
-        ws[f'C{current_row}'] = f"{protection.get('rcdSize', 0)} A / 30 mA"
-        ws[f'F{current_row}'] = 'Obligatorio para piscinas'
-        current_row += 1
-
-        # Cargas individuales
-        loads = electrical_analysis.get('loads', [])
-        if loads:
-            ws[f'B{current_row}'] = 'Desglose de cargas eléctricas:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-            ws[f'B{current_row}'] = 'Equipo'
-            ws[f'C{current_row}'] = 'Potencia (W)'
-            ws[f'D{current_row}'] = 'Corriente (A)'
-            ws[f'E{current_row}'] = 'FP (cos φ)'
-            ws[f'F{current_row}'] = 'Observaciones'
-            for col in ['B', 'C', 'D', 'E', 'F']:
-                ws[f'{col}{current_row}'].font = header_font
-            current_row += 1
-
-            for load in loads:
-                ws[f'B{current_row}'] = load.get('name', '-')
-                ws[f'C{current_row}'] = f"{load.get('power', 0)} W"
-                ws[f'D{current_row}'] = f"{load.get('current', 0):.2f} A"
-                ws[f'E{current_row}'] = f"{load.get('powerFactor', 1):.2f}"
-                ws[f'F{current_row}'] = f"Eficiencia: {load.get('efficiency', 1):.0%}"
-                current_row += 1
-
-        # Costo operativo
-        operating_cost = electrical_analysis.get('operatingCost', {})
-        if operating_cost:
-            ws[f'B{current_row}'] = 'Costo operativo estimado:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-
-            ws[f'B{current_row}'] = 'Consumo diario'
-            ws[f'E{current_row}'] = f"{operating_cost.get('dailyKwh', 0):.2f} kWh"
-            current_row += 1
-
-            ws[f'B{current_row}'] = 'Costo mensual estimado'
-            ws[f'E{current_row}'] = f"${operating_cost.get('monthlyCost', 0):.2f}"
-            ws[f'F{current_row}'] = '8 hrs/día promedio'
-            current_row += 1
-
-            ws[f'B{current_row}'] = 'Costo anual estimado'
-            ws[f'E{current_row}'] = f"${operating_cost.get('annualCost', 0):.2f}"
-            current_row += 1
-
-        # Advertencias eléctricas
-        elec_warnings = electrical_analysis.get('warnings', [])
-        if elec_warnings:
-            ws[f'B{current_row}'] = 'Advertencias eléctricas:'
-            ws[f'B{current_row}'].font = header_font
-            current_row += 1
-            for warning in elec_warnings:
-                ws[f'B{current_row}'] = f"  ⚠ {warning}"
-                current_row += 1
-
-        current_row += 1
-
-    # ===== SECCIÓN: MANO DE OBRA =====
-    if sections.get('labor', True):
-        ws[f'B{current_row}'] = 'MANO DE OBRA'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        roles = labor.get('roles', [])
-        if roles:
-            ws[f'B{current_row}'] = 'Rol'
-            ws[f'C{current_row}'] = 'Tareas'
-            ws[f'D{current_row}'] = 'Horas'
-            ws[f'E{current_row}'] = 'Costo'
-            for col in ['B', 'C', 'D', 'E']:
-                ws[f'{col}{current_row}'].font = header_font
-            current_row += 1
-
-            total_labor_cost = 0
-            for role in roles:
-                ws[f'B{current_row}'] = role.get('role', '-')
-                ws[f'C{current_row}'] = role.get('tasks', 0)
-                ws[f'D{current_row}'] = role.get('hours', 0)
-                ws[f'E{current_row}'] = f"${role.get('cost', 0):,.2f}"
-                total_labor_cost += role.get('cost', 0)
-                current_row += 1
-
-            # Total de mano de obra
-            ws[f'B{current_row}'] = 'TOTAL MANO DE OBRA'
-            ws[f'B{current_row}'].font = header_font
-            ws[f'E{current_row}'] = f"${total_labor_cost:,.2f}"
-            ws[f'E{current_row}'].font = header_font
-            current_row += 1
-        else:
-            ws[f'B{current_row}'] = 'Sin mano de obra especificada'
-            current_row += 1
-
-        current_row += 1
-
-    # ===== SECCIÓN: SECUENCIA DE TRABAJO =====
-    if sections.get('sequence', True):
-        ws[f'B{current_row}'] = 'SECUENCIA DE TRABAJO'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        ws[f'B{current_row}'] = '1. Marcado y replanteo del terreno'
-        current_row += 1
-        ws[f'B{current_row}'] = '2. Excavación según dimensiones especificadas'
-        current_row += 1
-        ws[f'B{current_row}'] = '3. Preparación de cama de apoyo'
-        current_row += 1
-        ws[f'B{current_row}'] = '4. Instalación de la piscina'
-        current_row += 1
-        ws[f'B{current_row}'] = '5. Instalación hidráulica (plomería)'
-        current_row += 1
-        ws[f'B{current_row}'] = '6. Instalación eléctrica y equipos'
-        current_row += 1
-        ws[f'B{current_row}'] = '7. Relleno y compactación'
-        current_row += 1
-        ws[f'B{current_row}'] = '8. Construcción de vereda perimetral'
-        current_row += 1
-        ws[f'B{current_row}'] = '9. Pruebas de funcionamiento'
-        current_row += 2
-
-    # ===== SECCIÓN: NORMAS Y OBSERVACIONES =====
-    if sections.get('standards', True):
-        ws[f'B{current_row}'] = 'NORMAS Y OBSERVACIONES'
-        ws[f'B{current_row}'].font = section_font
-        current_row += 1
-
-        ws[f'B{current_row}'] = '• Todos los materiales deben cumplir con normas IRAM vigentes'
-        current_row += 1
-        ws[f'B{current_row}'] = '• La instalación eléctrica debe ser realizada por electricista matriculado'
-        current_row += 1
-        ws[f'B{current_row}'] = '• Los equipos deben instalarse en lugar ventilado y protegido'
-        current_row += 1
-        ws[f'B{current_row}'] = '• Realizar prueba de estanqueidad antes del llenado final'
-        current_row += 1
-        ws[f'B{current_row}'] = '• Coordinar con albañil para trabajos de vereda y relleno'
-        current_row += 1
-
-    # Ajustar anchos de columna
-    ws.column_dimensions['A'].width = 2
-    ws.column_dimensions['B'].width = 50
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['F'].width = 30
-
-    # Guardar el archivo
-    wb.save(excel_path)
-    print(f"✅ Hoja '{sheet_name}' agregada exitosamente al Excel")
+    # Ajustar anchos de columna (en modo streaming deben ir antes de las filas)
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+
+    if rows is None:
+        rows = iter_sheet_rows(project_data)
+    if streaming:
+        _append_rows(ws, rows, metrics)
+    else:
+        _write_rows(ws, rows, metrics)
+
     return sheet_name
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Uso: python export_to_excel.py <json_data>")
-        sys.exit(1)
+def _write_rows(ws, rows, metrics=None):
+    """Escribe las filas celda por celda en una hoja normal"""
+    for sheet_row in rows:
+        for col, value in sheet_row.cells.items():
+            ws.cell(row=sheet_row.row, column=COLUMNS.index(col) + 1, value=value)
 
-    # Leer datos del proyecto desde JSON
-    project_data = json.loads(sys.argv[1])
+        # Un estilo por vez para todas las columnas de la fila que lo usan
+        columns_by_style = {}
+        for col, key in (sheet_row.styles or {}).items():
+            if col in sheet_row.cells:
+                columns_by_style.setdefault(key, []).append(col)
+        for key, columns in columns_by_style.items():
+            apply_row_style(ws, sheet_row.row, columns, key)
 
-    # Ruta al archivo Excel
-    excel_path = '/home/jesusolguin/Projects/pool-calculator/backend/public/CALCULADORA MATERIALES AQUAM.xlsx'
+        if sheet_row.image:
+            _add_row_image(ws, sheet_row, metrics)
 
-    # Exportar
-    export_project_to_excel(excel_path, project_data)
+def _append_rows(ws, rows, metrics=None):
+    """
+    Agrega las filas en orden a una hoja write-only: cada fila se vuelca al
+    archivo apenas se genera, sin mantener la hoja completa en memoria.
+    """
+    from openpyxl.cell import WriteOnlyCell
+
+    next_row = 1
+    for sheet_row in rows:
+        while next_row < sheet_row.row:
+            ws.append([])
+            next_row += 1
+
+        # El alto de la fila tiene que estar definido antes de escribirla
+        if sheet_row.image:
+            _add_row_image(ws, sheet_row, metrics)
+
+        styles = sheet_row.styles or {}
+        values = []
+        for col in COLUMNS:
+            value = sheet_row.cells.get(col)
+            if col in styles:
+                cell = WriteOnlyCell(ws, value)
+                cell.style = style_name(styles[col])
+                value = cell
+            values.append(value)
+
+        ws.append(values)
+        next_row += 1
+
+def _add_row_image(ws, sheet_row, metrics=None):
+    add_image = lambda: add_image_to_cell(ws, sheet_row.image, f'A{sheet_row.row}',
+                                          width=IMAGE_SIZE, height=IMAGE_SIZE)
+    image_added = metrics.image(add_image) if metrics is not None else add_image()
+    if image_added:
+        ws.row_dimensions[sheet_row.row].height = IMAGE_ROW_HEIGHT  # Ajustar altura de fila
+
+class ExportWorker:
+    """
+    Worker de larga duración: recibe trabajos JSON (uno por línea) y
+    responde una línea JSON por trabajo, manteniendo el libro en memoria.
+
+    Comandos soportados:
+        {"cmd": "export", "id": "...", "project": {...}, "excelPath": "..."}
+            -> hoja en el libro maestro ("incremental": true reescribe solo
+               las secciones que cambiaron)
+        {"cmd": "export", "id": "...", "project": {...}, "outputPath": "..."}
+            -> libro independiente, sin tocar el libro maestro (con caché
+               por contenido; "noCache": true la saltea; "engine": "fast"
+               usa el escritor XML directo; "bomOutputs": {"csv": ruta,
+               "jsonl": ruta, "parquet": ruta} escribe también el BOM)
+            Con "metrics": true la respuesta incluye "metrics" (tiempos por
+            fase y por sección, filas, imágenes y bytes; ver export_metrics.py)
+        {"cmd": "export", "id": "...", "project": {...}, "inline": true}
+            -> libro independiente generado en memoria: la respuesta lleva
+               "bytes": N y a continuación de su línea se envían los N bytes
+               del .xlsx (sin archivo temporal)
+        {"cmd": "batch", "id": "...", "projects": [...], "outputPath": "..."}
+            -> varios proyectos, una carga y un guardado ("workers": N
+               construye las hojas en N procesos, 0 = uno por núcleo, y
+               agrega "throughput" a la respuesta)
+        {"cmd": "plan", "id": "...", "project": {...}}
+            -> diseño de la hoja en JSON, sin generar el .xlsx
+        {"cmd": "ping"} / {"cmd": "health"}
+        {"cmd": "restart"}  -> responde y reinicia el proceso en limpio
+                               (en modo stdin sale con RESTART_EXIT_CODE)
+        {"cmd": "shutdown"} -> responde y termina
+    """
+
+    def __init__(self, excel_path=DEFAULT_EXCEL_PATH):
+        self.excel_path = str(excel_path)
+        self.cache = TemplateCache()
+        self.exports = ExportCache()
+        self.started_at = time.time()
+        self.jobs = 0
+        self.errors = 0
+        self.pending_action = None  # 'restart' | 'shutdown'
+        self.payload = None  # bytes a enviar después de la respuesta (trabajos "inline")
+
+    def handle_line(self, line):
+        """Procesa una línea del protocolo y devuelve el dict de respuesta"""
+        try:
+            job = decode_json(line)
+        except ValueError as e:
+            return {'ok': False, 'error': f'JSON inválido: {e}'}
+        if not isinstance(job, dict):
+            return {'ok': False, 'error': f'El trabajo debe ser un objeto JSON, no {type(job).__name__}'}
+
+        job_id = job.get('id')
+        cmd = job.get('cmd', 'export')
+        response = {'id': job_id, 'cmd': cmd}
+
+        # Un trabajo mal formado responde con error sin tirar abajo el worker
+        try:
+            if cmd in ('ping', 'health'):
+                response.update(ok=True, **self.health())
+            elif cmd in ('restart', 'shutdown'):
+                self.pending_action = cmd
+                response.update(ok=True, pid=os.getpid())
+            elif cmd == 'export':
+                response.update(self._run_export(job))
+            elif cmd == 'batch':
+                response.update(self._run_batch(job))
+            elif cmd == 'plan':
+                with contextlib.redirect_stdout(sys.stderr):
+                    plan = plan_layout(job.get('project') or {})
+                response.update(ok=True, plan=plan.to_dict())
+            else:
+                response.update(ok=False, error=f'Comando desconocido: {cmd}')
+        except Exception as e:
+            self.errors += 1
+            response.update(ok=False, error=str(e))
+        return response
+
+    def health(self):
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 3),
+            'jobs': self.jobs,
+            'errors': self.errors,
+            'cache': self.cache.stats(),
+            'thumbnails': THUMBNAILS.stats(),
+            'exportCache': self.exports.stats(),
+        }
+
+    def _run_export(self, job):
+        started = time.perf_counter()
+        self.jobs += 1
+        # Trabajo "inline": el libro se genera en memoria y se envía por el protocolo
+        output = BytesIO() if job.get('inline') else job.get('outputPath')
+        metrics = _job_metrics({**job, 'outputPath': output}) if job.get('metrics') else None
+        try:
+            # Los print() del exportador no deben mezclarse con el protocolo
+            with contextlib.redirect_stdout(sys.stderr):
+                if job.get('bomOutputs'):
+                    sheet_name = export_project_documents(
+                        job.get('project') or {},
+                        {'xlsx': output, **job['bomOutputs']},
+                        engine=job.get('engine') or DEFAULT_ENGINE,
+                        streaming=bool(job.get('streaming')),
+                        metrics=metrics,
+                    ).sheet_name
+                elif output is not None:
+                    sheet_name = export_project_workbook(
+                        output,
+                        job.get('project') or {},
+                        streaming=bool(job.get('streaming')),
+                        export_cache=None if job.get('noCache') else self.exports,
+                        engine=job.get('engine') or DEFAULT_ENGINE,
+                        metrics=metrics,
+                    )
+                else:
+                    sheet_name = export_project_to_excel(
+                        job.get('excelPath') or self.excel_path,
+                        job.get('project') or {},
+                        cache=self.cache,
+                        incremental=bool(job.get('incremental')),
+                        metrics=metrics,
+                    )
+            response = {
+                'ok': True,
+                'sheetName': sheet_name,
+                'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+            }
+            if job.get('inline'):
+                self.payload = output.getvalue()
+                response['bytes'] = len(self.payload)
+            else:
+                response['outputPath'] = job.get('outputPath') or job.get('excelPath') or self.excel_path
+            if metrics is not None:
+                response['metrics'] = metrics.to_dict()
+            return response
+        except Exception as e:
+            self.errors += 1
+            return {'ok': False, 'error': str(e)}
+
+    def _run_batch(self, job):
+        started = time.perf_counter()
+        self.jobs += 1
+        try:
+            stats = None
+            with contextlib.redirect_stdout(sys.stderr):
+                if job.get('workers') is not None:
+                    if not job.get('outputPath'):
+                        raise ValueError('La exportación en paralelo requiere outputPath')
+                    results, stats = _export_projects_parallel(
+                        job.get('projects') or [], job['outputPath'], job['workers'])
+                else:
+                    results = export_projects_to_excel(
+                        job.get('excelPath') or self.excel_path,
+                        job.get('projects') or [],
+                        output=job.get('outputPath'),
+                        cache=self.cache,
+                        streaming=bool(job.get('streaming')),
+                    )
+            response = {
+                'ok': True,
+                'results': results,
+                'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+            }
+            if stats is not None:
+                response['throughput'] = stats
+            return response
+        except Exception as e:
+            self.errors += 1
+            return {'ok': False, 'error': str(e)}
+
+    def serve_stream(self, stream_in, stream_out):
+        """Atiende trabajos desde un stream (stdin) hasta EOF o shutdown/restart"""
+        for line in stream_in:
+            if not line.strip():
+                continue
+            response = self.handle_line(line)
+            stream_out.write(json.dumps(response, ensure_ascii=False) + '\n')
+            stream_out.flush()
+            if self.payload is not None:
+                # Bytes del .xlsx a continuación de la línea de respuesta
+                payload, self.payload = self.payload, None
+                stream_out.buffer.write(payload)
+                stream_out.buffer.flush()
+            if self.pending_action:
+                break
+        return self.pending_action
+
+    def serve_socket(self, socket_path):
+        """Atiende trabajos desde un socket Unix local (una conexión por vez)"""
+        import socketserver
+
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = (raw.decode('utf-8') for raw in self.rfile)
+                writer = _SocketWriter(self.wfile)
+                if worker.serve_stream(reader, writer):
+                    self.server.shutdown_requested = True
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        with socketserver.UnixStreamServer(socket_path, Handler) as server:
+            server.shutdown_requested = False
+            print(f"Worker escuchando en {socket_path}", file=sys.stderr)
+            while not server.shutdown_requested:
+                server.handle_request()
+
+        os.unlink(socket_path)
+        return self.pending_action
+
+
+def _job_metrics(job, streaming=None, engine=None):
+    """ExportMetrics con el contexto de un trabajo (o de la línea de comandos)"""
+    project_data = job.get('project') or {}
+    if job.get('bomOutputs'):
+        context = {
+            'mode': 'documents',
+            'formats': [fmt for fmt in ('xlsx', *RENDERERS)
+                        if (job.get('outputPath') if fmt == 'xlsx' else job['bomOutputs'].get(fmt))],
+        }
+        if job.get('outputPath'):
+            context['engine'] = engine or job.get('engine') or DEFAULT_ENGINE
+            context['streaming'] = bool(job.get('streaming') if streaming is None else streaming)
+    elif job.get('outputPath'):
+        context = {
+            'mode': 'workbook',
+            'engine': engine or job.get('engine') or DEFAULT_ENGINE,
+            'streaming': bool(job.get('streaming') if streaming is None else streaming),
+        }
+    else:
+        context = {'mode': 'master', 'incremental': bool(job.get('incremental'))}
+    return ExportMetrics(projectId=project_data.get('projectId'), **context)
+
+
+class _SocketWriter:
+    """Adaptador de texto sobre el wfile binario del socket"""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self.buffer = wfile  # para los bytes de los trabajos "inline"
+
+    def write(self, text):
+        self._wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self._wfile.flush()
+
+
+def run_worker(excel_path, socket_path=None):
+    """
+    Ejecuta el modo worker y maneja el reinicio ordenado
+
+    Returns:
+        Código de salida del proceso
+    """
+    worker = ExportWorker(excel_path)
+    if socket_path:
+        action = worker.serve_socket(socket_path)
+        if action == 'restart':
+            # El socket ya se cerró: reemplazar el proceso en limpio
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+        return 0
+
+    action = worker.serve_stream(sys.stdin, sys.stdout)
+    if action == 'restart':
+        # En modo stdin puede haber líneas ya leídas en el buffer; el
+        # proceso padre es quien debe volver a lanzar el worker
+        return RESTART_EXIT_CODE
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Exporta proyectos al Excel de materiales AQUAM')
+    parser.add_argument('json_data', nargs='?', help='Datos del proyecto en JSON')
+    parser.add_argument('--input', metavar='FILE',
+                        help="Leer los datos del proyecto desde un archivo ('-' para stdin)")
+    parser.add_argument('--format', choices=['json', 'msgpack'],
+                        help='Formato de --input/--batch (por defecto se detecta)')
+    parser.add_argument('--excel', default=str(DEFAULT_EXCEL_PATH), help='Ruta al libro Excel')
+    parser.add_argument('--output', help="Generar un libro independiente en esta ruta (no modifica el libro maestro; "
+                                         "'-' lo escribe en stdout)")
+    parser.add_argument('--streaming', action='store_true',
+                        help='Con --output, escribir la hoja en modo write-only (memoria constante)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Al re-exportar al libro maestro, reescribir solo las secciones que cambiaron')
+    parser.add_argument('--archive-days', type=int, metavar='N',
+                        help='Al exportar al libro maestro, archivar las hojas de proyectos de más de N días')
+    parser.add_argument('--archive-dir', help='Carpeta de los libros de archivo')
+    parser.add_argument('--shard-by', choices=['month', 'client'], default='month',
+                        help='Separar los libros de archivo por mes o por cliente')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                        help="Con --output, motor de escritura ('fast' genera el XML directamente)")
+    parser.add_argument('--csv', metavar='FILE', help='Escribir también el listado de materiales en CSV')
+    parser.add_argument('--jsonl', metavar='FILE', help='Escribir también el listado de materiales en JSON-lines')
+    parser.add_argument('--parquet', metavar='FILE',
+                        help='Escribir también el listado de materiales en Parquet (requiere pyarrow)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Con --output, reutilizar la exportación cacheada si el proyecto no cambió')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Medir la exportación y escribir las métricas en JSON ('-' para stdout)")
+    parser.add_argument('--plan', action='store_true',
+                        help='Solo calcular el diseño de la hoja y mostrarlo en JSON (sin generar el .xlsx)')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Lote de proyectos en JSON (array) o JSON-lines ('-' para stdin)")
+    parser.add_argument('--workers', type=int, nargs='?', const=0, metavar='N',
+                        help='Con --batch y --output, construir las hojas en N procesos (sin N: uno por núcleo)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Modo worker: trabajos JSON por línea en stdin')
+    parser.add_argument('--socket', help='Modo worker sobre un socket Unix en esta ruta')
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.worker or args.socket:
+        sys.exit(run_worker(args.excel, args.socket))
+
+    if args.batch:
+        if args.workers is not None and not args.output:
+            sys.exit('La exportación en paralelo (--workers) requiere --output')
+        results = export_projects_to_excel(args.excel, load_projects_file(args.batch, args.format),
+                                           output=args.output, streaming=args.streaming, workers=args.workers)
+        sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+    if args.input:
+        # Archivo o stdin: sin límite de tamaño de argumentos (ARG_MAX)
+        project_data = load_payload(args.input, args.format)
+    elif args.json_data:
+        project_data = decode_json(args.json_data)
+    else:
+        print("Uso: python export_to_excel.py <json_data> | --input <archivo|->")
+        sys.exit(1)
+
+    if args.plan:
+        print(json.dumps(plan_layout(project_data).to_dict(), ensure_ascii=False))
+        sys.exit(0)
+
+    # Exportar. Con '--output -' el .xlsx se genera en memoria y se escribe
+    # en stdout (sin archivo temporal); los mensajes van a stderr
+    to_stdout = args.output == '-'
+    if to_stdout and args.metrics == '-':
+        sys.exit('--output - y --metrics - no se pueden combinar (ambos usan stdout)')
+    output = BytesIO() if to_stdout else args.output
+    bom_outputs = {fmt: getattr(args, fmt) for fmt in RENDERERS if getattr(args, fmt)}
+    metrics = None
+    if args.metrics:
+        metrics = _job_metrics({'project': project_data, 'outputPath': output,
+                                'incremental': args.incremental, 'bomOutputs': bom_outputs},
+                               streaming=args.streaming, engine=args.engine)
+
+    # Con '--metrics -' stdout queda solo para el JSON de métricas
+    quiet = to_stdout or args.metrics == '-'
+    with contextlib.redirect_stdout(sys.stderr) if quiet else contextlib.nullcontext():
+        if bom_outputs:
+            # Documento BOM en varios formatos (y el .xlsx independiente si hay --output)
+            export_project_documents(project_data, {'xlsx': output, **bom_outputs},
+                                     engine=args.engine, streaming=args.streaming, metrics=metrics)
+        elif output is not None:
+            export_project_workbook(output, project_data, streaming=args.streaming,
+                                    export_cache=ExportCache() if args.cache else None, engine=args.engine,
+                                    metrics=metrics)
+        else:
+            archive = None
+            if args.archive_days is not None:
+                archive = {'keep_days': args.archive_days, 'shard_by': args.shard_by}
+                if args.archive_dir:
+                    archive['archive_dir'] = args.archive_dir
+            export_project_to_excel(args.excel, project_data, archive=archive, incremental=args.incremental,
+                                    metrics=metrics)
+
+    if to_stdout:
+        sys.stdout.buffer.write(output.getvalue())
+        sys.stdout.buffer.flush()
+    if metrics is not None:
+        emit_metrics(metrics, args.metrics)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Auditoría de discrepancias de todos los proyectos contra su modelo.
+
+Cada hoja de proyecto del libro maestro se une a la hoja de cálculos de su
+modelo de piscina (`CALCULOS DE MATERIALES <MODELO>`). El modelo sale del
+comienzo del nombre de la hoja: 'TURQUESA (6,5X3,1) INES Y PABLO' y
+'Turquesa - Juan Perez' usan la de TURQUESA.
+
+Los materiales salen del índice de etiquetas de sheet_diff.py, que ya es
+una tabla columnar (hoja, material, valor) de todas las hojas en SQLite y se
+actualiza solo para las hojas que cambiaron. Cada etiqueta distinta se
+resuelve una vez a su id del catálogo de materiales (material_catalog.py),
+así 'LLAVE ESFERICA' del modelo se une con 'Válvula de corte (esférica)'. La unión proyecto ↔ modelo, las
+diferencias y el ranking por material se calculan en una sola consulta sobre
+esa tabla, sin recorrer hoja por hoja en Python.
+
+El reporte ordena los materiales por la cantidad de proyectos con
+discrepancia y por la magnitud de las diferencias, y lista además las
+discrepancias individuales más grandes.
+
+Uso:
+    python3 fleet_audit.py
+    python3 fleet_audit.py --rel-tol 0.1 --top 20
+    python3 fleet_audit.py --format json --output auditoria.json
+    python3 fleet_audit.py --format csv --output discrepancias.csv
+"""
+import argparse
+import contextlib
+import csv
+import json
+import re
+import sys
+import time
+from collections import Counter
+
+from material_catalog import default_catalog, normalize_label
+from sheet_diff import DEFAULT_EXCEL_PATH, LabelIndex, load_aliases, material_key
+
+# 'CALCULOS DE MATERIALES TURQUESA', 'CALCULO DE MATERIALES CIRCON',
+# 'CALCULOS MATERIALES GEMA AZUL' (nombres ya normalizados)
+MODEL_SHEET_PATTERN = re.compile(r'^calculos? (?:de )?materiales (?P<model>.+)$')
+
+DEFAULT_TOP = 10
+
+# Discrepancias de todos los proyectos: cada fila del índice del proyecto
+# unida a la fila con el mismo material en la hoja de su modelo. La clave de
+# material es la de sheet_diff.material_key ('id:cemento', 'label:total') y
+# las claves repetidas en una hoja ('malla#2') conservan el sufijo. Si varias
+# etiquetas de una hoja resuelven al mismo material se suman sus valores y
+# la fila queda marcada como `merged` (como sheet_diff._merged).
+DISCREPANCIES_SQL = """
+WITH labeled AS (
+    SELECT
+        sheet_name, label, value, position,
+        COALESCE(aliases.canonical, 'label:' || base) || suffix AS material
+    FROM (
+        SELECT
+            sheet_name, label, value, position,
+            CASE WHEN instr(label_key, '#') > 0
+                 THEN substr(label_key, 1, instr(label_key, '#') - 1) ELSE label_key END AS base,
+            CASE WHEN instr(label_key, '#') > 0
+                 THEN substr(label_key, instr(label_key, '#')) ELSE '' END AS suffix
+        FROM labels
+        WHERE value IS NOT NULL
+    )
+    LEFT JOIN aliases ON aliases.alias = base
+),
+keyed AS (
+    SELECT
+        sheet_name, material, min(position) AS position, group_concat(label, ' + ') AS label,
+        round(sum(value), 6) AS value, count(*) AS labels
+    FROM (SELECT * FROM labeled ORDER BY sheet_name, position)
+    GROUP BY sheet_name, material
+)
+SELECT
+    pairs.project_sheet AS project,
+    pairs.model_sheet AS model,
+    project.material AS material,
+    expected.label AS modelLabel,
+    project.label AS projectLabel,
+    expected.value AS expected,
+    project.value AS actual,
+    project.value - expected.value AS delta,
+    CASE WHEN expected.value != 0
+         THEN (project.value - expected.value) / abs(expected.value) END AS relDelta,
+    abs(project.value - expected.value) > max(:abs_tol, :rel_tol * abs(expected.value)) AS discrepant,
+    project.labels > 1 OR expected.labels > 1 AS merged
+FROM pairs
+JOIN keyed AS project ON project.sheet_name = pairs.project_sheet
+JOIN keyed AS expected ON expected.sheet_name = pairs.model_sheet AND expected.material = project.material
+"""
+
+# Ranking por material sobre las discrepancias anteriores
+RANKING_SQL = f"""
+SELECT
+    material,
+    min(modelLabel) AS modelLabel,
+    count(*) AS projects,
+    sum(discrepant) AS discrepancies,
+    round(avg(discrepant), 4) AS rate,
+    round(sum(CASE WHEN discrepant THEN abs(delta) ELSE 0 END), 4) AS totalAbsDelta,
+    round(max(abs(delta)), 4) AS maxAbsDelta,
+    round(avg(delta), 4) AS meanDelta,
+    round(avg(abs(relDelta)), 4) AS meanAbsRelDelta
+FROM ({DISCREPANCIES_SQL})
+GROUP BY material
+HAVING sum(discrepant) > 0
+ORDER BY discrepancies DESC, totalAbsDelta DESC, material
+"""
+
+LARGEST_SQL = f"""
+SELECT * FROM ({DISCREPANCIES_SQL})
+WHERE discrepant
+ORDER BY abs(delta) DESC, project, material
+LIMIT :top
+"""
+
+
+def model_pairs(sheet_names):
+    """
+    Hoja de cálculos del modelo de cada hoja de proyecto
+
+    Args:
+        sheet_names: Nombres de las hojas del libro
+
+    Returns:
+        ({hoja de proyecto: hoja del modelo}, [hojas de proyecto sin modelo])
+    """
+    models = {}
+    for name in sheet_names:
+        match = MODEL_SHEET_PATTERN.match(normalize_label(name))
+        if match:
+            models[match.group('model')] = name
+
+    pairs, unmatched = {}, []
+    # Los modelos más largos primero: 'gema azul' antes que 'gema'
+    ordered = sorted(models, key=len, reverse=True)
+    for name in sheet_names:
+        if name in models.values():
+            continue
+        normalized = normalize_label(name)
+        model = next((model for model in ordered
+                      if normalized.startswith(model) and not normalized[len(model):len(model) + 1].isalnum()),
+                     None)
+        if model:
+            pairs[name] = models[model]
+        else:
+            unmatched.append(name)
+    return pairs, unmatched
+
+
+def run_audit(index, abs_tol=0.0, rel_tol=0.0, aliases=None, top=DEFAULT_TOP, catalog=None):
+    """
+    Audita todos los proyectos del índice contra su modelo
+
+    Args:
+        index: LabelIndex ya actualizado
+        abs_tol: Diferencia absoluta tolerada
+        rel_tol: Diferencia relativa tolerada, sobre el valor del modelo
+        aliases: {etiqueta normalizada: etiqueta canónica}
+        top: Discrepancias individuales más grandes a incluir
+        catalog: MaterialCatalog para emparejar por id de material
+
+    Returns:
+        {pairs, unmatched, tolerance, materials (ranking), largest}
+    """
+    pairs, unmatched = model_pairs([sheet['sheet'] for sheet in index.sheets()])
+    conn = index.conn
+    # Tablas temporales: no se guardan en el índice
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS pairs (project_sheet TEXT PRIMARY KEY, model_sheet TEXT)')
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, canonical TEXT)')
+    conn.execute('DELETE FROM temp.pairs')
+    conn.execute('DELETE FROM temp.aliases')
+    conn.executemany('INSERT INTO temp.pairs VALUES (?, ?)', pairs.items())
+    # Clave de material de cada etiqueta distinta del índice (alias y catálogo)
+    bases = {row[0].partition('#')[0] for row in conn.execute('SELECT DISTINCT label_key FROM labels')}
+    conn.executemany('INSERT INTO temp.aliases VALUES (?, ?)',
+                     [(base, material_key(base, aliases, catalog)) for base in bases])
+
+    params = {'abs_tol': abs_tol, 'rel_tol': rel_tol, 'top': top}
+    materials = [dict(row) for row in conn.execute(RANKING_SQL, params)]
+    largest = [dict(row) for row in conn.execute(LARGEST_SQL, params)]
+    for row in largest:
+        row['discrepant'], row['merged'] = bool(row['discrepant']), bool(row['merged'])
+    return {
+        'pairs': pairs,
+        'unmatched': unmatched,
+        'tolerance': {'abs': abs_tol, 'rel': rel_tol},
+        'materials': materials,
+        'largest': largest,
+    }
+
+
+def discrepancies(index, abs_tol=0.0, rel_tol=0.0):
+    """Todas las comparaciones proyecto ↔ modelo de la última run_audit (para CSV)"""
+    rows = index.conn.execute(DISCREPANCIES_SQL + ' ORDER BY project, material',
+                              {'abs_tol': abs_tol, 'rel_tol': rel_tol})
+    return [{**dict(row), 'discrepant': bool(row['discrepant']), 'merged': bool(row['merged'])} for row in rows]
+
+
+def print_report(report, elapsed):
+    print("=" * 100)
+    print(f"AUDITORÍA DE DISCREPANCIAS: {len(report['pairs'])} proyectos contra su modelo")
+    print("=" * 100)
+    for model, count in sorted(Counter(report['pairs'].values()).items()):
+        print(f"  {model:<40} {count:>4} proyectos")
+    if report['unmatched']:
+        print(f"\n⚠ Sin hoja de modelo: {', '.join(report['unmatched'])}")
+
+    print("\n📊 MATERIALES CON DISCREPANCIAS (por frecuencia y magnitud):")
+    if not report['materials']:
+        print("  ✅ Sin discrepancias")
+    for row in report['materials']:
+        print(f"  {row['modelLabel']:<45} {row['discrepancies']:>3}/{row['projects']:<3} proyectos  "
+              f"Σ|Δ| {row['totalAbsDelta']:>9g}  máx |Δ| {row['maxAbsDelta']:>8g}  Δ medio {row['meanDelta']:+g}")
+
+    if report['largest']:
+        print("\n🔍 DISCREPANCIAS MÁS GRANDES:")
+        for row in report['largest']:
+            print(f"  {row['project']:<35} {row['projectLabel']:<35} "
+                  f"modelo {row['expected']:g} vs proyecto {row['actual']:g} ({row['delta']:+g})"
+                  + (' [etiquetas combinadas]' if row['merged'] else ''))
+
+    print(f"\n✅ Auditoría en {elapsed * 1000:.0f} ms")
+
+
+CSV_FIELDS = ('project', 'model', 'material', 'modelLabel', 'projectLabel', 'expected', 'actual',
+              'delta', 'relDelta', 'discrepant', 'merged')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Auditoría de todos los proyectos contra la hoja de su modelo')
+    parser.add_argument('--excel', default=str(DEFAULT_EXCEL_PATH), help='Libro (por defecto el libro maestro)')
+    parser.add_argument('--abs-tol', type=float, default=0.0, help='Diferencia absoluta tolerada')
+    parser.add_argument('--rel-tol', type=float, default=0.0, help='Diferencia relativa tolerada (0.05 = 5%%)')
+    parser.add_argument('--aliases', metavar='FILE',
+                        help='JSON {etiqueta: etiqueta canónica}, se aplica antes del catálogo')
+    parser.add_argument('--no-catalog', action='store_true',
+                        help='No emparejar por el catálogo de materiales (solo etiquetas y alias)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Discrepancias individuales a listar')
+    parser.add_argument('--format', choices=('text', 'json', 'csv'), default='text',
+                        help="'csv' escribe todas las comparaciones proyecto ↔ modelo")
+    parser.add_argument('--output', metavar='FILE', help='Archivo de salida (por defecto stdout)')
+    parser.add_argument('--workers', type=int, default=0, help='Procesos para indexar (0 = uno por núcleo)')
+    args = parser.parse_args(argv)
+
+    aliases = load_aliases(args.aliases) if args.aliases else None
+    catalog = None if args.no_catalog else default_catalog()
+
+    started = time.perf_counter()
+    with LabelIndex(args.excel) as index:
+        refreshed = index.refresh(workers=args.workers)
+        if refreshed:
+            print(f"🔎 {len(refreshed)} hojas indexadas", file=sys.stderr)
+        report = run_audit(index, args.abs_tol, args.rel_tol, aliases, args.top, catalog)
+        rows = discrepancies(index, args.abs_tol, args.rel_tol) if args.format == 'csv' else None
+    elapsed = time.perf_counter() - started
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        elif args.format == 'json':
+            json.dump({**report, 'seconds': round(elapsed, 4)}, output, ensure_ascii=False, indent=2)
+            output.write('\n')
+        else:
+            with contextlib.redirect_stdout(output):
+                print_report(report, elapsed)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
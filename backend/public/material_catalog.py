@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Catálogo de materiales: nombres canónicos y sus variantes.
+
+El mismo material se escribe distinto en las hojas de cálculo, en las hojas
+de proyecto y en la exportación: 'LLAVE ESFERICA' y 'Válvula de corte
+(esférica)', 'CAÑO 40MM' y 'Caños PN10 x 6 m', 'CODO 90º' y 'Codo 90°'.
+Este módulo lleva cada etiqueta a un identificador canónico
+('valvula-esferica', 'cano-pvc-40mm', 'codo-90').
+
+La etiqueta se normaliza a una clave de tokens (material_key): sin acentos
+ni mayúsculas, número y unidad juntos ('40 MM' -> '40mm', '2,5 PULGADAS' ->
+'2.5in', 'm³' -> 'm3'), sin palabras vacías ('de', 'para', 'x') ni unidades
+sueltas y en singular. Las claves de todos los nombres y sinónimos se
+precalculan en un diccionario, así que resolver una etiqueta conocida es una
+búsqueda; las demás pasan por una comparación difusa por tokens contra un
+índice invertido, y el resultado de cada etiqueta queda memorizado.
+
+Uso:
+    python3 material_catalog.py "CAÑO 40MM" "Caños PN10 x 6 m" "Cemento 50 kg bolsas instalacion"
+    python3 material_catalog.py --list
+    python3 material_catalog.py --synonyms sinonimos.json --json < etiquetas.txt
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict, namedtuple
+
+# id -> (nombre canónico, sinónimos). El nombre también es un sinónimo.
+MATERIALS = {
+    # Plomería y PVC
+    'cano-pvc-40mm': ('Caño PVC 40 mm', ('CAÑO 40MM', 'Caños PN10 x 6 m', 'Caño PVC 40mm')),
+    'cano-azul-25mm': ('Caño azul 25 mm', ('CAÑO AZUL 25MM X METRO',)),
+    'codo-90': ('Codo 90°', ('CODO 90º', 'Codo 90 grados')),
+    'codo-45': ('Codo 45°', ('CODO 45º', 'Codo 45 grados')),
+    'tee': ('Tee', ('TEE',)),
+    'valvula-esferica': ('Válvula esférica', ('LLAVE ESFERICA', 'Válvula de corte (esférica)')),
+    'union-doble': ('Unión doble', ()),
+    'union-simple': ('Unión simple', ()),
+    'conector-corrugado-25mm': ('Conector para corrugado 25 mm', ('CONECTORES PARA CORRUGADO DE 25MM',)),
+    'pegamento-pvc': ('Pegamento PVC', ('Pegamento PVC azul (Tigre) x 500 ml',)),
+    'acetona': ('Acetona', ('Acetona x 1 Litro',)),
+    'cinta-teflon': ('Cinta teflón', ('Cinta teflón 1 rollo ALTA DENSIDAD',)),
+    'pasta-selladora': ('Pasta selladora', ('Pasta selladora 1 tubo',)),
+    'abrazadera': ('Abrazadera', ()),
+    # Construcción
+    'cemento': ('Cemento bolsa 50 kg', ('CEMENTO', 'BOLSAS DE CEMENTO', 'Cemento 50 kg bolsas')),
+    'cemento-cama': ('Cemento para la cama', ('Cemento 50 kg bolsas para la cama',)),
+    'cemento-vereda': ('Cemento para vereda', ('Cemento 50 kg bolsas loza',)),
+    'arena-gruesa': ('Arena gruesa', ('ARENA M3', 'Arena Gruesa m3')),
+    'arena-tapado': ('Arena para tapado', ('ARENA PARA TAPADO M3', 'Arena para tapado de piscina')),
+    'arena-vereda': ('Arena para vereda', ('Arena para CONTRAPISO m3',)),
+    'mixto-cama': ('Mixto para la cama', ('MIXTO M3',)),
+    'mixto-relleno': ('Mixto para relleno', ()),
+    'mixto-vereda': ('Mixto para contrapiso de vereda', ('Mixto para CONTRAPISO DE VEREDAS',)),
+    'piedra-vereda': ('Piedra para vereda', ('PIEDRA',)),
+    'malla-sima': ('Malla sima 6 mm', ('MALLA', 'Malla sima')),
+    'pegamento-losetas': ('Pegamento para losetas', ('BOLSAS DE KLAUKOL', 'Pegamento losetas Klaukol')),
+    'alambre-atar': ('Alambre de atar', ('ALAMBRE #14 x KG', 'Alambre liso de atar x KG')),
+    'geotextil': ('Geotextil', ('GEOTEXTIL O GEOMEMBRANA 400MICRONES X METRO', 'Nylon de 200 Geotextil x m',
+                                'Nylon de 200 micr o Geotextil x m')),
+    'clavos': ('Clavos 2,5 pulgadas', ('CLAVOS 2,5 PULGADAS KG',)),
+    'losetas-comunes': ('Losetas comunes', ()),
+    'esquineros': ('Esquineros', ()),
+    'ladrillos': ('Ladrillos cerámicos', ('Ladrillos cerámicos (para relleno )',)),
+    'tanza': ('Tanza roja', ()),
+    'spray-tiza': ('Spray o tiza', ()),
+    'estacas': ('Estacas', ()),
+    # Equipos
+    'bomba': ('Bomba', ('Bomba de filtrado',)),
+    'filtro': ('Filtro', ()),
+    'transformador-12v': ('Transformador 220V a 12V', ()),
+    'luces-led': ('Luces LED', ()),
+}
+
+# Puntaje mínimo de la comparación difusa (0 a 1)
+FUZZY_THRESHOLD = 0.75
+
+# Peso de un sinónimo contenido entero en la etiqueta ('Cemento 50 kg bolsas
+# instalacion' contiene 'cemento 50kg bolsa'), frente a la coincidencia exacta
+CONTAINED_SCORE = 0.9
+
+STOPWORDS = frozenset({'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los', 'o', 'para',
+                       'por', 'un', 'una', 'x', 'y'})
+
+# Unidades: variante -> token canónico
+UNITS = {
+    'mm': 'mm', 'milimetro': 'mm', 'milimetros': 'mm',
+    'cm': 'cm', 'centimetro': 'cm', 'centimetros': 'cm',
+    'm': 'm', 'mt': 'm', 'mts': 'm', 'metro': 'm', 'metros': 'm',
+    'm2': 'm2', 'm3': 'm3',
+    'kg': 'kg', 'kgs': 'kg', 'kilo': 'kg', 'kilos': 'kg',
+    'l': 'l', 'lt': 'l', 'lts': 'l', 'litro': 'l', 'litros': 'l', 'ml': 'ml',
+    'micr': 'micron', 'micron': 'micron', 'micrones': 'micron',
+    '"': 'in', 'pulg': 'in', 'pulgada': 'in', 'pulgadas': 'in',
+    '°': '°', 'grado': '°', 'grados': '°',
+    'w': 'w', 'v': 'v',
+}
+
+# Número seguido de una unidad: '40 mm', '2.5 pulgadas', '90 °', '1/2"'
+_MEASURE = re.compile(
+    r'(\d+(?:\.\d+)?(?:/\d+)?)\s*(' + '|'.join(sorted(map(re.escape, UNITS), key=len, reverse=True)) + r')(?![a-z0-9])'
+)
+_SEPARATORS = re.compile(r'[^a-z0-9.°/]+')
+
+MaterialMatch = namedtuple('MaterialMatch', ['id', 'name', 'score', 'method'])
+
+
+def normalize_label(text):
+    """Etiqueta comparable: sin acentos, en minúsculas y con espacios simples"""
+    text = str(text).replace('º', '°').lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(text.split()).rstrip(':').strip()
+
+
+def _singular(token):
+    if not token.isalpha() or len(token) <= 4 or not token.endswith('s') or token.endswith(('ss', 'is', 'us')):
+        return token
+    if token.endswith(('nes', 'res', 'les')):
+        return token[:-2]
+    return token[:-1]
+
+
+def material_tokens(text):
+    """
+    Tokens de una etiqueta de material
+
+    Returns:
+        Tupla de tokens: '40mm', '2.5in', '90°', palabras en singular; sin
+        palabras vacías ni unidades sueltas ('Arena Gruesa m3' -> arena, gruesa).
+        Una '/' entre palabras queda como el token 'per'.
+    """
+    text = normalize_label(text)
+    text = re.sub(r'(\d),(\d)', r'\1.\2', text)
+    text = _MEASURE.sub(lambda m: f" {m.group(1)}{UNITS[m.group(2)]} ", text)
+    # '/' entre palabras es una tasa ('m³ Arena / m³', 'Mano de Obra / m²'): se conserva como token
+    text = re.sub(r'(?<!\d)/(?!\d)', ' per ', text)
+    tokens = []
+    for token in _SEPARATORS.split(text):
+        token = token.strip('./')
+        if not token or token in STOPWORDS or token in UNITS:
+            continue
+        tokens.append(_singular(token))
+    return tuple(tokens)
+
+
+def material_key(text):
+    """Clave normalizada de una etiqueta de material ('CAÑO 40MM' -> 'cano 40mm')"""
+    return ' '.join(material_tokens(text))
+
+
+def _loose(token):
+    """Token para la comparación difusa: las medidas sin su unidad ('90°' y '90' -> '90')"""
+    match = re.match(r'\d[\d./]*', token)
+    return match.group(0) if match else token
+
+
+def _numbers(tokens):
+    return {token for token in tokens if token[:1].isdigit()}
+
+
+class MaterialCatalog:
+    """
+    Índice precalculado de nombres y sinónimos -> id canónico.
+
+    `resolve` busca primero la clave exacta y después la mejor coincidencia
+    difusa por tokens. Cada etiqueta se resuelve una sola vez por catálogo.
+    """
+
+    def __init__(self, materials=MATERIALS, synonyms=None):
+        """
+        Args:
+            materials: {id: (nombre, sinónimos)}
+            synonyms: {etiqueta: id} adicionales (ver load_synonyms)
+
+        Raises:
+            ValueError: si un sinónimo adicional apunta a un id desconocido
+        """
+        self.names = {material_id: name for material_id, (name, _) in materials.items()}
+        self._exact = {}
+        self._entries = []
+        self._by_token = defaultdict(set)
+        self._memo = {}
+
+        entries = [(name, material_id) for material_id, (name, _) in materials.items()]
+        entries += [(synonym, material_id) for material_id, (_, variants) in materials.items()
+                    for synonym in variants]
+        for synonym, material_id in (synonyms or {}).items():
+            if material_id not in self.names:
+                raise ValueError(f"Sinónimo '{synonym}' apunta a un material desconocido: {material_id}")
+            entries.append((synonym, material_id))
+
+        for synonym, material_id in entries:
+            tokens = material_tokens(synonym)
+            self._exact[' '.join(tokens)] = material_id
+            position = len(self._entries)
+            loose = frozenset(map(_loose, tokens))
+            self._entries.append((loose, _numbers(loose), material_id))
+            for token in loose:
+                self._by_token[token].add(position)
+
+        digest = hashlib.sha256(json.dumps(sorted(entries), ensure_ascii=False).encode('utf-8'))
+        self.version = digest.hexdigest()[:12]
+
+    def match(self, label):
+        """
+        Material de una etiqueta
+
+        Returns:
+            MaterialMatch (id, nombre, puntaje, 'exact' o 'fuzzy') o None
+        """
+        if label is None:
+            return None
+        tokens = material_tokens(label)
+        key = ' '.join(tokens)
+        if key in self._memo:
+            return self._memo[key]
+
+        found = None
+        if key in self._exact:
+            material_id = self._exact[key]
+            found = MaterialMatch(material_id, self.names[material_id], 1.0, 'exact')
+        elif tokens:
+            found = self._fuzzy(frozenset(map(_loose, tokens)))
+        self._memo[key] = found
+        return found
+
+    def resolve(self, label):
+        """Id canónico de una etiqueta, o None si no se reconoce"""
+        found = self.match(label)
+        return found.id if found else None
+
+    def resolve_many(self, labels):
+        """{etiqueta: id o None} de varias etiquetas"""
+        return {label: self.resolve(label) for label in labels}
+
+    def _fuzzy(self, tokens):
+        numbers = _numbers(tokens)
+        scores = {}
+        candidates = set().union(*(self._by_token.get(token, ()) for token in tokens))
+        for position in candidates:
+            entry_tokens, entry_numbers, material_id = self._entries[position]
+            # '90°' no es '45°': las medidas de los dos lados tienen que coincidir
+            if numbers and entry_numbers and not numbers & entry_numbers:
+                continue
+            common = len(tokens & entry_tokens)
+            score = 2 * common / (len(tokens) + len(entry_tokens))
+            # Sinónimo contenido entero en la etiqueta; si es de una sola palabra,
+            # solo cuando lo que sobra son medidas ('Tee 40' -> 'tee')
+            if common == len(entry_tokens) and (len(entry_tokens) > 1 or tokens - entry_tokens <= numbers):
+                score = max(score, CONTAINED_SCORE)
+            scores[material_id] = max(score, scores.get(material_id, 0))
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < FUZZY_THRESHOLD:
+            return None
+        # Empate entre dos materiales: la etiqueta es ambigua
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            return None
+        material_id, score = ranked[0]
+        return MaterialMatch(material_id, self.names[material_id], round(score, 4), 'fuzzy')
+
+
+def load_synonyms(path):
+    """Sinónimos adicionales desde un JSON {etiqueta: id del catálogo}"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+_default_catalog = None
+
+
+def default_catalog():
+    """Catálogo de MATERIALS, construido una vez por proceso"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = MaterialCatalog()
+    return _default_catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resolver etiquetas de materiales a su id canónico')
+    parser.add_argument('labels', nargs='*', help='Etiquetas (por defecto, una por línea en stdin)')
+    parser.add_argument('--synonyms', metavar='FILE', help='JSON {etiqueta: id} que se suma al catálogo')
+    parser.add_argument('--list', action='store_true', help='Listar los materiales del catálogo')
+    parser.add_argument('--json', action='store_true', help='Imprimir el resultado en JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = MaterialCatalog(synonyms=load_synonyms(args.synonyms) if args.synonyms else None)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.list:
+        for material_id, (name, variants) in MATERIALS.items():
+            print(f"{material_id:<26} {name:<32} {' | '.join(variants)}")
+        return 0
+
+    labels = args.labels or [line.strip() for line in sys.stdin if line.strip()]
+    matches = {label: catalog.match(label) for label in labels}
+    if args.json:
+        print(json.dumps({label: found and found._asdict() for label, found in matches.items()},
+                         ensure_ascii=False, indent=2))
+        return 0
+    for label, found in matches.items():
+        if found:
+            print(f"✅ {label:<45} -> {found.id} ({found.method}, {found.score:g})")
+        else:
+            print(f"❓ {label:<45} -> sin coincidencia ({material_key(label)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
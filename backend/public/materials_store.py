@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Almacén consultable de los materiales de todas las hojas de proyecto.
+
+Extrae de cada hoja de proyecto del libro maestro el encabezado del cliente
+(filas 4 a 8: fecha, cliente, domicilio, piscina, volumen) y las filas de
+materiales (sección, descripción, diámetro/tipo, unidad, cantidad,
+observaciones) a un SQLite junto al libro (`<libro>.materials.sqlite`), con
+índices por material y por fecha.
+
+Solo se guardan las secciones de materiales. En las hojas exportadas, las
+secciones y sus columnas salen de excel_layout.SECTIONS: excavación, análisis,
+mano de obra y las mediciones de la sección de equipos (consumo, amperaje,
+desglose) no son materiales. Las secciones de las hojas cargadas a mano
+('Materiales de PVC - Medida 40 mm', 'Adicionales') usan las columnas del
+encabezado de la tabla.
+
+La extracción es incremental: cada hoja guarda la firma de su XML (CRC y
+tamaño dentro del zip, ver workbook_scanner.sheet_signatures) y solo se
+vuelven a leer las hojas nuevas o modificadas. Las consultas corren sobre el
+almacén, sin volver a abrir el libro.
+
+Cada fila guarda además el id de su material en el catálogo
+(material_catalog.py), así los totales suman 'Caños PN10 x 6 m' y 'Caño PVC
+40mm' juntos. Si el catálogo cambia, los ids se recalculan sin releer el
+libro.
+
+Uso:
+    python3 materials_store.py --refresh-only
+    python3 materials_store.py --material tee --spec 40mm --quarter 2025Q3
+    python3 materials_store.py --material cemento --since 2025-10-01 --json
+    python3 materials_store.py --sql "SELECT client, date FROM sheets WHERE is_project ORDER BY date"
+    python3 materials_store.py --parquet materiales.parquet   # requiere pyarrow
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from bom_document import parse_quantity
+from excel_layout import ELECTRICAL_MEASURES, SECTIONS
+from material_catalog import default_catalog, normalize_label
+from sheet_index import SheetIndex, index_path_for
+from workbook_scanner import iter_values, open_sheet, scan_tasks, sheet_signatures, workbook_version
+
+DEFAULT_EXCEL_PATH = Path(__file__).parent / 'CALCULADORA MATERIALES AQUAM.xlsx'
+
+STORE_SUFFIX = '.materials.sqlite'
+
+# Filas del encabezado del cliente (etiqueta en B, valor en C)
+HEADER_ROWS = range(4, 9)
+HEADER_FIELDS = {
+    'fecha': 'date',
+    'cliente': 'client',
+    'domicilio': 'address',
+    'piscina': 'pool',
+    'volumen': 'volume',
+}
+
+# Encabezado de la tabla de materiales (texto de B) y nombre de cada columna
+TABLE_HEADER = 'materiales / consumible'
+TABLE_COLUMNS = {
+    'diametro/tipo': 'spec',
+    'marca': 'spec',
+    'unidad': 'unit',
+    'medidas': 'unit',
+    'cantidad': 'quantity',
+    'observaciones': 'observations',
+}
+# Columnas de la hoja exportada (excel_layout.py), si no se encuentra el encabezado
+DEFAULT_COLUMNS = {3: 'spec', 4: 'unit', 5: 'quantity', 6: 'observations'}
+
+# Secciones de las hojas exportadas por título normalizado
+LAYOUT_SECTIONS = {normalize_label(section.title): section for section in SECTIONS}
+MEASURE_LABELS = frozenset(normalize_label(label) for label in ELECTRICAL_MEASURES)
+
+# Versión de las reglas de extracción: al cambiarla se vuelven a extraer todas las hojas
+EXTRACTOR_VERSION = '2'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sheets (
+    sheet_name TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    is_project INTEGER NOT NULL,
+    project_id TEXT,
+    date TEXT,
+    client TEXT,
+    address TEXT,
+    pool TEXT,
+    volume TEXT,
+    header TEXT,
+    extracted_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS sheets_date ON sheets (date);
+
+CREATE TABLE IF NOT EXISTS materials (
+    sheet_name TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    section TEXT,
+    section_key TEXT,
+    description TEXT NOT NULL,
+    material_key TEXT NOT NULL,
+    material_id TEXT,
+    spec TEXT,
+    spec_key TEXT,
+    unit TEXT,
+    quantity REAL,
+    value TEXT,
+    observations TEXT,
+    PRIMARY KEY (sheet_name, row)
+);
+
+CREATE INDEX IF NOT EXISTS materials_material ON materials (material_key);
+"""
+
+# Índice por id de material (después de agregar la columna a almacenes viejos)
+MATERIAL_ID_INDEX = 'CREATE INDEX IF NOT EXISTS materials_material_id ON materials (material_id)'
+
+# Totales por material (id del catálogo, o la descripción normalizada si no
+# lo tiene) de las hojas de proyecto, con filtros opcionales
+TOTALS_SQL = """
+SELECT
+    COALESCE(m.material_id, m.material_key) AS material,
+    min(m.description) AS description,
+    m.unit AS unit,
+    count(DISTINCT m.sheet_name) AS projects,
+    count(*) AS rows,
+    sum(m.quantity) AS total
+FROM materials m
+JOIN sheets s ON s.sheet_name = m.sheet_name
+WHERE (:material IS NULL OR m.material_key LIKE :material OR m.material_id = :material_id)
+  AND (:spec IS NULL OR m.spec_key LIKE :spec OR m.section_key LIKE :spec)
+  AND (:since IS NULL OR s.date >= :since)
+  AND (:until IS NULL OR s.date <= :until)
+GROUP BY COALESCE(m.material_id, m.material_key), m.unit
+ORDER BY total DESC, material
+"""
+
+STORE_COLUMNS = ('sheet_name', 'project_id', 'date', 'client', 'pool', 'row', 'section', 'description',
+                 'material_id', 'spec', 'unit', 'quantity', 'value', 'observations')
+
+
+# ===== EXTRACCIÓN DE UNA HOJA =====
+
+def _compact(text):
+    """Texto normalizado sin espacios, para buscar '40mm' en '40 mm' o 'Medida 40 mm'"""
+    return normalize_label(text).replace(' ', '') if text else None
+
+
+def _parse_date(value):
+    """Fecha del encabezado como 'YYYY-MM-DD' (acepta fecha de Excel, ISO o DD/MM/YYYY)"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    text = str(value or '').strip()
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(text[:10], fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def extract_sheet(path, sheet_name):
+    """
+    Encabezado y materiales de una hoja
+
+    Returns:
+        (encabezado, filas) donde el encabezado tiene 'isProject' y los campos
+        de HEADER_FIELDS, y cada fila es un diccionario con section, row,
+        description, spec, unit, quantity, value y observations. Las hojas
+        que no tienen 'Cliente' en el encabezado (plantillas de cálculo) no
+        son de proyecto y no devuelven filas.
+    """
+    with open_sheet(path, sheet_name) as ws:
+        rows = list(iter_values(ws))
+
+    header = {'fields': {}}
+    for values in rows:
+        row_idx = values[0][0]
+        if row_idx > HEADER_ROWS.stop:
+            break
+        by_col = {col: value for _, col, value in values}
+        label = normalize_label(by_col.get(2, '')) if isinstance(by_col.get(2), str) else None
+        if row_idx in HEADER_ROWS and label in HEADER_FIELDS:
+            header['fields'][label] = _plain(by_col.get(3))
+            header[HEADER_FIELDS[label]] = by_col.get(3)
+
+    header['isProject'] = 'client' in header
+    if not header['isProject']:
+        return header, []
+    header['date'] = _parse_date(header.get('date'))
+
+    table_columns = _by_field(DEFAULT_COLUMNS)
+    columns, items, section, in_materials = table_columns, [], None, True
+    for values in rows:
+        row_idx = values[0][0]
+        if row_idx in HEADER_ROWS:
+            continue
+        by_col = {col: value for _, col, value in values}
+        description = by_col.get(2)
+        if not isinstance(description, str):
+            continue
+
+        if normalize_label(description) == TABLE_HEADER:
+            found = {col: TABLE_COLUMNS.get(normalize_label(value)) for col, value in by_col.items()
+                     if isinstance(value, str)}
+            table_columns = _by_field({col: name for col, name in found.items() if name}) or table_columns
+            columns = table_columns
+            continue
+
+        layout = LAYOUT_SECTIONS.get(normalize_label(section)) if section else None
+        if len(by_col) == 1 or (layout and description.strip().endswith(':')):
+            if description.strip().endswith(':'):
+                # Subtítulo: en una sección exportada ('Desglose de consumo:')
+                # lo que sigue ya no son materiales
+                in_materials = in_materials and not layout
+                continue
+            # Título de sección ('EXCAVACIÓN', 'Materiales de PVC - Medida 40 mm')
+            section = description.strip()
+            layout = LAYOUT_SECTIONS.get(normalize_label(section))
+            in_materials = layout is None or layout.kind == 'item'
+            columns = _layout_columns(layout) if layout and layout.columns else table_columns
+            continue
+        if not in_materials or (layout and normalize_label(description) in MEASURE_LABELS):
+            continue
+
+        fields = {name: _joined(by_col, cols) for name, cols in columns.items()}
+        if fields.get('quantity') is None:
+            continue
+
+        quantity, value_unit = parse_quantity(fields['quantity'])
+        unit = fields.get('unit')
+        items.append({
+            'row': row_idx,
+            'section': section,
+            'description': description.strip(),
+            'spec': None if fields.get('spec') is None else str(fields['spec']).strip(),
+            'unit': str(unit).strip() if unit is not None else value_unit,
+            'quantity': quantity,
+            'value': str(_plain(fields['quantity'])),
+            'observations': None if fields.get('observations') is None else str(fields['observations']),
+        })
+    return header, items
+
+
+def _by_field(columns):
+    """{columna: campo} -> {campo: (columnas,)}; 'Diámetro/Tipo' y 'Marca' se unen en spec"""
+    fields = {}
+    for col, name in sorted(columns.items()):
+        fields.setdefault(name, ())
+        fields[name] += (col,)
+    return fields
+
+
+def _layout_columns(layout):
+    """Columnas tipadas de una sección de excel_layout ('C' o ('C', 'D')) como índices"""
+    return {
+        name: tuple(ord(letter) - ord('A') + 1 for letter in ((cols,) if isinstance(cols, str) else cols))
+        for name, cols in layout.columns.items()
+    }
+
+
+def _joined(by_col, cols):
+    """Valor de una columna, o el texto de varias unidas ('40mm PVC')"""
+    if len(cols) == 1:
+        return by_col.get(cols[0])
+    parts = [str(by_col[col]) for col in cols if by_col.get(col) not in (None, '', '-')]
+    return ' '.join(parts) or None
+
+
+def _extract_task(task):
+    path, sheet_name = task
+    return extract_sheet(path, sheet_name)
+
+
+# ===== ALMACÉN =====
+
+def store_path_for(excel_path):
+    excel_path = Path(excel_path)
+    return excel_path.with_name(excel_path.name + STORE_SUFFIX)
+
+
+class MaterialsStore:
+    """
+    Almacén SQLite de encabezados y materiales por hoja.
+
+    refresh() vuelve a extraer solo las hojas cuya firma cambió y no lee
+    nada si el libro no cambió desde la última vez.
+    """
+
+    def __init__(self, excel_path, catalog=None):
+        self.excel_path = Path(excel_path)
+        self.path = store_path_for(excel_path)
+        self.catalog = catalog or default_catalog()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(materials)')}
+        if 'material_id' not in columns:
+            self.conn.execute('ALTER TABLE materials ADD COLUMN material_id TEXT')
+            self.conn.execute("DELETE FROM meta WHERE key = 'catalog'")
+        self.conn.execute(MATERIAL_ID_INDEX)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self, workers=None, force=False):
+        """
+        Extrae las hojas nuevas o modificadas y borra las que ya no están
+
+        Args:
+            workers: Procesos para extraer hojas en paralelo (ver scan_tasks)
+            force: Volver a extraer todas las hojas
+
+        Returns:
+            Nombres de las hojas extraídas
+        """
+        if self._meta('catalog') != self.catalog.version:
+            self._resolve_materials()
+        force = force or self._meta('extractor') != EXTRACTOR_VERSION
+        version = workbook_version(self.excel_path)
+        if not force and self._meta('workbook') == version:
+            return []
+
+        signatures = sheet_signatures(self.excel_path)
+        stored = {row['sheet_name']: row['signature'] for row in self.conn.execute('SELECT * FROM sheets')}
+        stale = [name for name, signature in signatures.items() if force or stored.get(name) != signature]
+        results = scan_tasks([(str(self.excel_path), name) for name in stale], workers, function=_extract_task)
+        project_ids = self._project_ids()
+
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            for name in set(stored) - set(signatures):
+                self._delete(name)
+            for name, (header, items) in zip(stale, results):
+                self._delete(name)
+                self.conn.execute(
+                    'INSERT INTO sheets (sheet_name, signature, is_project, project_id, date, client, address, '
+                    'pool, volume, header, extracted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (name, signatures[name], header['isProject'], project_ids.get(name), header.get('date'),
+                     *(None if header.get(field) is None else str(header[field])
+                       for field in ('client', 'address', 'pool', 'volume')),
+                     json.dumps(header['fields'], ensure_ascii=False), now),
+                )
+                self.conn.executemany(
+                    'INSERT INTO materials (sheet_name, row, section, section_key, description, material_key, '
+                    'material_id, spec, spec_key, unit, quantity, value, observations) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(name, item['row'], item['section'], _compact(item['section']), item['description'],
+                      normalize_label(item['description']), self.catalog.resolve(item['description']),
+                      item['spec'], _compact(item['spec']), item['unit'], item['quantity'], item['value'],
+                      item['observations']) for item in items],
+                )
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('workbook', version))
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                              ('extractor', EXTRACTOR_VERSION))
+        return stale
+
+    def _resolve_materials(self):
+        """Recalcula material_id de todas las filas con el catálogo actual"""
+        keys = [row[0] for row in self.conn.execute('SELECT DISTINCT material_key FROM materials')]
+        with self.conn:
+            self.conn.executemany('UPDATE materials SET material_id = ? WHERE material_key = ?',
+                                  [(self.catalog.resolve(key), key) for key in keys])
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                              ('catalog', self.catalog.version))
+
+    def _project_ids(self):
+        """Hoja -> projectId según el índice de hojas del libro, si existe"""
+        if not index_path_for(self.excel_path).exists():
+            return {}
+        with SheetIndex(self.excel_path) as index:
+            return {row['sheet_name']: row['project_id'] for row in index.all()}
+
+    def _meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _delete(self, sheet_name):
+        self.conn.execute('DELETE FROM sheets WHERE sheet_name = ?', (sheet_name,))
+        self.conn.execute('DELETE FROM materials WHERE sheet_name = ?', (sheet_name,))
+
+    # ----- consultas -----
+
+    def totals(self, material=None, spec=None, since=None, until=None):
+        """
+        Totales por material en las hojas de proyecto
+
+        Args:
+            material: Texto a buscar en la descripción (sin acentos ni
+                mayúsculas), o un material del catálogo ('LLAVE ESFERICA' o
+                'valvula-esferica' encuentran 'Válvula de corte (esférica)')
+            spec: Diámetro/tipo a buscar en la especificación o en el título de
+                la sección ('40mm' encuentra 'Materiales de PVC - Medida 40 mm')
+            since: Fecha mínima del encabezado (YYYY-MM-DD, inclusive)
+            until: Fecha máxima del encabezado (YYYY-MM-DD, inclusive)
+        """
+        params = {
+            'material': f"%{normalize_label(material)}%" if material else None,
+            'material_id': (material if material in self.catalog.names else self.catalog.resolve(material))
+            if material else None,
+            'spec': f"%{_compact(spec)}%" if spec else None,
+            'since': since,
+            'until': until,
+        }
+        return [dict(row) for row in self.conn.execute(TOTALS_SQL, params)]
+
+    def query(self, sql, params=()):
+        """Consulta SQL libre sobre las tablas sheets y materials"""
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def records(self):
+        """Filas de materiales con los datos del encabezado (columnas STORE_COLUMNS)"""
+        return self.query(
+            'SELECT m.sheet_name, s.project_id, s.date, s.client, s.pool, m.row, m.section, m.description, '
+            'm.material_id, m.spec, m.unit, m.quantity, m.value, m.observations '
+            'FROM materials m JOIN sheets s ON s.sheet_name = m.sheet_name ORDER BY s.date, m.sheet_name, m.row'
+        )
+
+
+def write_parquet(records, output):
+    """Escribe las filas del almacén en Parquet. Requiere pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('La salida Parquet requiere pyarrow (pip install pyarrow)') from None
+
+    schema = pa.schema([
+        (name, pa.int32() if name == 'row' else pa.float64() if name == 'quantity' else pa.string())
+        for name in STORE_COLUMNS
+    ])
+    columns = {name: [record[name] for record in records] for name in STORE_COLUMNS}
+    pq.write_table(pa.table(columns, schema=schema), output)
+
+
+def quarter_range(quarter):
+    """'2025Q3' -> ('2025-07-01', '2025-09-30')"""
+    match = re.fullmatch(r'(\d{4})[Qq]([1-4])', quarter)
+    if not match:
+        raise ValueError(f"Trimestre inválido: {quarter} (formato 2025Q3)")
+    year, number = int(match.group(1)), int(match.group(2))
+    last_day = {1: '03-31', 2: '06-30', 3: '09-30', 4: '12-31'}[number]
+    return f"{year}-{3 * number - 2:02d}-01", f"{year}-{last_day}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Almacén de materiales de las hojas de proyecto')
+    parser.add_argument('--excel', default=str(DEFAULT_EXCEL_PATH), help='Libro (por defecto el libro maestro)')
+    parser.add_argument('--workers', type=int, default=0, help='Procesos para extraer (0 = uno por núcleo)')
+    parser.add_argument('--rebuild', action='store_true', help='Volver a extraer todas las hojas')
+    parser.add_argument('--refresh-only', action='store_true', help='Solo actualizar el almacén')
+    parser.add_argument('--material', help='Texto a buscar en la descripción del material')
+    parser.add_argument('--spec', help="Diámetro/tipo (ej: '40mm'), en la especificación o la sección")
+    parser.add_argument('--since', help='Desde la fecha (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Hasta la fecha (YYYY-MM-DD)')
+    parser.add_argument('--quarter', help="Trimestre (ej: '2025Q3'), en lugar de --since/--until")
+    parser.add_argument('--sql', help='Consulta SQL libre sobre las tablas sheets y materials')
+    parser.add_argument('--parquet', metavar='FILE', help='Exportar las filas del almacén a Parquet')
+    parser.add_argument('--json', action='store_true', help='Imprimir el resultado en JSON')
+    args = parser.parse_args(argv)
+
+    since, until = args.since, args.until
+    if args.quarter:
+        try:
+            since, until = quarter_range(args.quarter)
+        except ValueError as e:
+            parser.error(str(e))
+
+    with MaterialsStore(args.excel) as store:
+        started = time.perf_counter()
+        refreshed = store.refresh(workers=args.workers, force=args.rebuild)
+        print(f"🔎 {len(refreshed)} hojas extraídas en {time.perf_counter() - started:.2f} s", file=sys.stderr)
+        if args.refresh_only:
+            return 0
+
+        if args.parquet:
+            try:
+                write_parquet(store.records(), args.parquet)
+            except RuntimeError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 1
+            print(f"📄 Materiales exportados a {args.parquet}", file=sys.stderr)
+            return 0
+
+        started = time.perf_counter()
+        if args.sql:
+            rows = store.query(args.sql)
+        else:
+            rows = store.totals(args.material, args.spec, since, until)
+        elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, default=str))
+        return 0
+    for row in rows:
+        print(' | '.join(f"{key}={value}" for key, value in row.items()))
+    print(f"✅ {len(rows)} filas en {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Exportación por lotes en paralelo.
+
+Cada proceso de un pool genera el XML de las hojas de un grupo de proyectos
+(diseño, miniaturas y celdas con el motor 'fast', ver xlsx_fast_writer.py) y
+el proceso principal las une en el libro final a medida que llegan, con sus
+imágenes (las repetidas entre hojas se guardan una sola vez).
+
+Como en export_projects_to_excel, un proyecto con errores no aborta el lote
+y, si dos proyectos generan el mismo nombre de hoja (sin distinguir
+mayúsculas, como Excel), queda la hoja del último (solo esa se construye).
+Los nombres se validan antes de repartir el trabajo: un proyecto con un
+nombre inválido queda con `ok: False` y no llega al libro.
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from excel_layout import project_sheet_name, validate_sheet_name
+
+# Procesos del pool (0 = uno por núcleo) y proyectos por envío a cada proceso
+DEFAULT_WORKERS = int(os.environ.get('EXCEL_EXPORT_BATCH_WORKERS', 0))
+DEFAULT_CHUNK_SIZE = 4
+
+
+def worker_count(workers=None):
+    """Cantidad efectiva de procesos: `workers`, o uno por núcleo si es 0/None"""
+    return workers or DEFAULT_WORKERS or os.cpu_count() or 1
+
+
+def _init_worker():
+    # Los print() del exportador no deben mezclarse con el protocolo del
+    # worker (stdout): en los procesos del pool van a stderr
+    sys.stdout = sys.stderr
+
+
+def build_sheet(task):
+    """
+    Genera una hoja en un proceso del pool
+
+    Args:
+        task: (índice en el lote, datos del proyecto)
+
+    Returns:
+        {'index', 'ok', 'xml', 'images'} o {'index', 'ok', 'error'}
+    """
+    # Import diferido: export_to_excel importa este módulo
+    import xlsx_fast_writer
+    from excel_layout import iter_sheet_rows
+    from export_to_excel import IMAGE_ROW_HEIGHT, IMAGE_SIZE, load_thumbnail
+
+    index, project_data = task
+    try:
+        sheet_xml, images = xlsx_fast_writer.render_sheet(
+            iter_sheet_rows(project_data),
+            load_image=lambda url, cell_ref: load_thumbnail(url, cell_ref, IMAGE_SIZE, IMAGE_SIZE),
+            image_row_height=IMAGE_ROW_HEIGHT,
+        )
+        return {'index': index, 'ok': True, 'xml': sheet_xml, 'images': images}
+    except Exception as e:
+        return {'index': index, 'ok': False, 'error': str(e)}
+
+
+def iter_sheet_parts(projects, results, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Construye las hojas del lote en paralelo y las entrega en orden.
+
+    Args:
+        projects: Lista de diccionarios con los datos de cada proyecto
+        results: Lista (vacía) donde se deja un resultado por proyecto, en el
+            mismo formato que export_projects_to_excel
+        workers: Procesos del pool (ver worker_count)
+        chunk_size: Proyectos que se envían juntos a cada proceso
+
+    Yields:
+        (nombre de la hoja, XML, imágenes) para xlsx_fast_writer.write_sheets
+
+    Raises:
+        ValueError: si ningún proyecto pudo exportarse
+    """
+    results[:] = []
+    last = {}  # nombre en minúsculas -> índice del último proyecto con ese nombre
+    for index, project_data in enumerate(projects):
+        result = {'index': index, 'projectId': None, 'ok': True}
+        results.append(result)
+        try:
+            result['projectId'] = project_data.get('projectId')
+            result['sheetName'] = validate_sheet_name(project_sheet_name(project_data))
+        except Exception as e:
+            result.pop('sheetName', None)
+            result.update(ok=False, error=str(e))
+            print(f"✗ [{index + 1}/{len(projects)}] Error: {e}")
+            continue
+        # La última aparición de cada nombre reemplaza a las anteriores
+        last[result['sheetName'].lower()] = index
+
+    for result in results:
+        if result['ok']:
+            result['sheetName'] = results[last[result['sheetName'].lower()]]['sheetName']
+    tasks = [(index, projects[index]) for index in sorted(last.values())]
+
+    exported = 0
+    with ProcessPoolExecutor(max_workers=worker_count(workers), initializer=_init_worker) as pool:
+        for part in pool.map(build_sheet, tasks, chunksize=chunk_size):
+            result = results[part['index']]
+            if part['ok']:
+                exported += 1
+                print(f"✓ [{part['index'] + 1}/{len(projects)}] {result['sheetName']}")
+                yield result['sheetName'], part['xml'], part['images']
+            else:
+                del result['sheetName']
+                result.update(ok=False, error=part['error'])
+                print(f"✗ [{part['index'] + 1}/{len(projects)}] Error: {part['error']}")
+
+    if not exported:
+        raise ValueError('Ningún proyecto del lote pudo exportarse')
+
+
+def throughput(sheets, seconds, workers):
+    """Resumen de rendimiento del lote"""
+    return {
+        'sheets': sheets,
+        'seconds': round(seconds, 3),
+        'workers': workers,
+        'sheetsPerSecond': round(sheets / seconds, 1) if seconds > 0 else None,
+    }
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Comparación de hojas por etiqueta.
+
+En una sola pasada por cada hoja (modo solo lectura, ver workbook_scanner.py)
+se detectan las columnas de etiquetas y su columna de valores. Por ejemplo,
+en las hojas de proyecto 'Codo 90°' en B tiene su cantidad en E, y en las
+hojas CALCULOS DE MATERIALES 'TEE' en A tiene su cantidad en B. Con eso se
+arma un índice etiqueta -> valor por hoja.
+
+El índice se guarda en SQLite junto al libro (`<libro>.labels.sqlite`). Solo
+se vuelven a indexar las hojas cuyo XML cambió, según el CRC del zip, así
+que comparar dos hojas con el índice al día es una consulta de milisegundos.
+
+La comparación alinea las etiquetas normalizadas (sin acentos ni
+mayúsculas). Los materiales que se llaman distinto en cada hoja
+('LLAVE ESFERICA' = 'Válvula de corte (esférica)') se emparejan por su id
+del catálogo de materiales (material_catalog.py) y, opcionalmente, con un
+archivo de alias. Si dos etiquetas de una hoja resuelven al mismo material
+('BOLSAS DE CEMENTO' y 'CEMENTO') se combinan en un ítem que suma sus
+valores y queda marcado como `merged`; ninguna se descarta.
+Informa la diferencia de cada cantidad con tolerancia absoluta y relativa,
+en JSON o CSV.
+
+Uso:
+    python3 sheet_diff.py "CALCULOS DE MATERIALES TURQUESA" "TURQUESA (6,5X3,1) INES Y PABLO"
+    python3 sheet_diff.py HOJA_A HOJA_B --rel-tol 0.05 --format csv --output diff.csv
+    python3 sheet_diff.py HOJA_A HOJA_B --aliases alias.json --changes-only
+    python3 sheet_diff.py --index            # actualizar el índice y listar hojas
+"""
+import argparse
+import csv
+import json
+import math
+import re
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from material_catalog import default_catalog, normalize_label
+from workbook_scanner import iter_values, open_sheet, scan_tasks, sheet_signatures, workbook_version
+
+DEFAULT_EXCEL_PATH = Path(__file__).parent / 'CALCULADORA MATERIALES AQUAM.xlsx'
+
+LABELS_SUFFIX = '.labels.sqlite'
+
+# Filas con etiqueta y número que debe tener un par de columnas para
+# tomarse como columna de etiquetas -> columna de valores
+MIN_LABEL_PAIRS = 2
+
+# Proporción mínima de textos distintos en una columna de etiquetas (las
+# columnas de unidades, 'm³', 'bolsas de 50kg', repiten sus textos)
+MIN_DISTINCT_RATIO = 0.6
+
+# Estados de cada etiqueta en la comparación
+EQUAL = 'equal'
+DIFFERENT = 'different'
+NOT_NUMERIC = 'not-numeric'
+ONLY_LEFT = 'only-left'
+ONLY_RIGHT = 'only-right'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sheets (
+    sheet_name TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    label_columns TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS labels (
+    sheet_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    label_key TEXT NOT NULL,
+    label TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    label_col INTEGER NOT NULL,
+    value_col INTEGER NOT NULL,
+    value REAL,
+    raw TEXT,
+    PRIMARY KEY (sheet_name, label_key)
+);
+"""
+
+_QUANTITY = re.compile(r'^\$?\s*([-+]?\d+(?:[.,]\d+)?)(?:\s*([^\d\s.,].*))?$')
+
+
+# ===== ETIQUETAS Y VALORES =====
+
+def parse_quantity(value):
+    """
+    Cantidad numérica de una celda: números, y textos como '2.45', '6,5',
+    '15.73 m' o '$29.91'. None para textos, fechas y booleanos.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _QUANTITY.match(value.strip())
+        if match:
+            return float(match.group(1).replace(',', '.'))
+    return None
+
+
+def _is_label(value):
+    return isinstance(value, str) and parse_quantity(value) is None and any(c.isalpha() for c in value)
+
+
+def label_columns(rows):
+    """
+    Columnas de etiquetas y su columna de valores: {columna etiqueta: columna valor}
+
+    Son candidatas las columnas con textos mayormente distintos. Cada número
+    de una fila vota por el par (columna de la etiqueta más cercana a su
+    izquierda, su columna), y cada columna de etiquetas toma la columna de
+    valores con más votos (en empate, la más cercana). Las columnas que
+    quedan entre una columna de etiquetas ya elegida y su columna de valores
+    (marca, diámetro) no se toman como etiquetas.
+    """
+    texts = defaultdict(list)
+    for values in rows:
+        for _, col, value in values:
+            if _is_label(value):
+                texts[col].append(normalize_label(value))
+    candidates = {
+        col for col, labels in texts.items()
+        if len(labels) >= MIN_LABEL_PAIRS and len(set(labels)) >= len(labels) * MIN_DISTINCT_RATIO
+    }
+
+    votes = Counter()
+    for values in rows:
+        owner = None
+        for _, col, value in values:
+            if col in candidates and _is_label(value):
+                owner = col
+            elif owner is not None and parse_quantity(value) is not None:
+                votes[owner, col] += 1
+
+    best = {}
+    for (label_col, value_col), count in votes.items():
+        if count >= MIN_LABEL_PAIRS:
+            best[label_col] = max(best.get(label_col, (0, 0)), (count, -value_col))
+
+    columns = {}
+    for label_col in sorted(best):
+        if any(label < label_col < value for label, value in columns.items()):
+            continue
+        columns[label_col] = -best[label_col][1]
+    return columns
+
+
+def index_sheet(path, sheet_name):
+    """
+    Índice etiqueta -> valor de una hoja
+
+    Returns:
+        ({columna etiqueta: columna valor}, [ítems en orden de la hoja]); cada
+        ítem es {key, label, row, labelCol, valueCol, value, raw}. Las
+        etiquetas repetidas reciben la clave 'etiqueta#2', 'etiqueta#3', ...
+    """
+    with open_sheet(path, sheet_name) as ws:
+        rows = list(iter_values(ws))
+
+    columns = label_columns(rows)
+    items = []
+    seen = Counter()
+    for values in rows:
+        by_col = {col: value for _, col, value in values}
+        for label_col, value_col in columns.items():
+            label = by_col.get(label_col)
+            if not _is_label(label):
+                continue
+            key = normalize_label(label)
+            seen[key] += 1
+            if seen[key] > 1:
+                key = f"{key}#{seen[key]}"
+            raw = by_col.get(value_col)
+            items.append({
+                'key': key,
+                'label': label.strip(),
+                'row': values[0][0],
+                'labelCol': label_col,
+                'valueCol': value_col,
+                'value': parse_quantity(raw),
+                'raw': None if raw is None else str(raw),
+            })
+    return columns, items
+
+
+def _index_task(task):
+    path, sheet_name = task
+    return index_sheet(path, sheet_name)
+
+
+# ===== ÍNDICE PERSISTENTE =====
+
+def labels_path_for(excel_path):
+    excel_path = Path(excel_path)
+    return excel_path.with_name(excel_path.name + LABELS_SUFFIX)
+
+
+class LabelIndex:
+    """
+    Índice SQLite hoja -> etiquetas de un libro.
+
+    La firma de cada hoja es el CRC y el tamaño de su XML (y de los textos
+    compartidos, si el libro los usa). refresh() reindexa solo las hojas
+    cuya firma cambió y no lee nada si el libro no cambió desde la última vez.
+    """
+
+    def __init__(self, excel_path):
+        self.excel_path = Path(excel_path)
+        self.path = labels_path_for(excel_path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self, workers=None, force=False):
+        """
+        Pone el índice al día con el libro
+
+        Args:
+            workers: Procesos para indexar hojas en paralelo (ver scan_tasks)
+            force: Reindexar todas las hojas
+
+        Returns:
+            Nombres de las hojas reindexadas
+        """
+        version = workbook_version(self.excel_path)
+        if not force and self._meta('workbook') == version:
+            return []
+
+        signatures = sheet_signatures(self.excel_path)
+        stored = {row['sheet_name']: row['signature'] for row in self.conn.execute('SELECT * FROM sheets')}
+
+        stale = [name for name, signature in signatures.items() if force or stored.get(name) != signature]
+        results = scan_tasks([(str(self.excel_path), name) for name in stale], workers, function=_index_task)
+
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            for name in set(stored) - set(signatures):
+                self._delete(name)
+            for name, (columns, items) in zip(stale, results):
+                self._delete(name)
+                self.conn.execute(
+                    'INSERT INTO sheets (sheet_name, signature, label_columns, indexed_at) VALUES (?, ?, ?, ?)',
+                    (name, signatures[name], json.dumps(columns), now),
+                )
+                self.conn.executemany(
+                    'INSERT INTO labels (sheet_name, position, label_key, label, row, label_col, value_col, '
+                    'value, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(name, position, item['key'], item['label'], item['row'], item['labelCol'],
+                      item['valueCol'], item['value'], item['raw']) for position, item in enumerate(items)],
+                )
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('workbook', version))
+        return stale
+
+    def _meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _delete(self, sheet_name):
+        self.conn.execute('DELETE FROM sheets WHERE sheet_name = ?', (sheet_name,))
+        self.conn.execute('DELETE FROM labels WHERE sheet_name = ?', (sheet_name,))
+
+    def sheets(self):
+        """[{sheet, labels, labelColumns, indexedAt}] en orden alfabético"""
+        rows = self.conn.execute(
+            'SELECT s.*, (SELECT COUNT(*) FROM labels l WHERE l.sheet_name = s.sheet_name) AS labels '
+            'FROM sheets s ORDER BY s.sheet_name'
+        )
+        return [
+            {'sheet': row['sheet_name'], 'labels': row['labels'],
+             'labelColumns': json.loads(row['label_columns']), 'indexedAt': row['indexed_at']}
+            for row in rows
+        ]
+
+    def items(self, sheet_name):
+        """
+        Ítems indexados de una hoja, en orden (ver index_sheet)
+
+        Raises:
+            KeyError: si la hoja no está en el índice
+        """
+        if not self.conn.execute('SELECT 1 FROM sheets WHERE sheet_name = ?', (sheet_name,)).fetchone():
+            raise KeyError(f"Hoja no encontrada: {sheet_name}")
+        rows = self.conn.execute('SELECT * FROM labels WHERE sheet_name = ? ORDER BY position', (sheet_name,))
+        return [
+            {'key': row['label_key'], 'label': row['label'], 'row': row['row'], 'labelCol': row['label_col'],
+             'valueCol': row['value_col'], 'value': row['value'], 'raw': row['raw']}
+            for row in rows
+        ]
+
+
+# ===== COMPARACIÓN =====
+
+def load_aliases(path):
+    """
+    Alias de etiquetas desde un JSON {etiqueta: etiqueta canónica}; ambos
+    lados se normalizan con normalize_label
+    """
+    with open(path, encoding='utf-8') as f:
+        return normalize_aliases(json.load(f))
+
+
+def normalize_aliases(aliases):
+    return {normalize_label(alias): normalize_label(canonical) for alias, canonical in aliases.items()}
+
+
+def material_key(label_key, aliases=None, catalog=None):
+    """
+    Clave de comparación de una etiqueta normalizada: primero el alias, si
+    lo tiene, y después el id del catálogo; si no se reconoce, la etiqueta.
+    Cada origen tiene su prefijo ('id:cemento', 'label:total') para que una
+    etiqueta sin resolver no coincida con el id de un material.
+
+    Args:
+        label_key: Etiqueta normalizada, sin el sufijo '#n' de las repetidas
+        aliases: {etiqueta normalizada: etiqueta canónica}
+        catalog: MaterialCatalog, o None para comparar sin catálogo
+    """
+    label_key = (aliases or {}).get(label_key, label_key)
+    material_id = catalog.resolve(label_key) if catalog else None
+    return f"id:{material_id}" if material_id else f"label:{label_key}"
+
+
+def _keyed(items, aliases, catalog):
+    """
+    Ítems por clave de material. Las etiquetas repetidas conservan su sufijo
+    '#n' (se emparejan por orden); las etiquetas distintas con la misma clave
+    se combinan con _merged.
+    """
+    groups = {}
+    for item in items:
+        base, _, suffix = item['key'].partition('#')
+        key = material_key(base, aliases, catalog) + (f"#{suffix}" if suffix else '')
+        groups.setdefault(key, []).append(item)
+    return {key: group[0] if len(group) == 1 else _merged(group) for key, group in groups.items()}
+
+
+def _merged(items):
+    """
+    Un ítem con los de varias etiquetas del mismo material: etiquetas unidas
+    con ' + ', suma de los valores numéricos (None si no hay ninguno) y
+    `merged` con la cantidad de etiquetas
+    """
+    values = [item['value'] for item in items if item['value'] is not None]
+    raws = [str(item['raw']) for item in items if item['raw'] is not None]
+    return {
+        **items[0],
+        'label': ' + '.join(item['label'] for item in items),
+        'value': round(sum(values), 6) if values else None,
+        'raw': ' + '.join(raws) or None,
+        'merged': len(items),
+    }
+
+
+def diff_items(left, right, abs_tol=0.0, rel_tol=0.0, aliases=None, catalog=None):
+    """
+    Alinea los ítems de dos hojas por etiqueta y compara sus valores
+
+    Args:
+        left: Ítems de la hoja izquierda (LabelIndex.items o index_sheet)
+        right: Ítems de la hoja derecha
+        abs_tol: Diferencia absoluta tolerada
+        rel_tol: Diferencia relativa tolerada (0.05 = 5%)
+        aliases: {etiqueta normalizada: etiqueta canónica} (ver load_aliases)
+        catalog: MaterialCatalog para emparejar por id de material
+
+    Returns:
+        Lista de diferencias: las etiquetas de la izquierda en su orden y
+        después las que solo están a la derecha. Cada una es {key, leftLabel,
+        rightLabel, left, right, delta, relDelta, status, merged}; `merged` es
+        True si en alguna de las hojas se combinaron varias etiquetas.
+    """
+    left_items = _keyed(left, aliases, catalog)
+    right_items = _keyed(right, aliases, catalog)
+
+    result = []
+    for key in [*left_items, *(key for key in right_items if key not in left_items)]:
+        a, b = left_items.get(key), right_items.get(key)
+        entry = {
+            'key': key,
+            'leftLabel': a and a['label'],
+            'rightLabel': b and b['label'],
+            'left': a and _shown(a),
+            'right': b and _shown(b),
+            'delta': None,
+            'relDelta': None,
+            'merged': any(item and item.get('merged') for item in (a, b)),
+        }
+        if b is None:
+            entry['status'] = ONLY_LEFT
+        elif a is None:
+            entry['status'] = ONLY_RIGHT
+        elif a['value'] is None or b['value'] is None:
+            entry['status'] = EQUAL if a['raw'] == b['raw'] else NOT_NUMERIC
+        else:
+            entry['delta'] = round(b['value'] - a['value'], 6)
+            if a['value']:
+                entry['relDelta'] = round(entry['delta'] / abs(a['value']), 6)
+            close = math.isclose(a['value'], b['value'], rel_tol=rel_tol, abs_tol=abs_tol)
+            entry['status'] = EQUAL if close else DIFFERENT
+        result.append(entry)
+    return result
+
+
+def _shown(item):
+    return item['value'] if item['value'] is not None else item['raw']
+
+
+def diff_sheets(index, left_sheet, right_sheet, abs_tol=0.0, rel_tol=0.0, aliases=None, catalog=None):
+    """diff_items de dos hojas del índice, con un resumen por estado"""
+    items = diff_items(index.items(left_sheet), index.items(right_sheet), abs_tol, rel_tol, aliases, catalog)
+    return {
+        'left': left_sheet,
+        'right': right_sheet,
+        'tolerance': {'abs': abs_tol, 'rel': rel_tol},
+        'summary': dict(Counter(item['status'] for item in items)),
+        'items': items,
+    }
+
+
+CSV_FIELDS = ('key', 'leftLabel', 'rightLabel', 'left', 'right', 'delta', 'relDelta', 'status', 'merged')
+
+
+def write_csv(items, f):
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    writer.writerows(items)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Comparación de dos hojas por etiqueta')
+    parser.add_argument('left', nargs='?', help='Hoja de referencia')
+    parser.add_argument('right', nargs='?', help='Hoja a comparar')
+    parser.add_argument('--excel', default=str(DEFAULT_EXCEL_PATH), help='Libro (por defecto el libro maestro)')
+    parser.add_argument('--abs-tol', type=float, default=0.0, help='Diferencia absoluta tolerada')
+    parser.add_argument('--rel-tol', type=float, default=0.0, help='Diferencia relativa tolerada (0.05 = 5%%)')
+    parser.add_argument('--aliases', metavar='FILE',
+                        help='JSON {etiqueta: etiqueta canónica}, se aplica antes del catálogo')
+    parser.add_argument('--no-catalog', action='store_true',
+                        help='No emparejar por el catálogo de materiales (solo etiquetas y alias)')
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('--output', metavar='FILE', help='Archivo de salida (por defecto stdout)')
+    parser.add_argument('--changes-only', action='store_true', help='Omitir las etiquetas iguales')
+    parser.add_argument('--workers', type=int, default=0, help='Procesos para indexar (0 = uno por núcleo)')
+    parser.add_argument('--rebuild', action='store_true', help='Reindexar todas las hojas')
+    parser.add_argument('--index', action='store_true', help='Solo actualizar el índice y listar las hojas')
+    args = parser.parse_args(argv)
+
+    if not args.index and not (args.left and args.right):
+        parser.error('Indicar las dos hojas a comparar, o --index')
+
+    with LabelIndex(args.excel) as index:
+        refreshed = index.refresh(workers=args.workers, force=args.rebuild)
+        if refreshed:
+            print(f"🔎 {len(refreshed)} hojas indexadas", file=sys.stderr)
+
+        if args.index:
+            for sheet in index.sheets():
+                print(f"{sheet['sheet']:<40} {sheet['labels']:>4} etiquetas  columnas {sheet['labelColumns']}")
+            return 0
+
+        aliases = load_aliases(args.aliases) if args.aliases else None
+        catalog = None if args.no_catalog else default_catalog()
+        try:
+            report = diff_sheets(index, args.left, args.right, args.abs_tol, args.rel_tol, aliases, catalog)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}", file=sys.stderr)
+            return 1
+
+    if args.changes_only:
+        report['items'] = [item for item in report['items'] if item['status'] != EQUAL]
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            write_csv(report['items'], output)
+        else:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+            output.write('\n')
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Índice de hojas del libro maestro, guardado junto al .xlsx en SQLite.
+
+Relaciona cada proyecto con su hoja (nombre, fecha de creación, hash del
+contenido y cantidad de filas) para poder buscar, reemplazar o borrar la
+hoja de un proyecto sin abrir el libro. Guarda además el rango de filas y la
+huella de cada sección, que usa la actualización incremental. También evita que dos proyectos
+cuyo nombre de hoja coincide al truncarlo a 31 caracteres se pisen.
+
+Uso:
+    python3 sheet_index.py "CALCULADORA MATERIALES AQUAM.xlsx" --list
+    python3 sheet_index.py "CALCULADORA MATERIALES AQUAM.xlsx" --project AB12CD34
+    python3 sheet_index.py "CALCULADORA MATERIALES AQUAM.xlsx" --rebuild
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from excel_layout import MAX_SHEET_NAME
+
+INDEX_SUFFIX = '.index.sqlite'
+
+# Prefijo de las claves de hojas cuyo proyecto se desconoce (hojas previas
+# al índice o exportadas sin projectId): se pueden reemplazar como antes
+UNKNOWN_PROJECT_PREFIX = 'sheet:'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    project_id TEXT PRIMARY KEY,
+    sheet_name TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    content_hash TEXT,
+    row_count INTEGER,
+    client_name TEXT,
+    location TEXT,
+    archive_sheet TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sections (
+    project_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    section_key TEXT NOT NULL,
+    first_row INTEGER NOT NULL,
+    last_row INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (project_id, section_key)
+);
+"""
+
+
+def canonical_json(data):
+    """JSON canónico (claves ordenadas, sin espacios) para calcular hashes estables"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def content_hash(project_data):
+    """Hash SHA-256 del contenido del proyecto"""
+    return hashlib.sha256(canonical_json(project_data).encode('utf-8')).hexdigest()
+
+
+def index_path_for(excel_path):
+    excel_path = Path(excel_path)
+    return excel_path.with_name(excel_path.name + INDEX_SUFFIX)
+
+
+def project_key(project_data, sheet_name):
+    """Clave del proyecto en el índice (projectId o, si falta, el nombre de hoja)"""
+    project_id = project_data.get('projectId')
+    return str(project_id) if project_id else f"{UNKNOWN_PROJECT_PREFIX}{sheet_name}"
+
+
+class SheetIndex:
+    """
+    Índice SQLite proyecto -> hoja.
+
+    La columna `location` es NULL mientras la hoja está en el libro maestro y
+    guarda el nombre del libro de archivo cuando workbook_archive la mueve;
+    `archive_sheet` es el nombre de la hoja en ese libro (con sufijo ' (2)'
+    si el nombre ya estaba ocupado).
+    """
+
+    def __init__(self, excel_path):
+        self.path = index_path_for(excel_path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        # Índices creados antes de registrar el nombre de la hoja archivada
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(sheets)')}
+        if 'archive_sheet' not in columns:
+            with self.conn:
+                self.conn.execute('ALTER TABLE sheets ADD COLUMN archive_sheet TEXT')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- consultas -----
+
+    def get(self, project_id):
+        row = self.conn.execute('SELECT * FROM sheets WHERE project_id = ?', (project_id,)).fetchone()
+        return dict(row) if row else None
+
+    def by_sheet(self, sheet_name):
+        row = self.conn.execute('SELECT * FROM sheets WHERE sheet_name = ?', (sheet_name,)).fetchone()
+        return dict(row) if row else None
+
+    def all(self):
+        return [dict(row) for row in self.conn.execute('SELECT * FROM sheets ORDER BY created_at')]
+
+    def sections(self, project_id):
+        """Secciones registradas de la hoja, en orden: [{key, firstRow, lastRow, fingerprint}]"""
+        rows = self.conn.execute(
+            'SELECT * FROM sections WHERE project_id = ? ORDER BY position', (project_id,)
+        )
+        return [
+            {'key': row['section_key'], 'firstRow': row['first_row'],
+             'lastRow': row['last_row'], 'fingerprint': row['fingerprint']}
+            for row in rows
+        ]
+
+    # ----- resolución de nombres -----
+
+    def resolve_sheet_name(self, project_id, base_name, existing_names=(), claimed=None):
+        """
+        Nombre de hoja para el proyecto.
+
+        - Si el proyecto ya tiene hoja en el libro, se reutiliza su nombre.
+        - Si el nombre lo usa otro proyecto conocido, se agrega un sufijo
+          ' (2)', ' (3)', ... respetando el máximo de 31 caracteres.
+        - Las hojas de dueño desconocido se reemplazan, como antes del índice.
+
+        Args:
+            project_id: Clave del proyecto (ver project_key)
+            base_name: Nombre de hoja sin desambiguar
+            existing_names: Hojas presentes en el libro
+            claimed: Nombres ya asignados en esta misma pasada (nombre -> proyecto),
+                para lotes que todavía no se registraron en el índice
+        """
+        claimed = claimed or {}
+        current = self.get(project_id)
+        if current and current['location'] is None and claimed.get(current['sheet_name'], project_id) == project_id:
+            return current['sheet_name']
+
+        existing_names = set(existing_names)
+        candidate = base_name[:MAX_SHEET_NAME]
+        suffix = 1
+        while self._taken_by_other(candidate, project_id, existing_names, claimed, suffix > 1):
+            suffix += 1
+            tail = f" ({suffix})"
+            candidate = base_name[:MAX_SHEET_NAME - len(tail)] + tail
+        return candidate
+
+    def _taken_by_other(self, sheet_name, project_id, existing_names, claimed, suffixed):
+        if sheet_name in claimed:
+            return claimed[sheet_name] != project_id
+        owner = self.by_sheet(sheet_name)
+        if owner is None or owner['location'] is not None:
+            # Un nombre con sufijo que ya existe en el libro es de una hoja
+            # desconocida: no se reemplaza, se busca otro
+            return suffixed and sheet_name in existing_names
+        if owner['project_id'] == project_id:
+            return False
+        return not owner['project_id'].startswith(UNKNOWN_PROJECT_PREFIX)
+
+    # ----- actualización -----
+
+    def record(self, project_id, sheet_name, content_hash=None, row_count=None, client_name=None,
+               sections=None):
+        """
+        Registra (o actualiza) la hoja de un proyecto recién exportada
+
+        Args:
+            sections: Secciones de la hoja [{key, firstRow, lastRow, fingerprint}];
+                sin ellas la próxima exportación reescribe la hoja completa
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            # El nombre pasa a este proyecto: liberar cualquier otra entrada que lo tenga
+            self.conn.execute(
+                'DELETE FROM sections WHERE project_id IN '
+                '(SELECT project_id FROM sheets WHERE sheet_name = ? AND project_id != ?)',
+                (sheet_name, project_id),
+            )
+            self.conn.execute(
+                'DELETE FROM sheets WHERE sheet_name = ? AND project_id != ?',
+                (sheet_name, project_id),
+            )
+            self.conn.execute('DELETE FROM sections WHERE project_id = ?', (project_id,))
+            self.conn.executemany(
+                'INSERT INTO sections (project_id, position, section_key, first_row, last_row, fingerprint) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (project_id, position, section['key'], section['firstRow'],
+                     section['lastRow'], section['fingerprint'])
+                    for position, section in enumerate(sections or ())
+                ],
+            )
+            self.conn.execute(
+                """
+                INSERT INTO sheets (project_id, sheet_name, created_at, updated_at,
+                                    content_hash, row_count, client_name, location, archive_sheet)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)
+                ON CONFLICT(project_id) DO UPDATE SET
+                    sheet_name = excluded.sheet_name,
+                    updated_at = excluded.updated_at,
+                    content_hash = excluded.content_hash,
+                    row_count = excluded.row_count,
+                    client_name = excluded.client_name,
+                    location = NULL,
+                    archive_sheet = NULL
+                """,
+                (project_id, sheet_name, now, now, content_hash, row_count, client_name),
+            )
+
+    def mark_archived(self, sheet_name, archive_name, archive_sheet=None):
+        """
+        Registra que la hoja se movió a un libro de archivo
+
+        Args:
+            sheet_name: Nombre de la hoja en el libro maestro
+            archive_name: Libro de archivo
+            archive_sheet: Nombre final de la hoja en el libro de archivo
+                (por defecto el mismo que en el maestro)
+        """
+        with self.conn:
+            self.conn.execute(
+                'UPDATE sheets SET location = ?, archive_sheet = ?, updated_at = ? '
+                'WHERE sheet_name = ? AND location IS NULL',
+                (archive_name, archive_sheet or sheet_name,
+                 datetime.now().isoformat(timespec='seconds'), sheet_name),
+            )
+
+    def remove(self, project_id):
+        with self.conn:
+            self.conn.execute('DELETE FROM sections WHERE project_id = ?', (project_id,))
+            self.conn.execute('DELETE FROM sheets WHERE project_id = ?', (project_id,))
+
+    def rebuild(self, excel_path):
+        """
+        Agrega al índice las hojas del libro que todavía no figuran (sin
+        proyecto conocido). Abre el libro en modo solo lectura.
+        """
+        import openpyxl
+
+        wb = openpyxl.load_workbook(excel_path, read_only=True)
+        try:
+            added = 0
+            for ws in wb.worksheets:
+                if self.by_sheet(ws.title):
+                    continue
+                self.record(f"{UNKNOWN_PROJECT_PREFIX}{ws.title}", ws.title, row_count=ws.max_row)
+                added += 1
+            return added
+        finally:
+            wb.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Consulta el índice de hojas del libro AQUAM sin abrirlo')
+    parser.add_argument('excel', help='Libro maestro')
+    parser.add_argument('--project', help='Buscar la hoja de un projectId')
+    parser.add_argument('--sheet', help='Buscar el proyecto de una hoja')
+    parser.add_argument('--list', action='store_true', help='Listar todo el índice')
+    parser.add_argument('--rebuild', action='store_true', help='Agregar las hojas del libro que no están en el índice')
+    args = parser.parse_args(argv)
+
+    with SheetIndex(args.excel) as index:
+        if args.rebuild:
+            print(f"✅ {index.rebuild(args.excel)} hojas agregadas al índice")
+            return 0
+        if args.project:
+            result = index.get(args.project)
+        elif args.sheet:
+            result = index.by_sheet(args.sheet)
+        else:
+            result = index.all()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0 if result else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
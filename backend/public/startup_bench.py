@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark del arranque en frío del exportador.
+
+Mide, en procesos nuevos, el tiempo de `import export_to_excel` según
+`python -X importtime` y el tiempo total de `--help` y de un `--plan`.
+Además verifica que importar el exportador no cargue los módulos pesados
+(openpyxl, PIL, ...), que solo deben importarse al primer uso. Sale con
+código 1 si la mediana del import supera el objetivo o si se cargó algún
+módulo pesado.
+
+Uso:
+    python3 startup_bench.py
+    python3 startup_bench.py --repeat 10 --target-ms 80 --top 15
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).parent
+SCRIPT = HERE / 'export_to_excel.py'
+
+# Objetivo para el import de export_to_excel (acumulado, sin el arranque del intérprete)
+DEFAULT_TARGET_MS = 100
+
+# Módulos que importar el exportador no debe cargar
+HEAVY_MODULES = ('openpyxl', 'PIL', 'concurrent.futures', 'socketserver', 'urllib.request', 'pyarrow')
+
+
+def parse_importtime(stderr):
+    """
+    Líneas de `-X importtime` como {módulo: (propio µs, acumulado µs)}.
+    Si un módulo aparece más de una vez se queda la primera.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_import():
+    """Import de export_to_excel en un proceso nuevo: (ms acumulados, módulos)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import export_to_excel'],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    modules = parse_importtime(proc.stderr)
+    return modules['export_to_excel'][1] / 1000, modules
+
+
+def heavy_modules_loaded():
+    """Módulos pesados presentes en sys.modules después de importar el exportador"""
+    code = (
+        'import json, sys, export_to_excel; '
+        f'print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))'
+    )
+    proc = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def measure_command(args):
+    """Tiempo total (ms) de `python export_to_excel.py <args>` en un proceso nuevo"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, str(SCRIPT), *args], cwd=HERE, capture_output=True, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def _median(values):
+    return round(statistics.median(values), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Arranque en frío de export_to_excel.py')
+    parser.add_argument('--repeat', type=int, default=5, help='Procesos por medición (se informa la mediana)')
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS,
+                        help='Máximo para el import de export_to_excel (ms)')
+    parser.add_argument('--top', type=int, default=10, help='Módulos más lentos a mostrar')
+    parser.add_argument('--json', action='store_true', help='Imprimir el resultado en JSON')
+    args = parser.parse_args(argv)
+
+    from bench_export import make_project
+
+    repeat = max(1, args.repeat)
+    imports = [measure_import() for _ in range(repeat)]
+    import_ms = [ms for ms, _ in imports]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json') as project_file:
+        json.dump(make_project(10), project_file)
+        project_file.flush()
+        help_ms = [measure_command(['--help']) for _ in range(repeat)]
+        plan_ms = [measure_command(['--input', project_file.name, '--plan']) for _ in range(repeat)]
+
+    heavy = heavy_modules_loaded()
+    # Módulos con más tiempo propio en la última medición
+    slowest = sorted(imports[-1][1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    result = {
+        'importMs': _median(import_ms),
+        'helpMs': _median(help_ms),
+        'planMs': _median(plan_ms),
+        'targetMs': args.target_ms,
+        'heavyModules': heavy,
+        'slowest': [{'module': name, 'selfMs': round(own / 1000, 1), 'cumulativeMs': round(total / 1000, 1)}
+                    for name, (own, total) in slowest],
+    }
+    ok = result['importMs'] <= args.target_ms and not heavy
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(f"import export_to_excel  {result['importMs']:>8.1f} ms (objetivo {args.target_ms:g} ms)")
+        print(f"--help                  {result['helpMs']:>8.1f} ms")
+        print(f"--plan                  {result['planMs']:>8.1f} ms")
+        print('Módulos más lentos (tiempo propio):')
+        for entry in result['slowest']:
+            print(f"    {entry['module']:<40} {entry['selfMs']:>7.1f} ms {entry['cumulativeMs']:>8.1f} ms")
+        if heavy:
+            print(f"⚠ Módulos pesados cargados al importar: {', '.join(heavy)}")
+        print(f"{'✅' if ok else '❌'} Arranque {'dentro' if ok else 'fuera'} del objetivo")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
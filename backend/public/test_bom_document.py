@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Pruebas del documento BOM: tipos de fila y campos tipados por sección.
+
+Uso:
+    python3 -m pytest test_bom_document.py
+    python3 -m unittest test_bom_document
+"""
+import io
+import json
+import unittest
+
+from bom_document import build_document, render_jsonl
+
+
+def sample_project():
+    """Proyecto con materiales, equipos, análisis eléctrico y mano de obra"""
+    return {
+        'projectId': 'TEST0001',
+        'projectName': 'Casa de prueba',
+        'clientName': 'Cliente Prueba',
+        'pool': {'name': 'Turquesa', 'length': 6.5, 'width': 3.1, 'shallowDepth': 1.0, 'deepDepth': 1.5,
+                 'volume': 25.3, 'waterMirrorArea': 20.15},
+        'excavation': {'length': 7.5, 'width': 4.1, 'depth': 1.6, 'volume': 49.2},
+        'supportBed': {'materials': {'cement': 5, 'sand': 2.1, 'mixed': 0}},
+        'sidewalk': {'materials': {'cement': 12, 'sand': 1.5, 'stone': 1.2, 'mesh': 4}},
+        'plumbing': {'items': [{'name': 'Codo 90°', 'diameter': '40mm', 'quantity': 8, 'type': 'PVC'}]},
+        'electrical': {
+            'watts': 1500, 'amps': 6.8,
+            'pump': {'power': '1 HP'},
+            'filter': {'diameter': '500mm'},
+            'consumptionBreakdown': [{'item': 'Bomba', 'watts': 1500}],
+        },
+        'electricalAnalysis': {
+            'totalPowerInstalled': 1500, 'totalPowerDemand': 1200, 'totalCurrent': 6.8,
+            'cable': {'section': 2.5, 'voltageDrop': 1.2, 'currentCapacity': 18},
+            'protection': {'breakerSize': 16, 'rcdSize': 25},
+            'loads': [{'name': 'Bomba de filtrado', 'power': 745.7, 'current': 0, 'powerFactor': 0.85,
+                       'efficiency': 0.8}],
+        },
+        'labor': {'roles': [{'role': 'Plomero', 'tasks': 3, 'hours': 12, 'cost': 45000}]},
+    }
+
+
+def jsonl_records(project_data):
+    output = io.StringIO()
+    render_jsonl(build_document(project_data), output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def find(records, section, description):
+    return next(record for record in records
+                if record['section'] == section and record['description'] == description)
+
+
+class BomRowTypesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.records = jsonl_records(sample_project())
+
+    def test_material_rows_are_items(self):
+        cement = find(self.records, 'supportBed', 'Cemento para la cama')
+        self.assertEqual(cement['kind'], 'item')
+        self.assertEqual(cement['quantity'], 5)
+        self.assertEqual(cement['unit'], 'bolsas')
+
+    def test_plumbing_type_is_part_of_spec(self):
+        elbow = find(self.records, 'plumbing', 'Codo 90°')
+        self.assertEqual(elbow['kind'], 'item')
+        self.assertEqual(elbow['spec'], '40mm PVC')
+        self.assertIsNone(elbow['unit'])
+        self.assertEqual(elbow['quantity'], 8)
+
+    def test_equipment_consumption_rows_are_measures(self):
+        pump = find(self.records, 'electrical', 'Bomba')
+        self.assertEqual((pump['kind'], pump['quantity'], pump['spec']), ('item', 1, '1 HP'))
+
+        consumption = find(self.records, 'electrical', '  Bomba')
+        self.assertEqual(consumption['kind'], 'measure')
+        self.assertEqual((consumption['quantity'], consumption['unit']), (1500, 'W'))
+        self.assertEqual(find(self.records, 'electrical', 'Amperaje')['kind'], 'measure')
+
+    def test_electrical_analysis_load_has_no_typed_fields(self):
+        load = find(self.records, 'electricalAnalysis', 'Bomba de filtrado')
+        self.assertEqual(load['kind'], 'note')
+        for field in ('spec', 'unit', 'quantity', 'value', 'observations'):
+            self.assertIsNone(load[field], field)
+
+        power = find(self.records, 'electricalAnalysis', 'Potencia instalada total')
+        self.assertEqual((power['kind'], power['quantity'], power['unit']), ('measure', 1500, 'W'))
+
+    def test_labor_rows_carry_cost_only(self):
+        plumber = find(self.records, 'labor', 'Plomero')
+        self.assertEqual(plumber['kind'], 'labor')
+        self.assertEqual((plumber['quantity'], plumber['unit']), (45000, '$'))
+        self.assertIsNone(plumber['spec'])
+
+    def test_only_material_sections_have_items(self):
+        sections = {record['section'] for record in self.records if record['kind'] == 'item'}
+        self.assertEqual(sections, {'supportBed', 'sidewalk', 'plumbing', 'electrical'})
+        excavation = find(self.records, 'excavation', 'Longitud de excavación')
+        self.assertEqual((excavation['kind'], excavation['unit']), ('measure', 'm'))
+
+
+class MaterialIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.records = jsonl_records(sample_project())
+
+    def test_material_rows_are_resolved(self):
+        self.assertEqual(find(self.records, 'electrical', 'Bomba')['materialId'], 'bomba')
+        self.assertEqual(find(self.records, 'plumbing', 'Codo 90°')['materialId'], 'codo-90')
+
+    def test_non_material_sections_stay_unresolved(self):
+        # 'Bomba de filtrado' y '  Bomba' coinciden con el catálogo, pero no son materiales
+        for section, description in (('electricalAnalysis', 'Bomba de filtrado'), ('electrical', '  Bomba'),
+                                     ('electrical', 'Amperaje'), ('labor', 'Plomero'),
+                                     ('excavation', 'Longitud de excavación')):
+            self.assertIsNone(find(self.records, section, description)['materialId'], description)
+
+        sections = {record['section'] for record in self.records if record['materialId']}
+        self.assertEqual(sections, {'supportBed', 'sidewalk', 'plumbing', 'electrical'})
+
+
+class DocumentMetricsTest(unittest.TestCase):
+
+    def test_metrics_cover_the_bom_formats(self):
+        import contextlib
+        from export_metrics import ExportMetrics
+        from export_to_excel import export_project_documents
+
+        metrics = ExportMetrics(mode='documents')
+        xlsx, csv_output = io.BytesIO(), io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_project_documents(sample_project(), {'xlsx': xlsx, 'csv': csv_output},
+                                     engine='fast', metrics=metrics)
+
+        result = metrics.to_dict()
+        document = build_document(sample_project())
+        self.assertTrue({'layout', 'save', 'bom'} <= set(result['phasesMs']))
+        self.assertEqual(result['rows'], len(document.header_rows) + len(document.rows))
+        self.assertEqual(result['bytes'], len(xlsx.getvalue()))
+
+
+if __name__ == '__main__':
+    unittest.main()
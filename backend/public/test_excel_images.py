@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché de miniaturas: la memoria queda acotada y las
+miniaturas descartadas se vuelven a leer de disco.
+
+Uso:
+    python3 -m pytest test_excel_images.py
+    python3 -m unittest test_excel_images
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from excel_images import ThumbnailCache
+
+
+class ThumbnailMemoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.images = []
+        for n, color in enumerate(('red', 'green', 'blue')):
+            path = os.path.join(self.tmp.name, f'equipo-{n}.png')
+            Image.new('RGB', (200, 200), color).save(path)
+            self.images.append(path)
+
+    def cache(self, max_bytes):
+        return ThumbnailCache(cache_dir=os.path.join(self.tmp.name, 'cache'), max_bytes=max_bytes)
+
+    def test_memory_is_bounded_by_bytes(self):
+        size = len(self.cache(0).get(self.images[0], 80, 80))
+        cache = self.cache(size * 5 // 2)
+        for path in self.images:
+            cache.get(path, 80, 80)
+
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['evictions']), (2, 1))
+        self.assertLessEqual(stats['bytes'], size * 5 // 2)
+
+    def test_least_recently_used_is_evicted_first(self):
+        size = len(self.cache(0).get(self.images[0], 80, 80))
+        cache = self.cache(size * 5 // 2)
+        first, second, third = self.images
+        cache.get(first, 80, 80)
+        cache.get(second, 80, 80)
+        cache.get(first, 80, 80)   # la primera pasa a ser la más usada
+        cache.get(third, 80, 80)   # descarta la segunda
+
+        # Sin la copia en disco, solo la segunda tiene que volver a generarse
+        shutil.rmtree(cache.cache_dir)
+        misses = cache.misses
+        cache.get(first, 80, 80)
+        self.assertEqual(cache.misses, misses)
+        cache.get(second, 80, 80)
+        self.assertEqual(cache.misses, misses + 1)
+
+    def test_evicted_thumbnails_come_back_from_disk(self):
+        cache = self.cache(0)
+        data = cache.get(self.images[0], 80, 80)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+        self.assertEqual(cache.get(self.images[0], 80, 80), data)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
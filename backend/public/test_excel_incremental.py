@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la actualización incremental: reescribir solo las secciones que
+cambiaron deja la misma hoja que reescribirla completa.
+
+Uso:
+    python3 -m pytest test_excel_incremental.py
+    python3 -m unittest test_excel_incremental
+"""
+import contextlib
+import copy
+import io
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from check_writer_parity import compare, sheet_snapshot
+from export_to_excel import export_project_to_excel
+from test_bom_document import sample_project
+
+PUMP_IMAGE = '/public/pool-images/acquam-page-03.png'
+FILTER_IMAGE = '/public/pool-images/acquam-page-04.png'
+
+
+def project_with_images():
+    data = sample_project()
+    data['electrical']['pump']['imageUrl'] = PUMP_IMAGE
+    data['electrical']['filter']['imageUrl'] = FILTER_IMAGE
+    return data
+
+
+class IncrementalUpdateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def master(self, name, project):
+        """Libro maestro con la plantilla y la hoja del proyecto ya exportada"""
+        path = os.path.join(self.tmp.name, name)
+        wb = openpyxl.Workbook()
+        wb.active.title = 'CALCULOS DE MATERIALES'
+        wb.save(path)
+        self.export(path, project)
+        return path
+
+    def export(self, path, project, incremental=False):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sheet_name = export_project_to_excel(path, project, incremental=incremental)
+        return sheet_name, output.getvalue()
+
+    def assert_same_as_full_rewrite(self, before, after):
+        incremental = self.master('incremental.xlsx', before)
+        full = self.master('completo.xlsx', before)
+
+        sheet_name, output = self.export(incremental, after, incremental=True)
+        self.assertIn('Secciones actualizadas', output)
+        self.export(full, after)
+
+        self.assertEqual(compare(sheet_snapshot(full, sheet_name), sheet_snapshot(incremental, sheet_name)), [])
+        return output
+
+    def test_changed_quantity(self):
+        after = project_with_images()
+        after['sidewalk']['materials']['cement'] = 20
+        output = self.assert_same_as_full_rewrite(project_with_images(), after)
+        self.assertIn('sidewalk', output)
+        self.assertNotIn('plumbing', output)
+
+    def test_growing_section_shifts_rows_and_images(self):
+        after = project_with_images()
+        after['plumbing']['items'] += [
+            {'name': 'Tee', 'diameter': '50mm', 'quantity': 4, 'type': 'PVC'},
+            {'name': 'Válvula esférica', 'diameter': '50mm', 'quantity': 2, 'type': 'PVC'},
+        ]
+        self.assert_same_as_full_rewrite(project_with_images(), after)
+
+    def test_shrinking_section_shifts_rows_and_images(self):
+        before = project_with_images()
+        before['plumbing']['items'] = before['plumbing']['items'] * 3
+        self.assert_same_as_full_rewrite(before, project_with_images())
+
+    def test_unchanged_project_rewrites_nothing(self):
+        output = self.assert_same_as_full_rewrite(project_with_images(), copy.deepcopy(project_with_images()))
+        self.assertIn('Secciones actualizadas: ninguna', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
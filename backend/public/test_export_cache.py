@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché de exportaciones: un proyecto sin cambios se sirve de
+la caché y la clave cambia con la plantilla y con las imágenes.
+
+Uso:
+    python3 -m pytest test_export_cache.py
+    python3 -m unittest test_export_cache
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import export_cache
+from export_cache import ExportCache, export_cache_key
+from export_to_excel import export_project_workbook
+from test_bom_document import sample_project
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+class ExportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = ExportCache(cache_dir=self.tmp.name)
+
+    def export(self, project):
+        output = io.BytesIO()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_project_workbook(output, project, export_cache=self.cache)
+        return output.getvalue()
+
+    def test_unchanged_project_is_a_hit(self):
+        first = self.export(sample_project())
+        second = self.export(sample_project())
+
+        self.assertEqual(first, second)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+    def test_changed_project_is_a_miss(self):
+        self.export(sample_project())
+        self.export(dict(sample_project(), clientName='Otro cliente'))
+        self.assertEqual((self.cache.misses, self.cache.hits), (2, 0))
+
+    def test_template_change_invalidates(self):
+        key = export_cache_key(sample_project())
+        with mock.patch.object(export_cache, 'template_version', return_value='otra-plantilla'):
+            self.assertNotEqual(export_cache_key(sample_project()), key)
+
+    def test_engine_and_streaming_are_part_of_the_key(self):
+        keys = {export_cache_key(sample_project(), streaming, engine)
+                for streaming in (False, True) for engine in ('openpyxl', 'fast')}
+        self.assertEqual(len(keys), 4)
+
+    def test_image_change_invalidates(self):
+        with tempfile.NamedTemporaryFile(dir=BACKEND_DIR, suffix='.png', delete=False) as image:
+            image.write(b'foto 1')
+        self.addCleanup(os.unlink, image.name)
+
+        project = sample_project()
+        project['equipment'] = [{'name': 'Bomba', 'imageUrl': f"/{Path(image.name).name}"}]
+        key = export_cache_key(project)
+        self.assertEqual(export_cache_key(project), key)
+
+        Path(image.name).write_bytes(b'foto 2 (reemplazada)')
+        self.assertNotEqual(export_cache_key(project), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Pruebas del protocolo del worker (--worker): las líneas mal formadas
+responden con error y el worker sigue atendiendo trabajos.
+
+Uso:
+    python3 -m pytest test_export_worker.py
+    python3 -m unittest test_export_worker
+"""
+import json
+import unittest
+
+from export_to_excel import ExportWorker
+from test_bom_document import sample_project
+
+
+class WorkerProtocolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = ExportWorker()
+
+    def test_invalid_json(self):
+        response = self.worker.handle_line('{"cmd": ')
+        self.assertFalse(response['ok'])
+        self.assertIn('JSON inválido', response['error'])
+
+    def test_json_that_is_not_an_object(self):
+        for line in ('[]', '1', '"export"', 'null'):
+            with self.subTest(line=line):
+                response = self.worker.handle_line(line)
+                self.assertFalse(response['ok'])
+                self.assertIn('objeto JSON', response['error'])
+
+    def test_unknown_command(self):
+        response = self.worker.handle_line('{"id": "a", "cmd": "borrar"}')
+        self.assertEqual(response, {'id': 'a', 'cmd': 'borrar', 'ok': False,
+                                    'error': 'Comando desconocido: borrar'})
+
+    def test_failing_plan_answers_with_error(self):
+        response = self.worker.handle_line('{"id": "p", "cmd": "plan", "project": {"pool": "Coral"}}')
+        self.assertEqual((response['id'], response['ok']), ('p', False))
+        self.assertEqual(self.worker.errors, 1)
+
+    def test_worker_keeps_serving_after_errors(self):
+        for line in ('{', '[]', '{"cmd": "plan", "project": {"pool": "Coral"}}'):
+            self.worker.handle_line(line)
+
+        response = self.worker.handle_line('{"id": "ok", "cmd": "ping"}')
+        self.assertTrue(response['ok'])
+
+        plan = self.worker.handle_line(json.dumps({'cmd': 'plan', 'project': sample_project()}))
+        self.assertTrue(plan['ok'])
+        self.assertTrue(plan['plan'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la auditoría de proyectos contra su modelo.
+
+Uso:
+    python3 -m pytest test_fleet_audit.py
+    python3 -m unittest test_fleet_audit
+"""
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from fleet_audit import discrepancies, model_pairs, run_audit
+from material_catalog import default_catalog
+from sheet_diff import LabelIndex
+from workbook_scanner import close_workbooks
+
+
+def build_workbook(path):
+    """Modelo TURQUESA (etiquetas en A, cantidades en B) y un proyecto (B -> E)"""
+    wb = openpyxl.Workbook()
+    model = wb.active
+    model.title = 'CALCULOS DE MATERIALES TURQUESA'
+    for row, (label, value) in enumerate([
+        ('BOLSAS DE CEMENTO', None), ('CEMENTO', 8), ('TEE', 10), ('CODO 90º', 50),
+        ('GEOTEXTIL O GEOMEMBRANA 400MICRONES X METRO', 8),
+    ], start=1):
+        model.cell(row=row, column=1, value=label)
+        model.cell(row=row, column=2, value=value)
+
+    project = wb.create_sheet('TURQUESA (6,5X3,1) INES Y PABLO')
+    for row, (label, value) in enumerate([
+        ('Cemento 50 kg bolsas instalacion', 8), ('Tee', 10), ('Codo 90°', 30),
+        ('Nylon de 200 Geotextil x m', 8), ('Nylon de 200 micr o Geotextil x m', 8),
+    ], start=1):
+        project.cell(row=row, column=2, value=label)
+        project.cell(row=row, column=5, value=value)
+    wb.save(path)
+
+
+class FleetAuditTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'libro.xlsx')
+        build_workbook(path)
+        self.index = LabelIndex(path)
+        self.index.refresh(workers=1)
+        self.report = run_audit(self.index, catalog=default_catalog())
+        self.rows = {row['material']: row for row in discrepancies(self.index)}
+
+    def tearDown(self):
+        self.index.close()
+        close_workbooks()
+        self.tmp.cleanup()
+
+    def test_project_is_paired_with_its_model(self):
+        self.assertEqual(model_pairs(['CALCULOS DE MATERIALES TURQUESA', 'Turquesa - Ana'])[0],
+                         {'Turquesa - Ana': 'CALCULOS DE MATERIALES TURQUESA'})
+
+    def test_colliding_labels_are_not_dropped(self):
+        cement = self.rows['id:cemento']
+        self.assertEqual((cement['expected'], cement['actual'], cement['discrepant']), (8, 8, False))
+
+        geotextile = self.rows['id:geotextil']
+        self.assertEqual(geotextile['projectLabel'], 'Nylon de 200 Geotextil x m + Nylon de 200 micr o Geotextil x m')
+        self.assertEqual((geotextile['actual'], geotextile['delta']), (16, 8))
+        self.assertTrue(geotextile['merged'] and geotextile['discrepant'])
+
+    def test_ranking_lists_discrepant_materials(self):
+        materials = {row['material'] for row in self.report['materials']}
+        self.assertEqual(materials, {'id:codo-90', 'id:geotextil'})
+
+
+if __name__ == '__main__':
+    unittest.main()
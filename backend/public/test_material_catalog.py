@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Pruebas del catálogo de materiales: coincidencias exactas y difusas, y
+etiquetas ambiguas (empates) que quedan sin resolver.
+
+Uso:
+    python3 -m pytest test_material_catalog.py
+    python3 -m unittest test_material_catalog
+"""
+import unittest
+
+from material_catalog import MaterialCatalog, default_catalog
+
+UNIONS = {
+    'union-doble': ('Unión doble', ()),
+    'union-simple': ('Unión simple', ()),
+}
+
+
+class MaterialCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = default_catalog()
+
+    def test_exact_and_fuzzy_matches(self):
+        exact = self.catalog.match('LLAVE ESFERICA')
+        self.assertEqual((exact.id, exact.method, exact.score), ('valvula-esferica', 'exact', 1.0))
+
+        fuzzy = self.catalog.match('Codo 45 grados PVC')
+        self.assertEqual((fuzzy.id, fuzzy.method), ('codo-45', 'fuzzy'))
+        self.assertEqual(self.catalog.resolve('Tee 40'), 'tee')
+
+    def test_measures_must_agree(self):
+        self.assertEqual(self.catalog.resolve('Codo 90'), 'codo-90')
+        self.assertEqual(self.catalog.resolve('Codo 45'), 'codo-45')
+
+    def test_ties_are_ambiguous(self):
+        # 'Codo 90 45' contiene por igual a 'Codo 90°' y a 'Codo 45°'
+        self.assertIsNone(self.catalog.match('Codo 90 45'))
+
+        catalog = MaterialCatalog(UNIONS)
+        self.assertIsNone(catalog.resolve('Unión doble simple'))
+        self.assertEqual(catalog.resolve('Unión doble PVC'), 'union-doble')
+
+    def test_below_threshold_is_unresolved(self):
+        self.assertIsNone(self.catalog.resolve('Codo'))
+        self.assertIsNone(self.catalog.resolve('Total'))
+        self.assertIsNone(self.catalog.resolve(None))
+
+    def test_synonyms_break_ties(self):
+        catalog = MaterialCatalog(UNIONS, synonyms={'Unión doble simple': 'union-simple'})
+        self.assertEqual(catalog.resolve('Unión doble simple'), 'union-simple')
+        self.assertNotEqual(catalog.version, MaterialCatalog(UNIONS).version)
+
+    def test_unknown_synonym_target(self):
+        with self.assertRaises(ValueError):
+            MaterialCatalog(UNIONS, synonyms={'Unión': 'union-triple'})
+
+    def test_resolve_many(self):
+        self.assertEqual(self.catalog.resolve_many(['CEMENTO', 'BOLSAS DE CEMENTO', 'Codo']),
+                         {'CEMENTO': 'cemento', 'BOLSAS DE CEMENTO': 'cemento', 'Codo': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
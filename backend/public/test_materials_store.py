@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la extracción de materiales de las hojas de proyecto.
+
+Uso:
+    python3 -m pytest test_materials_store.py
+    python3 -m unittest test_materials_store
+"""
+import os
+import tempfile
+import unittest
+
+from excel_layout import project_sheet_name
+from export_to_excel import export_project_workbook
+from materials_store import MaterialsStore, extract_sheet
+from test_bom_document import sample_project
+from workbook_scanner import close_workbooks
+
+
+class ExtractSheetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        project_data = sample_project()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'proyecto.xlsx')
+            export_project_workbook(path, project_data)
+            cls.header, cls.items = extract_sheet(path, project_sheet_name(project_data))
+            close_workbooks()
+
+    def descriptions(self, section):
+        return [item['description'] for item in self.items if item['section'] == section]
+
+    def test_only_material_sections_are_extracted(self):
+        sections = {item['section'] for item in self.items}
+        self.assertEqual(sections, {'CAMA DE APOYO', 'VEREDA', 'PLOMERÍA Y MATERIALES PVC',
+                                    'INSTALACIÓN ELÉCTRICA Y EQUIPOS'})
+
+    def test_equipment_measures_are_skipped(self):
+        self.assertEqual(self.descriptions('INSTALACIÓN ELÉCTRICA Y EQUIPOS'), ['Bomba', 'Filtro'])
+        pump = self.items[[item['description'] for item in self.items].index('Bomba')]
+        self.assertEqual((pump['quantity'], pump['spec']), (1, '1 HP'))
+
+    def test_plumbing_spec_joins_diameter_and_type(self):
+        elbow = next(item for item in self.items if item['description'] == 'Codo 90°')
+        self.assertEqual((elbow['spec'], elbow['quantity']), ('40mm PVC', 8))
+
+    def test_no_labor_or_analysis_rows(self):
+        descriptions = {item['description'] for item in self.items}
+        for label in ('Plomero', 'TOTAL MANO DE OBRA', 'Bomba de filtrado', 'Corriente total',
+                      'Amperaje', 'Longitud de excavación'):
+            self.assertNotIn(label, descriptions)
+
+
+class StoreMaterialIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'proyecto.xlsx')
+        export_project_workbook(path, sample_project())
+        self.store = MaterialsStore(path)
+        self.store.refresh(workers=1)
+
+    def tearDown(self):
+        self.store.close()
+        close_workbooks()
+        self.tmp.cleanup()
+
+    def test_only_material_sections_are_resolved(self):
+        resolved = {row['description']: row['material_id'] for row in self.store.records()}
+        self.assertEqual(resolved['Bomba'], 'bomba')
+        # Las cargas del análisis eléctrico y el desglose de consumo también dicen 'Bomba'
+        self.assertNotIn('Bomba de filtrado', resolved)
+        self.assertNotIn('  Bomba', resolved)
+
+    def test_pump_total_counts_units_only(self):
+        totals = self.store.totals(material='bomba')
+        self.assertEqual([(row['material'], row['total']) for row in totals], [('bomba', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Pruebas del lote en paralelo: un proyecto con errores no arruina el libro.
+
+Uso:
+    python3 -m pytest test_parallel_export.py
+    python3 -m unittest test_parallel_export
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from export_to_excel import export_projects_to_excel
+from test_bom_document import sample_project
+
+
+def project(pool, client, **extra):
+    data = sample_project()
+    data.update(projectId=f"{pool}-{client}", clientName=client, pool=dict(data['pool'], name=pool), **extra)
+    return data
+
+
+class ParallelBatchTest(unittest.TestCase):
+
+    def export(self, projects):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'lote.xlsx')
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = export_projects_to_excel(None, projects, output=path, workers=2)
+            return results, openpyxl.load_workbook(path).sheetnames
+
+    def test_bad_projects_do_not_abort_the_batch(self):
+        projects = [
+            project('Turquesa', 'Ana'),
+            dict(project('Coral', 'Luis'), pool='Coral'),              # nombre de hoja imposible de calcular
+            project('Jade', 'Pérez / Hijos [Obra*2]'),                 # caracteres prohibidos: se sanean
+            project('Zafiro', 'Marta', plumbing={'items': 5}),         # falla al construir la hoja
+            project('Ópalo', 'Beto'),
+        ]
+        results, sheetnames = self.export(projects)
+
+        self.assertEqual([result['ok'] for result in results], [True, False, True, False, True])
+        self.assertIn('error', results[1])
+        self.assertIn('error', results[3])
+        self.assertNotIn('sheetName', results[1])
+        self.assertEqual(sheetnames, ['Turquesa - Ana', 'Jade - Pérez - Hijos -Obra-2-', 'Ópalo - Beto'])
+
+    def test_names_differing_in_case_are_one_sheet(self):
+        results, sheetnames = self.export([project('Turquesa', 'Ana'), project('TURQUESA', 'ANA')])
+        self.assertEqual(sheetnames, ['TURQUESA - ANA'])
+        self.assertEqual([result['sheetName'] for result in results], ['TURQUESA - ANA', 'TURQUESA - ANA'])
+
+    def test_batch_without_valid_projects_fails(self):
+        with self.assertRaises(ValueError):
+            self.export([dict(project('Coral', 'Luis'), pool='Coral')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la comparación de hojas por etiqueta.
+
+Uso:
+    python3 -m pytest test_sheet_diff.py
+    python3 -m unittest test_sheet_diff
+"""
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import openpyxl
+
+from material_catalog import default_catalog, normalize_label
+from sheet_diff import (
+    DIFFERENT, EQUAL, NOT_NUMERIC, ONLY_LEFT, ONLY_RIGHT, LabelIndex, diff_items, diff_sheets,
+    index_sheet, label_columns, material_key, parse_quantity,
+)
+
+
+def items(*rows):
+    """Ítems como los de LabelIndex.items: (etiqueta, valor); las repetidas llevan '#n'"""
+    seen, result = {}, []
+    for position, (label, value) in enumerate(rows):
+        key = normalize_label(label)
+        seen[key] = seen.get(key, 0) + 1
+        result.append({
+            'key': key if seen[key] == 1 else f"{key}#{seen[key]}",
+            'label': label, 'row': position + 1, 'labelCol': 1, 'valueCol': 2,
+            'value': value, 'raw': None if value is None else str(value),
+        })
+    return result
+
+
+def by_key(diff):
+    return {entry['key']: entry for entry in diff}
+
+
+class MaterialKeyTest(unittest.TestCase):
+
+    def test_ids_and_labels_have_separate_namespaces(self):
+        catalog = default_catalog()
+        self.assertEqual(material_key('llave esferica', catalog=catalog), 'id:valvula-esferica')
+        self.assertEqual(material_key('total', catalog=catalog), 'label:total')
+        # Una etiqueta sin resolver que se escribe igual que un id no lo alcanza
+        self.assertEqual(material_key('cemento-cama'), 'label:cemento-cama')
+
+
+class CollisionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = default_catalog()
+
+    def test_cement_labels_are_merged_not_dropped(self):
+        # En CALCULOS DE MATERIALES TURQUESA 'BOLSAS DE CEMENTO' es el título
+        # y la cantidad está en 'CEMENTO'; las dos resuelven a 'cemento'
+        left = items(('BOLSAS DE CEMENTO', None), ('CEMENTO', 8.0))
+        right = items(('Cemento 50 kg bolsas instalacion', 8.0))
+        cement = by_key(diff_items(left, right, catalog=self.catalog))['id:cemento']
+        self.assertEqual(cement['leftLabel'], 'BOLSAS DE CEMENTO + CEMENTO')
+        self.assertEqual((cement['left'], cement['right'], cement['status']), (8.0, 8.0, EQUAL))
+        self.assertTrue(cement['merged'])
+
+    def test_merged_values_are_summed(self):
+        left = items(('GEOTEXTIL O GEOMEMBRANA 400MICRONES X METRO', 8.0))
+        right = items(('Nylon de 200 Geotextil x m', 8.0), ('Nylon de 200 micr o Geotextil x m', 8.0))
+        geotextile = by_key(diff_items(left, right, catalog=self.catalog))['id:geotextil']
+        self.assertEqual((geotextile['right'], geotextile['status'], geotextile['delta']), (16.0, DIFFERENT, 8.0))
+
+    def test_repeated_labels_pair_by_order(self):
+        left = items(('MALLA', 1.0), ('MALLA', 4.0))
+        right = items(('Malla sima 6 mm', 1.0), ('Malla sima 6 mm', 4.0))
+        diff = by_key(diff_items(left, right, catalog=self.catalog))
+        self.assertEqual([diff[key]['status'] for key in ('id:malla-sima', 'id:malla-sima#2')], [EQUAL, EQUAL])
+        self.assertFalse(diff['id:malla-sima']['merged'])
+
+    def test_every_item_is_reported(self):
+        left = items(('BOLSAS DE CEMENTO', None), ('CEMENTO', 8.0), ('TOTAL', 3.0))
+        diff = diff_items(left, [], catalog=self.catalog)
+        self.assertEqual([entry['status'] for entry in diff], [ONLY_LEFT, ONLY_LEFT])
+        self.assertEqual(diff[0]['leftLabel'], 'BOLSAS DE CEMENTO + CEMENTO')
+
+
+def project_sheet(*items):
+    """Filas como las de una hoja de proyecto: etiqueta en B, marca en C, cantidad en E"""
+    return [[None, label, 'PVC', None, value] for label, value in items]
+
+
+def save_workbook(path, **sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+class LabelIndexTest(unittest.TestCase):
+
+    LEFT = project_sheet(('Codo 90°', 8), ('Tee', 4), ('Arena', '2,5 m³'), ('Pintura', 'a definir'))
+    RIGHT = project_sheet(('Codo 90°', 9), ('Tee', 4), ('Arena', 2.6), ('Pintura', 'a definir'), ('Cable', 10))
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'maestro.xlsx')
+        save_workbook(self.path, A=self.LEFT, B=self.RIGHT)
+        self.index = LabelIndex(self.path)
+        self.addCleanup(self.index.close)
+
+    def test_parse_quantity(self):
+        for raw, value in (('2.45', 2.45), ('6,5', 6.5), ('15.73 m', 15.73), ('$29.91', 29.91), (3, 3.0)):
+            self.assertEqual(parse_quantity(raw), value, raw)
+        for raw in ('Codo 90°', True, None, date(2025, 5, 10)):
+            self.assertIsNone(parse_quantity(raw), raw)
+
+    def test_label_and_value_columns_are_detected(self):
+        columns, items = index_sheet(self.path, 'A')
+        # La marca (C) queda entre la etiqueta y la cantidad: no es una etiqueta
+        self.assertEqual(columns, {2: 5})
+        self.assertEqual([(item['label'], item['value']) for item in items],
+                         [('Codo 90°', 8.0), ('Tee', 4.0), ('Arena', 2.5), ('Pintura', None)])
+
+    def test_refresh_only_reindexes_changed_sheets(self):
+        self.assertEqual(sorted(self.index.refresh(workers=1)), ['A', 'B'])
+        self.assertEqual(self.index.refresh(workers=1), [])
+
+        save_workbook(self.path, A=self.LEFT, B=self.RIGHT[:-1])
+        self.assertEqual(self.index.refresh(workers=1), ['B'])
+        self.assertEqual([sheet['labels'] for sheet in self.index.sheets()], [4, 4])
+        with self.assertRaises(KeyError):
+            self.index.items('C')
+
+    def test_diff_with_tolerance(self):
+        self.index.refresh(workers=1)
+        strict = diff_sheets(self.index, 'A', 'B')
+        statuses = {entry['leftLabel'] or entry['rightLabel']: entry['status'] for entry in strict['items']}
+        self.assertEqual(statuses, {'Codo 90°': DIFFERENT, 'Tee': EQUAL, 'Arena': DIFFERENT,
+                                    'Pintura': EQUAL, 'Cable': ONLY_RIGHT})
+        self.assertEqual(strict['summary'], {DIFFERENT: 2, EQUAL: 2, ONLY_RIGHT: 1})
+
+        tolerant = diff_sheets(self.index, 'A', 'B', rel_tol=0.05)
+        arena = next(entry for entry in tolerant['items'] if entry['leftLabel'] == 'Arena')
+        self.assertEqual((arena['status'], arena['delta'], arena['relDelta']), (EQUAL, 0.1, 0.04))
+
+    def test_text_values_are_compared_as_text(self):
+        diff = diff_items(items(('Pintura', None)), [dict(items(('Pintura', None))[0], raw='blanca')])
+        self.assertEqual(diff[0]['status'], NOT_NUMERIC)
+
+    def test_label_columns_need_distinct_texts(self):
+        rows = [[(row, 1, 'm³'), (row, 2, 1)] for row in range(1, 5)]
+        self.assertEqual(label_columns(rows), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Pruebas del índice de hojas: registro, resolución de nombres repetidos o
+truncados y reconstrucción desde el libro.
+
+Uso:
+    python3 -m pytest test_sheet_index.py
+    python3 -m unittest test_sheet_index
+"""
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from sheet_index import UNKNOWN_PROJECT_PREFIX, SheetIndex, project_key
+
+LONG_NAME = 'Turquesa - Constructora del Litoral'  # 35 caracteres
+
+
+class SheetIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.excel_path = os.path.join(tmp.name, 'maestro.xlsx')
+        self.index = SheetIndex(self.excel_path)
+        self.addCleanup(self.index.close)
+
+    def test_record_and_lookup(self):
+        sections = [
+            {'key': 'excavation', 'firstRow': 10, 'lastRow': 14, 'fingerprint': 'a'},
+            {'key': 'plumbing', 'firstRow': 16, 'lastRow': 20, 'fingerprint': 'b'},
+        ]
+        self.index.record('P1', 'Turquesa - Ana', content_hash='h1', row_count=20,
+                          client_name='Ana', sections=sections)
+
+        entry = self.index.get('P1')
+        self.assertEqual((entry['sheet_name'], entry['row_count'], entry['location']), ('Turquesa - Ana', 20, None))
+        self.assertEqual(self.index.by_sheet('Turquesa - Ana')['project_id'], 'P1')
+        self.assertEqual(self.index.sections('P1'), sections)
+
+        # Volver a registrar reemplaza las secciones
+        self.index.record('P1', 'Turquesa - Ana', row_count=12, sections=sections[:1])
+        self.assertEqual(self.index.sections('P1'), sections[:1])
+        self.assertEqual(self.index.get('P1')['created_at'], entry['created_at'])
+
+    def test_project_keeps_its_sheet(self):
+        self.index.record('P1', 'Turquesa - Ana')
+        self.assertEqual(self.index.resolve_sheet_name('P1', 'Turquesa - Ana (Pilar)'), 'Turquesa - Ana')
+
+    def test_truncated_names_do_not_collide(self):
+        self.index.record('P1', LONG_NAME[:31])
+        name = self.index.resolve_sheet_name('P2', LONG_NAME, [LONG_NAME[:31]])
+        self.assertEqual(name, LONG_NAME[:27] + ' (2)')
+        self.assertLessEqual(len(name), 31)
+
+        self.index.record('P2', name)
+        self.assertEqual(self.index.resolve_sheet_name('P3', LONG_NAME, [LONG_NAME[:31], name]),
+                         LONG_NAME[:27] + ' (3)')
+
+    def test_unknown_sheets_are_replaced(self):
+        self.index.record(f'{UNKNOWN_PROJECT_PREFIX}Turquesa - Ana', 'Turquesa - Ana')
+        self.assertEqual(self.index.resolve_sheet_name('P1', 'Turquesa - Ana', ['Turquesa - Ana']),
+                         'Turquesa - Ana')
+
+        # Al registrarse, el proyecto se queda con la hoja
+        self.index.record('P1', 'Turquesa - Ana')
+        self.assertEqual(self.index.by_sheet('Turquesa - Ana')['project_id'], 'P1')
+        self.assertEqual(len(self.index.all()), 1)
+
+    def test_batch_claims(self):
+        claimed = {'Turquesa - Ana': 'P1'}
+        self.assertEqual(self.index.resolve_sheet_name('P2', 'Turquesa - Ana', claimed=claimed),
+                         'Turquesa - Ana (2)')
+
+    def test_archived_sheet_frees_its_name(self):
+        self.index.record('P1', 'Turquesa - Ana')
+        self.index.mark_archived('Turquesa - Ana', 'AQUAM-2025-05.xlsx')
+        self.assertEqual(self.index.resolve_sheet_name('P2', 'Turquesa - Ana'), 'Turquesa - Ana')
+        self.assertEqual(self.index.get('P1')['archive_sheet'], 'Turquesa - Ana')
+
+    def test_rebuild_adds_unknown_sheets_once(self):
+        wb = openpyxl.Workbook()
+        wb.active.title = 'Turquesa - Ana'
+        wb.create_sheet('Jade - Beto')
+        wb.save(self.excel_path)
+        self.index.record('P1', 'Turquesa - Ana')
+
+        self.assertEqual(self.index.rebuild(self.excel_path), 1)
+        self.assertEqual(self.index.rebuild(self.excel_path), 0)
+        self.assertEqual(self.index.by_sheet('Jade - Beto')['project_id'], f'{UNKNOWN_PROJECT_PREFIX}Jade - Beto')
+
+    def test_project_key(self):
+        self.assertEqual(project_key({'projectId': 42}, 'Hoja'), '42')
+        self.assertEqual(project_key({}, 'Hoja'), f'{UNKNOWN_PROJECT_PREFIX}Hoja')
+
+
+if __name__ == '__main__':
+    unittest.main()
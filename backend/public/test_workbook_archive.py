@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pruebas del archivo de hojas viejas del libro maestro.
+
+Uso:
+    python3 -m pytest test_workbook_archive.py
+    python3 -m unittest test_workbook_archive
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import openpyxl
+
+from sheet_index import SheetIndex
+from workbook_archive import (
+    archive_sheets, archive_workbook, find_archived_sheet, load_manifest, unique_sheet_title,
+)
+
+NOW = datetime(2025, 10, 1)
+
+
+def master_workbook(client):
+    """Libro maestro con una plantilla y una hoja de proyecto de mayo de 2025"""
+    wb = openpyxl.Workbook()
+    wb.active.title = 'CALCULOS DE MATERIALES'
+    ws = wb.create_sheet('Turquesa - Juan Perez')
+    ws['C4'] = '2025-05-10'
+    ws['C5'] = client
+    return wb
+
+
+class ArchiveSheetsTest(unittest.TestCase):
+
+    def test_same_title_is_not_replaced(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            first = archive_sheets(master_workbook('Juan Perez'), 'maestro.xlsx', archive_dir, now=NOW)
+            second = archive_sheets(master_workbook('Juan Perez (Pilar)'), 'maestro.xlsx', archive_dir, now=NOW)
+
+            self.assertEqual(first[0]['archiveSheet'], 'Turquesa - Juan Perez')
+            self.assertEqual(second[0]['archiveSheet'], 'Turquesa - Juan Perez (2)')
+
+            archive_wb = openpyxl.load_workbook(Path(archive_dir) / 'AQUAM-2025-05.xlsx')
+            self.assertEqual(archive_wb.sheetnames, ['Turquesa - Juan Perez', 'Turquesa - Juan Perez (2)'])
+            self.assertEqual(archive_wb['Turquesa - Juan Perez']['C5'].value, 'Juan Perez')
+            self.assertEqual(archive_wb['Turquesa - Juan Perez (2)']['C5'].value, 'Juan Perez (Pilar)')
+
+            self.assertEqual(len(load_manifest(archive_dir)['entries']), 2)
+            latest = find_archived_sheet('Turquesa - Juan Perez', archive_dir)
+            self.assertEqual(latest['archiveSheet'], 'Turquesa - Juan Perez (2)')
+
+    def test_dry_run_reports_final_title(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            archive_sheets(master_workbook('Juan Perez'), 'maestro.xlsx', archive_dir, now=NOW)
+            entries = archive_sheets(master_workbook('Otro'), 'maestro.xlsx', archive_dir, dry_run=True, now=NOW)
+            self.assertEqual(entries[0]['archiveSheet'], 'Turquesa - Juan Perez (2)')
+            self.assertEqual(len(load_manifest(archive_dir)['entries']), 1)
+
+    def test_index_records_final_archive_title(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            archive_dir = Path(tmp) / 'archivo'
+            master = Path(tmp) / 'maestro.xlsx'
+            archive_sheets(master_workbook('Juan Perez'), master, archive_dir, now=NOW)
+
+            master_workbook('Juan Perez (Pilar)').save(master)
+            with SheetIndex(master) as index:
+                index.record('PILAR', 'Turquesa - Juan Perez')
+            entries = archive_workbook(master, archive_dir)
+
+            self.assertEqual(entries[0]['archiveSheet'], 'Turquesa - Juan Perez (2)')
+            with SheetIndex(master) as index:
+                sheet = index.get('PILAR')
+            self.assertEqual((sheet['location'], sheet['archive_sheet']),
+                             ('AQUAM-2025-05.xlsx', 'Turquesa - Juan Perez (2)'))
+
+    def test_unique_title_respects_max_length(self):
+        base = 'X' * 31
+        self.assertEqual(unique_sheet_title(base, [base]), 'X' * 27 + ' (2)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Pruebas del escaneo de libros en modo solo lectura: resumen por hoja,
+firmas de cambios y libros o carpetas con errores.
+
+Uso:
+    python3 -m pytest test_workbook_scanner.py
+    python3 -m unittest test_workbook_scanner
+"""
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import openpyxl
+
+from workbook_scanner import find_workbooks, scan_paths, scan_workbook, sheet_names, sheet_signatures
+
+
+def save_workbook(path, **sheets):
+    """Libro con una hoja por argumento; cada hoja es una lista de filas (listas de valores)"""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+class ScanWorkbookTest(unittest.TestCase):
+
+    OBRA = [
+        [None, 'Materiales de PVC - Medida 40 mm'],
+        [],
+        [None, 'Codo 90°', 30, 'u'],
+        [None, '   ', None],
+        [None, 'Fecha', date(2025, 5, 10)],
+    ]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, 'maestro.xlsx')
+        save_workbook(self.path, Obra=self.OBRA, Vacia=[])
+
+    def test_sheet_summary(self):
+        obra, vacia = scan_workbook(self.path, workers=1, preview_rows=1)
+
+        self.assertEqual(obra['sheet'], 'Obra')
+        self.assertEqual((obra['usedRange'], obra['nonEmptyRows'], obra['nonEmptyCells']), ('B1:D5', 3, 6))
+        self.assertEqual(obra['headings'], [{'row': 1, 'text': 'Materiales de PVC - Medida 40 mm'}])
+        self.assertEqual([(label['label'], label['values']) for label in obra['labels']],
+                         [('Codo 90°', [30, 'u']), ('Fecha', ['2025-05-10T00:00:00'])])
+        self.assertEqual(len(obra['preview']), 1)
+
+        self.assertEqual((vacia['usedRange'], vacia['nonEmptyRows']), (None, 0))
+
+    def test_selected_and_missing_sheets(self):
+        self.assertEqual([s['sheet'] for s in scan_workbook(self.path, sheets=['Vacia'], workers=1)], ['Vacia'])
+        with self.assertRaises(KeyError):
+            scan_workbook(self.path, sheets=['Otra'], workers=1)
+
+    def test_parallel_scan_keeps_order(self):
+        self.assertEqual(scan_workbook(self.path, workers=1)[0]['labels'],
+                         scan_workbook(self.path, workers=2)[0]['labels'])
+        self.assertEqual(sheet_names(self.path), ['Obra', 'Vacia'])
+
+    def test_signatures_change_only_for_modified_sheets(self):
+        before = sheet_signatures(self.path)
+        save_workbook(self.path, Obra=self.OBRA, Vacia=[[5]])
+        after = sheet_signatures(self.path)
+
+        self.assertEqual(before['Obra'], after['Obra'])
+        self.assertNotEqual(before['Vacia'], after['Vacia'])
+
+    def test_folders_and_broken_workbooks(self):
+        archive = os.path.join(self.dir, 'archivo')
+        os.mkdir(archive)
+        save_workbook(os.path.join(archive, 'AQUAM-2025-05.xlsx'), Vieja=[[None, 'Codo', 1]])
+        save_workbook(os.path.join(archive, '~$AQUAM-2025-05.xlsx'), Bloqueo=[])
+        with open(os.path.join(archive, 'roto.xlsx'), 'wb') as f:
+            f.write(b'no es un zip')
+
+        self.assertEqual([path.name for path in find_workbooks([archive])], ['AQUAM-2025-05.xlsx', 'roto.xlsx'])
+        results = scan_paths([archive, self.path], sheet_filter=lambda name: name != 'Vacia', workers=1)
+
+        self.assertEqual([r['file'].endswith('roto.xlsx') for r in results if 'error' in r], [True])
+        self.assertEqual([r['sheet'] for r in results if 'sheet' in r], ['Vieja', 'Obra'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pruebas de paridad entre los motores de escritura openpyxl y fast.
+
+Uso:
+    python3 -m pytest test_writer_parity.py
+    python3 -m unittest test_writer_parity
+"""
+import io
+import tempfile
+import unittest
+
+import openpyxl
+
+import xlsx_fast_writer
+from check_writer_parity import EDGE_CASES, check_project
+from excel_layout import project_sheet_name
+from test_bom_document import sample_project
+
+
+class WriterParityTest(unittest.TestCase):
+
+    def test_sample_project(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            self.assertEqual(check_project(sample_project(), workdir), [])
+
+    def test_edge_cases(self):
+        for name, build in EDGE_CASES.items():
+            with self.subTest(name), tempfile.TemporaryDirectory() as workdir:
+                self.assertEqual(check_project(build(), workdir), [])
+
+
+class SheetNameTest(unittest.TestCase):
+
+    def test_project_sheet_name_is_sanitized(self):
+        name = project_sheet_name({'pool': {'name': 'Turquesa'}, 'clientName': 'Pérez / Hijos [Obra*2]: ¿Fase?'})
+        self.assertEqual(name, 'Turquesa - Pérez - Hijos -Obra-')
+
+    def test_engines_reject_the_same_titles(self):
+        for title in ('Obra 1/2', 'A' * 32, ''):
+            with self.subTest(title):
+                with self.assertRaises(ValueError):
+                    xlsx_fast_writer.write_workbook(io.BytesIO(), title, [], lambda *_: None, 100, 75)
+        # openpyxl rechaza los caracteres prohibidos (por la longitud solo advierte)
+        with self.assertRaises(ValueError):
+            openpyxl.Workbook().create_sheet('Obra 1/2')
+
+    def test_duplicate_titles_ignore_case(self):
+        sheets = [('Turquesa - Juan', b'', []), ('TURQUESA - JUAN', b'', [])]
+        with self.assertRaises(ValueError):
+            xlsx_fast_writer.write_sheets(io.BytesIO(), iter(sheets), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
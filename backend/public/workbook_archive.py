@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Archivo del libro maestro AQUAM.
+
+Mueve las hojas de proyectos viejos a libros de archivo separados por mes o
+por cliente, para que el libro maestro conserve solo las hojas de cálculo
+plantilla (CALCULOS DE MATERIALES ...) y el trabajo reciente. Cada hoja
+archivada queda registrada en un manifiesto JSON junto a los archivos.
+
+Uso:
+    python3 workbook_archive.py "CALCULADORA MATERIALES AQUAM.xlsx" --days 90
+    python3 workbook_archive.py "CALCULADORA MATERIALES AQUAM.xlsx" --days 90 --shard-by client --dry-run
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from copy import copy
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import openpyxl
+
+from excel_images import save_workbook, shared_image
+from sheet_index import MAX_SHEET_NAME, SheetIndex
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).parent / 'archive'
+MANIFEST_NAME = 'manifest.json'
+
+# Hojas plantilla con los cálculos por modelo: nunca se archivan
+TEMPLATE_SHEET_PATTERN = re.compile(r'^CALCULOS?\b', re.IGNORECASE)
+
+# Celdas del encabezado de las hojas de proyecto
+DATE_CELL = 'C4'
+CLIENT_CELL = 'C5'
+
+
+def is_template_sheet(sheet_name):
+    return bool(TEMPLATE_SHEET_PATTERN.match(sheet_name.strip()))
+
+
+def sheet_date(ws):
+    """Fecha de exportación de la hoja (celda C4) o None si no tiene"""
+    value = ws[DATE_CELL].value
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.strip()[:10], '%Y-%m-%d')
+        except ValueError:
+            return None
+    return None
+
+
+def sheet_client(ws):
+    value = ws[CLIENT_CELL].value
+    return str(value).strip() if value else 'Sin cliente'
+
+
+def shard_key(ws, shard_by):
+    """Nombre del libro de archivo que corresponde a la hoja"""
+    if shard_by == 'client':
+        client = unicodedata.normalize('NFKD', sheet_client(ws)).encode('ascii', 'ignore').decode()
+        return 'cliente-' + (re.sub(r'[^A-Za-z0-9]+', '-', client).strip('-').lower() or 'sin-cliente')
+    return sheet_date(ws).strftime('%Y-%m')
+
+
+def select_sheets_to_archive(wb, keep_days, now=None):
+    """
+    Hojas de proyecto con fecha anterior al límite. Las plantillas, las
+    hojas sin fecha en C4 y las que tienen fórmulas hacia otras hojas se
+    conservan siempre en el libro maestro.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=keep_days)
+    selected = []
+    for ws in wb.worksheets:
+        if is_template_sheet(ws.title):
+            continue
+        date = sheet_date(ws)
+        if date is not None and date < cutoff and not _references_other_sheets(ws):
+            selected.append(ws)
+    return selected
+
+
+def _references_other_sheets(ws):
+    """True si alguna fórmula apunta a otra hoja (moverla rompería la referencia)"""
+    for row in ws.iter_rows(values_only=True):
+        for value in row:
+            if isinstance(value, str) and value.startswith('=') and '!' in value:
+                return True
+    return False
+
+
+def unique_sheet_title(base_name, existing_names):
+    """
+    Nombre de hoja libre en un libro: si ya existe se agrega un sufijo
+    ' (2)', ' (3)', ... respetando el máximo de 31 caracteres (como
+    SheetIndex.resolve_sheet_name)
+    """
+    existing_names = set(existing_names)
+    candidate = base_name[:MAX_SHEET_NAME]
+    suffix = 1
+    while candidate in existing_names:
+        suffix += 1
+        tail = f" ({suffix})"
+        candidate = base_name[:MAX_SHEET_NAME - len(tail)] + tail
+    return candidate
+
+
+def copy_sheet(source, target_wb, title=None):
+    """
+    Copia una hoja a otro libro: valores, estilos, celdas combinadas, anchos,
+    altos de fila e imágenes. Si el libro ya tiene una hoja con ese nombre
+    (un proyecto archivado antes con el mismo cliente y modelo) no se
+    reemplaza: la copia recibe un sufijo ' (2)', ' (3)', ...
+
+    Returns:
+        La hoja nueva en `target_wb` (su `title` es el nombre final)
+    """
+    title = unique_sheet_title(title or source.title, target_wb.sheetnames)
+    target = target_wb.create_sheet(title)
+
+    for row in source.iter_rows():
+        for cell in row:
+            if cell.value is None and not cell.has_style:
+                continue
+            new_cell = target.cell(row=cell.row, column=cell.column, value=cell.value)
+            if cell.has_style:
+                new_cell.font = copy(cell.font)
+                new_cell.fill = copy(cell.fill)
+                new_cell.border = copy(cell.border)
+                new_cell.alignment = copy(cell.alignment)
+                new_cell.protection = copy(cell.protection)
+                new_cell.number_format = cell.number_format
+
+    for merged in source.merged_cells.ranges:
+        target.merge_cells(str(merged))
+
+    for key, dim in source.column_dimensions.items():
+        if dim.width:
+            target.column_dimensions[key].width = dim.width
+    for key, dim in source.row_dimensions.items():
+        if dim.height:
+            target.row_dimensions[key].height = dim.height
+
+    for img in source._images:
+        new_img = shared_image(img._data())
+        new_img.width, new_img.height = img.width, img.height
+        new_img.anchor = img.anchor
+        target.add_image(new_img)
+
+    return target
+
+
+def load_manifest(archive_dir):
+    path = Path(archive_dir) / MANIFEST_NAME
+    if path.exists():
+        return json.loads(path.read_text(encoding='utf-8'))
+    return {'entries': []}
+
+
+def save_manifest(archive_dir, manifest):
+    path = Path(archive_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def find_archived_sheet(sheet_name, archive_dir=DEFAULT_ARCHIVE_DIR):
+    """
+    Última ubicación registrada en el manifiesto para una hoja archivada:
+    'archive' es el libro y 'archiveSheet' el nombre de la hoja en ese libro
+    (puede tener sufijo ' (2)' si el nombre ya estaba ocupado)
+    """
+    matches = [e for e in load_manifest(archive_dir)['entries'] if e['sheet'] == sheet_name]
+    return matches[-1] if matches else None
+
+
+def archive_sheets(wb, source_path, archive_dir=DEFAULT_ARCHIVE_DIR, keep_days=90,
+                   shard_by='month', dry_run=False, now=None):
+    """
+    Mueve a libros de archivo las hojas de proyecto más viejas que `keep_days`.
+
+    Las hojas se quitan de `wb` pero el libro maestro no se guarda: eso queda a
+    cargo de quien llama (así la exportación guarda una sola vez).
+
+    Args:
+        wb: Libro maestro ya cargado
+        source_path: Ruta del libro maestro (se registra en el manifiesto)
+        archive_dir: Carpeta de los libros de archivo y el manifiesto
+        keep_days: Antigüedad máxima (según la fecha en C4) que queda en el maestro
+        shard_by: 'month' (un libro por mes de exportación) o 'client'
+        dry_run: Solo informar qué se movería
+
+    Returns:
+        Lista de entradas del manifiesto (una por hoja archivada)
+    """
+    archive_dir = Path(archive_dir)
+    now = now or datetime.now()
+
+    shards = {}
+    for ws in select_sheets_to_archive(wb, keep_days, now):
+        shards.setdefault(shard_key(ws, shard_by), []).append(ws)
+
+    entries = []
+    for shard, sheets in sorted(shards.items()):
+        archive_path = archive_dir / f"AQUAM-{shard}.xlsx"
+        archive_wb = None if dry_run else _open_archive(archive_path)
+        taken = set(archive_wb.sheetnames if archive_wb is not None else _archive_sheetnames(archive_path))
+        for ws in sheets:
+            # Nombre final en el libro de archivo, sin pisar hojas archivadas antes
+            title = unique_sheet_title(ws.title, taken)
+            taken.add(title)
+            if archive_wb is not None:
+                copy_sheet(ws, archive_wb, title)
+            entries.append({
+                'sheet': ws.title,
+                'archive': archive_path.name,
+                'archiveSheet': title,
+                'shard': shard,
+                'date': sheet_date(ws).strftime('%Y-%m-%d'),
+                'client': sheet_client(ws),
+                'source': Path(source_path).name,
+                'archivedAt': now.isoformat(timespec='seconds'),
+            })
+
+        if dry_run:
+            continue
+
+        save_workbook(archive_wb, archive_path)
+
+        # Quitar del maestro solo después de guardar el archivo
+        for ws in sheets:
+            del wb[ws.title]
+
+    if entries and not dry_run:
+        manifest = load_manifest(archive_dir)
+        manifest['entries'].extend(entries)
+        save_manifest(archive_dir, manifest)
+
+    return entries
+
+
+def _open_archive(archive_path):
+    """Libro de archivo existente, o uno vacío (sin la hoja por defecto)"""
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    if archive_path.exists():
+        return openpyxl.load_workbook(archive_path)
+    archive_wb = openpyxl.Workbook()
+    archive_wb.remove(archive_wb.active)
+    return archive_wb
+
+
+def _archive_sheetnames(archive_path):
+    """Hojas de un libro de archivo (vacío si todavía no existe), sin cargarlo completo"""
+    if not archive_path.exists():
+        return []
+    archive_wb = openpyxl.load_workbook(archive_path, read_only=True)
+    try:
+        return archive_wb.sheetnames
+    finally:
+        archive_wb.close()
+
+
+def archive_workbook(excel_path, archive_dir=DEFAULT_ARCHIVE_DIR, keep_days=90,
+                     shard_by='month', dry_run=False):
+    """Comando de mantenimiento: archiva y guarda el libro maestro"""
+    wb = openpyxl.load_workbook(excel_path)
+    entries = archive_sheets(wb, excel_path, archive_dir, keep_days, shard_by, dry_run)
+    if entries and not dry_run:
+        save_workbook(wb, excel_path)
+        with SheetIndex(excel_path) as index:
+            for entry in entries:
+                index.mark_archived(entry['sheet'], entry['archive'], entry['archiveSheet'])
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Archiva hojas de proyectos viejos del libro AQUAM')
+    parser.add_argument('excel', help='Libro maestro')
+    parser.add_argument('--archive-dir', default=str(DEFAULT_ARCHIVE_DIR))
+    parser.add_argument('--days', type=int, default=90, help='Conservar en el maestro las hojas de los últimos N días')
+    parser.add_argument('--shard-by', choices=['month', 'client'], default='month')
+    parser.add_argument('--dry-run', action='store_true', help='Mostrar qué se archivaría sin modificar nada')
+    args = parser.parse_args(argv)
+
+    entries = archive_workbook(args.excel, args.archive_dir, args.days, args.shard_by, args.dry_run)
+    for entry in entries:
+        target = entry['archive'] if entry['archiveSheet'] == entry['sheet'] else f"{entry['archive']} [{entry['archiveSheet']}]"
+        print(f"{'→' if not args.dry_run else '·'} {entry['sheet']} ({entry['date']}) -> {target}")
+    action = 'se archivarían' if args.dry_run else 'archivadas'
+    print(f"✅ {len(entries)} hojas {action}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Escaneo de libros Excel en modo solo lectura.
+
+Recorre cada hoja con `read_only=True` e `iter_rows`, fila por fila y con
+memoria constante (no arma el modelo de objetos del libro). Devuelve un
+resumen por hoja: dimensiones, filas y celdas con datos, encabezados de
+sección y etiquetas detectadas con sus valores.
+
+Varias hojas, o todos los libros de una carpeta (por ejemplo
+`backend/public/archive/`), se reparten en un pool de procesos: cada
+proceso abre el libro por su cuenta y escanea una hoja.
+
+Uso desde Python:
+    from workbook_scanner import scan_workbook, scan_paths
+    summaries = scan_workbook('CALCULADORA MATERIALES AQUAM.xlsx', workers=4)
+    summaries = scan_paths(['archive/'], workers=4)
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+WORKBOOK_SUFFIXES = ('.xlsx', '.xlsm')
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Procesos del pool (0 = uno por núcleo)
+DEFAULT_WORKERS = int(os.environ.get('EXCEL_SCAN_WORKERS', 0))
+
+
+def sheet_names(path):
+    """
+    Nombres de las hojas del libro, leídos de xl/workbook.xml sin abrirlo
+    con openpyxl (no carga estilos ni textos compartidos)
+    """
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    return [sheet.get('name') for sheet in root.iter(f'{NS_MAIN}sheet')]
+
+
+def sheet_parts(path):
+    """
+    Firma de cada hoja sin descomprimirla: {nombre: (CRC32, tamaño)} de su
+    XML dentro del zip, más la clave None con la firma de los textos
+    compartidos (None si el libro usa textos en línea). Si la firma de una
+    hoja y la de los textos compartidos no cambian, su contenido tampoco.
+    """
+    with zipfile.ZipFile(path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{NS_PKG_REL}Relationship')}
+        infos = {info.filename: info for info in archive.infolist()}
+
+    def signature(part):
+        info = infos.get(part)
+        return (info.CRC, info.file_size) if info else None
+
+    parts = {None: signature('xl/sharedStrings.xml')}
+    for sheet in workbook.iter(f'{NS_MAIN}sheet'):
+        target = targets.get(sheet.get(f'{NS_REL}id'), '')
+        # Destino absoluto (/xl/worksheets/...) o relativo a xl/
+        part = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+        parts[sheet.get('name')] = signature(part)
+    return parts
+
+
+def sheet_signatures(path):
+    """
+    {nombre de hoja: firma} con la firma de sheet_parts como texto, para
+    guardarla en un índice y detectar qué hojas cambiaron
+    """
+    parts = sheet_parts(path)
+    shared = parts.pop(None)
+    return {name: json.dumps([signature, shared]) for name, signature in parts.items()}
+
+
+def workbook_version(path):
+    """Versión del archivo (mtime y tamaño): si no cambió, ninguna hoja cambió"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def find_workbooks(paths):
+    """
+    Libros a escanear: los archivos indicados y los .xlsx/.xlsm de cada
+    carpeta (recursivo, sin los archivos de bloqueo `~$` de Excel)
+    """
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(sorted(
+                candidate for candidate in path.rglob('*')
+                if candidate.suffix.lower() in WORKBOOK_SUFFIXES and not candidate.name.startswith('~$')
+            ))
+        else:
+            found.append(path)
+    return found
+
+
+def scan_sheet(path, sheet_name, preview_rows=0):
+    """
+    Escanea una hoja en modo solo lectura
+
+    Args:
+        path: Ruta del libro
+        sheet_name: Nombre de la hoja
+        preview_rows: Primeras filas con datos a incluir completas en
+            `preview` (0 = ninguna)
+
+    Returns:
+        Diccionario con el resumen de la hoja (ver _SheetSummary.to_dict)
+    """
+    started = time.perf_counter()
+    summary = _SheetSummary(preview_rows)
+    with open_sheet(path, sheet_name) as ws:
+        for values in iter_values(ws):
+            summary.add_row(values)
+        declared = _declared_dimensions(ws)
+    return {
+        'file': str(path),
+        'sheet': sheet_name,
+        'declaredDimensions': declared,
+        **summary.to_dict(),
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+
+# Último libro abierto en este proceso: (ruta, mtime, tamaño) -> libro. Abrir
+# el libro (estilos, relaciones) cuesta mucho más que recorrer una hoja, y
+# las tareas de un mismo libro llegan seguidas a cada proceso
+_open_workbook = {}
+
+
+@contextlib.contextmanager
+def open_sheet(path, sheet_name):
+    """
+    Hoja de un libro abierto en modo solo lectura (con valores, no fórmulas).
+    El libro queda abierto para la próxima hoja hasta que se pide otro libro
+    o se llama a close_workbooks().
+    """
+    import openpyxl
+
+    stat = os.stat(path)
+    key = (str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+    wb = _open_workbook.get(key)
+    if wb is None:
+        close_workbooks()
+        wb = _open_workbook[key] = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    yield wb[sheet_name]
+
+
+def close_workbooks():
+    """Cierra el libro que open_sheet mantiene abierto (en modo solo lectura retiene el zip)"""
+    for wb in _open_workbook.values():
+        wb.close()
+    _open_workbook.clear()
+
+
+def iter_values(ws):
+    """
+    Filas con datos de una hoja de solo lectura, como listas de
+    (fila, columna, valor) sin las celdas vacías ni los textos en blanco
+    """
+    for row in ws.iter_rows():
+        values = [
+            (cell.row, cell.column, cell.value) for cell in row
+            if getattr(cell, 'value', None) is not None and str(cell.value).strip()
+        ]
+        if values:
+            yield values
+
+
+def _declared_dimensions(ws):
+    """Rango que declara la hoja (<dimension>), o None si no lo declara"""
+    try:
+        return ws.calculate_dimension()
+    except ValueError:
+        return None
+
+
+class _SheetSummary:
+    """
+    Acumula el resumen de una hoja fila por fila.
+
+    Una fila cuya única celda con datos es un texto se toma como encabezado de
+    sección ('Materiales de PVC - Medida 40 mm'); si la primera celda con
+    datos es un texto seguido de otros valores, es una etiqueta con esos
+    valores ('Codo 90°' → [30]).
+    """
+
+    def __init__(self, preview_rows=0):
+        self.preview_rows = preview_rows
+        self.rows = 0
+        self.cells = 0
+        self.min_row = self.min_col = None
+        self.max_row = self.max_col = 0
+        self.headings = []
+        self.labels = []
+        self.preview = []
+
+    def add_row(self, values):
+        row_idx = values[0][0]
+        self.rows += 1
+        self.cells += len(values)
+        self.min_row = row_idx if self.min_row is None else self.min_row
+        self.max_row = row_idx
+        self.min_col = min(values[0][1], self.min_col or values[0][1])
+        self.max_col = max(values[-1][1], self.max_col)
+
+        _, col_idx, first = values[0]
+        if isinstance(first, str):
+            if len(values) == 1:
+                self.headings.append({'row': row_idx, 'text': first.strip()})
+            else:
+                self.labels.append({
+                    'row': row_idx,
+                    'col': col_idx,
+                    'label': first.strip(),
+                    'values': [_plain(value) for _, _, value in values[1:]],
+                })
+
+        if len(self.preview) < self.preview_rows:
+            self.preview.append({
+                'row': row_idx,
+                'data': [{'col': col, 'value': _plain(value)} for _, col, value in values],
+            })
+
+    def to_dict(self):
+        from openpyxl.utils import get_column_letter
+
+        used = None
+        if self.rows:
+            used = (f"{get_column_letter(self.min_col)}{self.min_row}:"
+                    f"{get_column_letter(self.max_col)}{self.max_row}")
+        result = {
+            'usedRange': used,
+            'maxRow': self.max_row,
+            'maxColumn': self.max_col,
+            'nonEmptyRows': self.rows,
+            'nonEmptyCells': self.cells,
+            'headings': self.headings,
+            'labels': self.labels,
+        }
+        if self.preview_rows:
+            result['preview'] = self.preview
+        return result
+
+
+def _plain(value):
+    """Valor serializable a JSON (fechas como texto ISO)"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _scan_task(task):
+    """Escaneo de una hoja en un proceso del pool; los errores quedan en el resumen"""
+    path, sheet_name, preview_rows = task
+    try:
+        return scan_sheet(path, sheet_name, preview_rows)
+    except Exception as e:
+        return {'file': str(path), 'sheet': sheet_name, 'error': str(e)}
+
+
+def _init_worker():
+    # Los procesos del pool no escriben en stdout (la salida puede ser JSON)
+    sys.stdout = sys.stderr
+
+
+def worker_count(workers=None):
+    """Cantidad efectiva de procesos: `workers`, o uno por núcleo si es 0/None"""
+    return workers or DEFAULT_WORKERS or os.cpu_count() or 1
+
+
+def scan_tasks(tasks, workers=None, function=_scan_task):
+    """
+    Escanea hojas en paralelo
+
+    Args:
+        tasks: Lista de (ruta del libro, nombre de hoja, filas de vista previa)
+        workers: Procesos del pool (ver worker_count); con 1, o con una sola
+            hoja, se escanea en este proceso
+        function: Función de nivel de módulo que procesa una tarea (por
+            defecto el resumen de scan_sheet)
+
+    Returns:
+        Lista de resultados en el mismo orden que `tasks`
+    """
+    workers = min(worker_count(workers), len(tasks))
+    if workers <= 1:
+        try:
+            return [function(task) for task in tasks]
+        finally:
+            close_workbooks()
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(function, tasks))
+
+
+def scan_workbook(path, sheets=None, workers=None, preview_rows=0):
+    """
+    Escanea las hojas de un libro
+
+    Args:
+        path: Ruta del libro
+        sheets: Nombres de las hojas a escanear (None = todas)
+        workers: Procesos del pool (ver scan_tasks)
+        preview_rows: Filas de vista previa por hoja
+
+    Returns:
+        Lista de resúmenes por hoja
+    """
+    names = sheet_names(path)
+    if sheets is not None:
+        missing = [name for name in sheets if name not in names]
+        if missing:
+            raise KeyError(f"Hojas no encontradas en {path}: {', '.join(missing)}")
+        names = [name for name in names if name in sheets]
+    return scan_tasks([(str(path), name, preview_rows) for name in names], workers)
+
+
+def scan_paths(paths, sheet_filter=None, workers=None, preview_rows=0):
+    """
+    Escanea varios libros y carpetas en un único pool
+
+    Args:
+        paths: Archivos .xlsx o carpetas (ver find_workbooks)
+        sheet_filter: Función nombre de hoja -> bool para elegir hojas (None = todas)
+        workers: Procesos del pool (ver scan_tasks)
+        preview_rows: Filas de vista previa por hoja
+
+    Returns:
+        Lista de resúmenes por hoja; un libro que no se puede abrir deja una
+        entrada con 'error' y sin 'sheet'
+    """
+    tasks = []
+    failed = []
+    for path in find_workbooks(paths):
+        try:
+            names = sheet_names(path)
+        except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+            failed.append({'file': str(path), 'error': str(e)})
+            continue
+        tasks.extend((str(path), name, preview_rows) for name in names
+                     if sheet_filter is None or sheet_filter(name))
+    return failed + scan_tasks(tasks, workers)
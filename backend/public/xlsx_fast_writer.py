@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Escritor rápido de la hoja de proyecto.
+
+Genera el paquete .xlsx (XML de la hoja, estilos, dibujos e imágenes)
+directamente con zipfile, sin construir el modelo de objetos de openpyxl.
+Las filas se escriben en el XML a medida que se generan, así que la memoria
+no depende del tamaño del proyecto.
+
+write_sheets arma un libro de varias hojas a partir de hojas ya generadas
+con render_sheet (por ejemplo en otros procesos, ver parallel_export.py).
+
+Produce las mismas celdas, estilos con nombre, anchos de columna, altos de
+fila e imágenes que el escritor openpyxl; check_writer_parity.py compara
+ambos motores celda por celda.
+"""
+import datetime
+import functools
+import hashlib
+import importlib.util
+import math
+import re
+import sys
+from io import BytesIO
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from excel_layout import COLUMNS, COLUMN_WIDTHS, validate_sheet_name
+from excel_styles import STYLE_DEFINITIONS
+
+# Índice de estilo (cellXfs) de cada clave: 0 es el estilo por defecto
+STYLE_INDEX = {key: position + 1 for position, key in enumerate(STYLE_DEFINITIONS)}
+
+# 1 píxel = 9525 EMU (unidad de los dibujos de Office)
+EMU_PER_PIXEL = 9525
+
+# Caracteres de control que no se pueden guardar en XML
+ILLEGAL_CHARACTERS = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+
+def write_workbook(output, sheet_name, rows, load_image, image_size, image_row_height):
+    """
+    Escribe un libro con una sola hoja.
+
+    Args:
+        output: Ruta o stream binario
+        sheet_name: Nombre de la hoja
+        rows: Iterable de SheetRow en orden de fila
+        load_image: Función(url, celda) -> bytes PNG de la miniatura, o None
+        image_size: Ancho y alto de las imágenes en píxeles
+        image_row_height: Alto de las filas con imagen
+
+    Returns:
+        Cantidad de imágenes insertadas
+
+    Raises:
+        ValueError: nombre de hoja inválido (ver excel_layout.validate_sheet_name)
+    """
+    validate_sheet_name(sheet_name)
+    images = []  # (fila, bytes)
+    with ZipFile(output, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as stream:
+            _write_sheet(stream, rows, load_image, image_row_height, images)
+
+        media = {}  # hash -> nombre del archivo en xl/media
+        _write_drawing(archive, 1, images, image_size, media)
+        _write_package(archive, [(sheet_name, bool(images))])
+
+    return len(images)
+
+
+def render_sheet(rows, load_image, image_row_height):
+    """
+    Genera el XML de una hoja sin escribir el libro
+
+    Returns:
+        (XML de la hoja en bytes, lista de (fila, bytes PNG) de sus imágenes)
+    """
+    images = []
+    stream = BytesIO()
+    _write_sheet(stream, rows, load_image, image_row_height, images)
+    return stream.getvalue(), images
+
+
+def write_sheets(output, sheets, image_size):
+    """
+    Escribe un libro con varias hojas ya generadas por render_sheet.
+
+    Las hojas se vuelcan al archivo a medida que llegan; las imágenes
+    repetidas (en la misma hoja o en otras) se guardan una sola vez.
+
+    Args:
+        output: Ruta o stream binario
+        sheets: Iterable de (nombre, XML de la hoja, imágenes)
+        image_size: Ancho y alto de las imágenes en píxeles
+
+    Returns:
+        Cantidad de hojas escritas
+
+    Raises:
+        ValueError: nombre de hoja inválido o repetido (sin distinguir
+            mayúsculas, como Excel); quien llama valida los nombres antes
+            para no dejar un libro a medio escribir
+    """
+    written = []  # (nombre, tiene imágenes)
+    media = {}
+    with ZipFile(output, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+        for sheet_name, sheet_xml, images in sheets:
+            validate_sheet_name(sheet_name)
+            if sheet_name.lower() in {name.lower() for name, _ in written}:
+                raise ValueError(f"Nombre de hoja repetido: {sheet_name!r}")
+            number = len(written) + 1
+            archive.writestr(f'xl/worksheets/sheet{number}.xml', sheet_xml)
+            _write_drawing(archive, number, images, image_size, media)
+            written.append((sheet_name, bool(images)))
+        _write_package(archive, written)
+    return len(written)
+
+
+def _write_drawing(archive, number, images, image_size, media):
+    """Dibujo de la hoja `number` con sus imágenes (sin imágenes no escribe nada)"""
+    if not images:
+        return
+
+    targets = []
+    for _, data in images:
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        if digest not in media:
+            media[digest] = f"image_{digest}.{_image_extension(data)}"
+            archive.writestr(f"xl/media/{media[digest]}", data)
+        targets.append(media[digest])
+
+    archive.writestr(f'xl/worksheets/_rels/sheet{number}.xml.rels', _relationships([
+        ('rId1', f'{NS_REL}/drawing', f'../drawings/drawing{number}.xml'),
+    ]))
+    archive.writestr(f'xl/drawings/drawing{number}.xml', _drawing_xml(images, image_size))
+    archive.writestr(f'xl/drawings/_rels/drawing{number}.xml.rels', _relationships([
+        (f'rId{n}', f'{NS_REL}/image', f"../media/{target}")
+        for n, target in enumerate(targets, start=1)
+    ]))
+
+
+def _image_extension(data):
+    """Extensión de la imagen según su firma (las miniaturas son JPEG o PNG)"""
+    return 'jpeg' if data[:3] == b'\xff\xd8\xff' else 'png'
+
+
+def _write_package(archive, sheets):
+    """Partes comunes del libro: tipos, relaciones, propiedades, estilos y tema"""
+    archive.writestr('[Content_Types].xml', _content_types(sheets))
+    archive.writestr('_rels/.rels', _relationships([
+        ('rId1', f'{NS_REL}/officeDocument', 'xl/workbook.xml'),
+        ('rId2', 'http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties',
+         'docProps/core.xml'),
+    ]))
+    archive.writestr('docProps/core.xml', _core_xml())
+    archive.writestr('xl/workbook.xml', _workbook_xml([name for name, _ in sheets]))
+    count = len(sheets)
+    archive.writestr('xl/_rels/workbook.xml.rels', _relationships([
+        *((f'rId{n}', f'{NS_REL}/worksheet', f'worksheets/sheet{n}.xml') for n in range(1, count + 1)),
+        (f'rId{count + 1}', f'{NS_REL}/styles', 'styles.xml'),
+        (f'rId{count + 2}', f'{NS_REL}/theme', 'theme/theme1.xml'),
+    ]))
+    archive.writestr('xl/styles.xml', _styles_xml())
+    archive.writestr('xl/theme/theme1.xml', _theme_xml())
+
+
+def _write_sheet(stream, rows, load_image, image_row_height, images):
+    cols = ''.join(
+        f'<col min="{COLUMNS.index(col) + 1}" max="{COLUMNS.index(col) + 1}" width="{width}" customWidth="1"/>'
+        for col, width in COLUMN_WIDTHS.items()
+    )
+    stream.write((
+        XML_HEADER
+        + f'<worksheet xmlns="{NS_MAIN}" xmlns:r="{NS_REL}">'
+        + '<sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+        + '<sheetFormatPr defaultRowHeight="15"/>'
+        + f'<cols>{cols}</cols><sheetData>'
+    ).encode('utf-8'))
+
+    for sheet_row in rows:
+        row_attrs = f'r="{sheet_row.row}"'
+        if sheet_row.image:
+            data = load_image(sheet_row.image, f'A{sheet_row.row}')
+            if data is not None:
+                images.append((sheet_row.row, data))
+                row_attrs += f' ht="{image_row_height}" customHeight="1"'
+
+        styles = sheet_row.styles or {}
+        cells = ''.join(
+            _cell_xml(f'{col}{sheet_row.row}', sheet_row.cells[col], styles.get(col))
+            for col in sorted(sheet_row.cells, key=COLUMNS.index)
+        )
+        stream.write(f'<row {row_attrs}>{cells}</row>'.encode('utf-8'))
+
+    drawing = '<drawing r:id="rId1"/>' if images else ''
+    stream.write(f'</sheetData>{drawing}</worksheet>'.encode('utf-8'))
+
+
+def escape(text):
+    """Escapa &, < y > (como xml.sax.saxutils.escape, que importa urllib)"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def quoteattr(text):
+    """Valor de atributo XML entre comillas dobles"""
+    return '"' + escape(text).replace('"', '&quot;') + '"'
+
+
+def _cell_xml(ref, value, style_key):
+    style = f' s="{STYLE_INDEX[style_key]}"' if style_key else ''
+    if value is None:
+        return f'<c r="{ref}"{style}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            # NaN e infinito no son números válidos en SpreadsheetML: celda
+            # numérica vacía, como escribe openpyxl
+            return f'<c r="{ref}"{style}><v></v></c>'
+        return f'<c r="{ref}"{style}><v>{value!r}</v></c>'
+
+    text = ILLEGAL_CHARACTERS.sub('', str(value))
+    if text.startswith('=') and len(text) > 1:
+        return f'<c r="{ref}"{style}><f>{escape(text[1:])}</f><v></v></c>'
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _drawing_xml(images, image_size):
+    extent = image_size * EMU_PER_PIXEL
+    anchors = []
+    for n, (row, _) in enumerate(images, start=1):
+        anchors.append(
+            f'<xdr:oneCellAnchor><xdr:from><xdr:col>0</xdr:col><xdr:colOff>0</xdr:colOff>'
+            f'<xdr:row>{row - 1}</xdr:row><xdr:rowOff>0</xdr:rowOff></xdr:from>'
+            f'<xdr:ext cx="{extent}" cy="{extent}"/>'
+            f'<xdr:pic><xdr:nvPicPr><xdr:cNvPr id="{n}" name="Image {n}" descr="Picture"/><xdr:cNvPicPr/></xdr:nvPicPr>'
+            f'<xdr:blipFill><a:blip r:embed="rId{n}" cstate="print"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+            f'<xdr:spPr><a:prstGeom prst="rect"/></xdr:spPr></xdr:pic><xdr:clientData/></xdr:oneCellAnchor>'
+        )
+    return (
+        XML_HEADER
+        + '<xdr:wsDr xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" '
+        + f'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" xmlns:r="{NS_REL}">'
+        + ''.join(anchors)
+        + '</xdr:wsDr>'
+    )
+
+
+def _font_xml(font):
+    """XML de una fuente (excel_styles.FontSpec)"""
+    parts = [f'<name val={quoteattr(font.name)}/>'] if font.name else []
+    if font.bold:
+        parts.append('<b val="1"/>')
+    if font.color:
+        parts.append(f'<color rgb="{font.color}"/>')
+    if font.size:
+        parts.append(f'<sz val="{font.size:g}"/>')
+    return f"<font>{''.join(parts)}</font>"
+
+
+def _styles_xml():
+    """Estilos con nombre de excel_styles: un font, un xf de estilo y un xf de celda por clave"""
+    count = len(STYLE_DEFINITIONS) + 1
+    fonts = ('<font><name val="Calibri"/><family val="2"/><color theme="1"/><sz val="11"/>'
+             '<scheme val="minor"/></font>') + ''.join(
+        _font_xml(font) for _, font in STYLE_DEFINITIONS.values()
+    )
+    style_xfs = '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>' + ''.join(
+        f'<xf numFmtId="0" fontId="{n}" fillId="0" borderId="0" applyFont="1"/>' for n in range(1, count)
+    )
+    cell_xfs = '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>' + ''.join(
+        f'<xf numFmtId="0" fontId="{n}" fillId="0" borderId="0" xfId="{n}" applyFont="1"/>' for n in range(1, count)
+    )
+    cell_styles = '<cellStyle name="Normal" xfId="0" builtinId="0"/>' + ''.join(
+        f'<cellStyle name={quoteattr(name)} xfId="{n}"/>'
+        for n, (name, _) in enumerate(STYLE_DEFINITIONS.values(), start=1)
+    )
+    return (
+        XML_HEADER
+        + f'<styleSheet xmlns="{NS_MAIN}">'
+        + f'<fonts count="{count}">{fonts}</fonts>'
+        + '<fills count="2"><fill><patternFill/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        + '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        + f'<cellStyleXfs count="{count}">{style_xfs}</cellStyleXfs>'
+        + f'<cellXfs count="{count}">{cell_xfs}</cellXfs>'
+        + f'<cellStyles count="{count}">{cell_styles}</cellStyles>'
+        + '</styleSheet>'
+    )
+
+
+def _workbook_xml(sheet_names):
+    sheets = ''.join(
+        f'<sheet name={quoteattr(name)} sheetId="{n}" r:id="rId{n}"/>'
+        for n, name in enumerate(sheet_names, start=1)
+    )
+    return (
+        XML_HEADER
+        + f'<workbook xmlns="{NS_MAIN}" xmlns:r="{NS_REL}">'
+        + '<bookViews><workbookView activeTab="0"/></bookViews>'
+        + f'<sheets>{sheets}</sheets>'
+        + '<calcPr calcId="124519" fullCalcOnLoad="1"/>'
+        + '</workbook>'
+    )
+
+
+def _content_types(sheets):
+    """Tipos de contenido para las hojas [(nombre, tiene imágenes)]"""
+    overrides = [
+        ('/xl/workbook.xml', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml'),
+        ('/xl/styles.xml', 'application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml'),
+        ('/xl/theme/theme1.xml', 'application/vnd.openxmlformats-officedocument.theme+xml'),
+        ('/docProps/core.xml', 'application/vnd.openxmlformats-package.core-properties+xml'),
+    ]
+    for n, (_, has_images) in enumerate(sheets, start=1):
+        overrides.append((f'/xl/worksheets/sheet{n}.xml',
+                          'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'))
+        if has_images:
+            overrides.append((f'/xl/drawings/drawing{n}.xml',
+                              'application/vnd.openxmlformats-officedocument.drawing+xml'))
+    return (
+        XML_HEADER
+        + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        + '<Default Extension="xml" ContentType="application/xml"/>'
+        + '<Default Extension="png" ContentType="image/png"/>'
+        + '<Default Extension="jpeg" ContentType="image/jpeg"/>'
+        + ''.join(f'<Override PartName="{part}" ContentType="{kind}"/>' for part, kind in overrides)
+        + '</Types>'
+    )
+
+
+def _relationships(relations):
+    return (
+        XML_HEADER
+        + f'<Relationships xmlns="{NS_PKG_REL}">'
+        + ''.join(f'<Relationship Id="{rid}" Type="{kind}" Target="{target}"/>' for rid, kind, target in relations)
+        + '</Relationships>'
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _theme_xml():
+    """
+    Tema por defecto de openpyxl (el mismo que guarda el motor openpyxl).
+
+    openpyxl/writer/theme.py solo define esa constante: si openpyxl todavía no
+    se cargó, se ejecuta ese archivo solo, sin importar el paquete completo.
+    """
+    if 'openpyxl' in sys.modules:
+        from openpyxl.writer.theme import theme_xml
+        return theme_xml
+
+    package = importlib.util.find_spec('openpyxl')
+    path = Path(package.submodule_search_locations[0]) / 'writer' / 'theme.py'
+    spec = importlib.util.spec_from_file_location('_openpyxl_theme', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.theme_xml
+
+
+def _core_xml():
+    now = datetime.datetime.now(tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return (
+        XML_HEADER
+        + '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        + 'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+        + 'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        + '<dc:creator>AQUAM</dc:creator>'
+        + f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+        + f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified>'
+        + '</cp:coreProperties>'
+    )
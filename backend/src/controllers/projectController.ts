@@ -1,4 +1,5 @@
 import { Response } from 'express';
+import { pipeline } from 'stream';
 import { AuthRequest } from '../middleware/auth';
 import prisma from '../config/database';
 import {
@@ -11,11 +12,7 @@ import { calculateBedMaterials } from '../utils/bedCalculations';
 import { generateDefaultTasks } from '../utils/taskGenerator';
 import { calculateHydraulicSystem } from '../utils/hydraulicCalculations';
 import { calculateElectricalSystem } from '../utils/electricalCalculations';
-import { exec } from 'child_process';
-import { promisify } from 'util';
-import path from 'path';
-
-const execAsync = promisify(exec);
+import { excelExportPool } from '../services/excelExportWorkerService';
 
 export const createProject = async (req: AuthRequest, res: Response) => {
   try {
@@ -680,31 +677,39 @@ export const exportToExcel = async (req: AuthRequest, res: Response) => {
       projectData.electricalAnalysis = null;
     }
 
-    // Escapar JSON para pasarlo como argumento
-    const jsonData = JSON.stringify(projectData).replace(/"/g, '\\"');
-
-    // Ejecutar el script Python
-    const scriptPath = path.join(__dirname, '../../public/export_to_excel.py');
-    const excelPath = path.join(__dirname, '../../public/CALCULADORA MATERIALES AQUAM.xlsx');
-    const command = `python3 "${scriptPath}" "${jsonData}"`;
-
-    console.log('Ejecutando script Python para exportar proyecto...');
-    const { stdout, stderr } = await execAsync(command);
+    // Exportar con un worker Python persistente a un libro propio de esta
+    // exportación (el libro maestro AQUAM no se modifica). El libro se genera
+    // en memoria y sus bytes llegan por el protocolo del worker: se envían
+    // directo a la respuesta, sin archivo temporal.
+    console.log('Enviando proyecto al worker de exportación...');
+    const result = await excelExportPool.exportProject(projectData, {
+      inline: true,
+      streaming: true,
+      metrics: true,
+    });
 
-    if (stderr) {
-      console.error('Advertencias del script:', stderr);
+    console.log(`[EXPORT] Hoja '${result.sheetName}' generada en ${result.elapsedMs} ms`);
+    if (result.metrics) {
+      // Una línea JSON por exportación, para agregarlas y alertar si la latencia cambia
+      console.log(JSON.stringify({ event: 'excel-export', ...result.metrics }));
     }
 
-    console.log('Salida del script:', stdout);
-
     // Enviar el archivo Excel como descarga
     const fileName = `${project.name.replace(/[^a-z0-9]/gi, '_')}_${new Date().toISOString().split('T')[0]}.xlsx`;
-    res.download(excelPath, fileName, (err) => {
-      if (err) {
-        console.error('Error al enviar archivo:', err);
-        if (!res.headersSent) {
-          res.status(500).json({ error: 'Error al descargar el archivo' });
-        }
+    res.setHeader('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet');
+    res.setHeader('Content-Disposition', `attachment; filename="${fileName}"`);
+    res.setHeader('Content-Length', String(result.bytes));
+    // pipeline destruye el stream del worker si el cliente corta la descarga:
+    // así el worker deja de esperar a que se lean sus bytes
+    pipeline(result.stream, res, (err) => {
+      if (!err) return;
+      if ((err as NodeJS.ErrnoException).code === 'ERR_STREAM_PREMATURE_CLOSE') {
+        console.warn('[EXPORT] Descarga cancelada por el cliente');
+        return;
+      }
+      console.error('Error al enviar archivo:', err);
+      if (!res.headersSent) {
+        res.status(500).json({ error: 'Error al descargar el archivo' });
       }
     });
   } catch (error: any) {
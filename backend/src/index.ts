@@ -4,6 +4,7 @@ import dotenv from 'dotenv';
 import path from 'path';
 import fs from 'fs';
 import passport from './config/passport';
+import { excelExportPool } from './services/excelExportWorkerService';
 
 console.log('[INIT] Iniciando servidor...');
 
@@ -126,6 +127,11 @@ app.get('/health', (req, res) => {
   res.json({ status: 'ok' });
 });
 
+// Estado de los workers de exportación a Excel (incluye contadores de caché)
+app.get('/health/excel-export', async (req, res) => {
+  res.json({ workers: await excelExportPool.health() });
+});
+
 app.use('/api/auth', authRoutes);
 app.use('/api/pool-presets', poolPresetRoutes);
 app.use('/api/projects', projectRoutes);
@@ -177,7 +183,7 @@ if (fs.existsSync(frontendIndexPath)) {
   console.log(`[INIT] Frontend no encontrado en ${frontendDistPath}`);
 }
 
-app.listen(PORT, () => {
+const server = app.listen(PORT, () => {
   console.log('');
   console.log('========================================');
   console.log('  BACKEND INICIADO EXITOSAMENTE');
@@ -195,3 +201,23 @@ app.listen(PORT, () => {
   startAgendaReminderEmailService();
   console.log('[INIT] Agenda reminders email service iniciado');
 });
+
+// Al cerrar el servidor también se cierran los workers Python de exportación
+server.on('close', () => {
+  excelExportPool.shutdown();
+});
+
+let shuttingDown = false;
+const shutdown = (signal: NodeJS.Signals) => {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  console.log(`[SHUTDOWN] ${signal} recibido, cerrando servidor...`);
+  server.close();
+  excelExportPool
+    .shutdown()
+    .catch((error) => console.error('[SHUTDOWN] Error cerrando los workers de exportación:', error))
+    .finally(() => process.exit(0));
+};
+
+process.on('SIGTERM', shutdown);
+process.on('SIGINT', shutdown);
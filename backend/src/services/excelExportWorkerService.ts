@@ -0,0 +1,355 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import { PassThrough } from 'stream';
+
+const SCRIPT_PATH = path.join(__dirname, '../../public/export_to_excel.py');
+const PYTHON_BIN = process.env.EXCEL_EXPORT_PYTHON || 'python3';
+const WORKER_COUNT = Math.max(1, Number(process.env.EXCEL_EXPORT_WORKERS || 1));
+const JOB_TIMEOUT_MS = Number(process.env.EXCEL_EXPORT_TIMEOUT_MS || 60 * 1000);
+const PING_TIMEOUT_MS = Number(process.env.EXCEL_EXPORT_PING_TIMEOUT_MS || 5 * 1000);
+const SHUTDOWN_TIMEOUT_MS = Number(process.env.EXCEL_EXPORT_SHUTDOWN_TIMEOUT_MS || 10 * 1000);
+
+// Debe coincidir con RESTART_EXIT_CODE en export_to_excel.py
+const RESTART_EXIT_CODE = 75;
+
+type WorkerResponse = {
+  id?: string | null;
+  cmd?: string;
+  ok: boolean;
+  error?: string;
+  [key: string]: any;
+};
+
+type PendingJob = {
+  resolve: (response: WorkerResponse) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+};
+
+type ExportOptions = {
+  outputPath?: string;
+  streaming?: boolean;
+  /** Con `outputPath`, no usar la caché de exportaciones por contenido */
+  noCache?: boolean;
+  /** Con `outputPath`, motor de escritura (por defecto EXCEL_EXPORT_ENGINE u openpyxl) */
+  engine?: 'openpyxl' | 'fast';
+  /** Escribir también el listado de materiales en estos formatos (rutas de salida) */
+  bomOutputs?: { csv?: string; jsonl?: string; parquet?: string };
+  /** Incluir en la respuesta las métricas de la exportación (tiempos por fase y sección) */
+  metrics?: boolean;
+  /** En lotes con `outputPath`, construir las hojas en N procesos (0 = uno por núcleo) */
+  workers?: number;
+  /**
+   * Generar el libro en memoria y recibir sus bytes por el protocolo del
+   * worker: la respuesta trae `bytes` y `stream` (sin archivo temporal)
+   */
+  inline?: boolean;
+};
+
+/** Bytes del .xlsx que faltan leer después de una respuesta "inline" */
+type PendingPayload = {
+  stream: PassThrough;
+  remaining: number;
+};
+
+type SendOptions = {
+  timeoutMs?: number;
+  /** Matar el worker si no responde a tiempo (trabajos); un ping solo lo marca como no saludable */
+  killOnTimeout?: boolean;
+};
+
+type QueuedJob = {
+  payload: Record<string, any>;
+  resolve: (response: WorkerResponse) => void;
+  reject: (error: Error) => void;
+};
+
+let jobCounter = 0;
+const nextJobId = () => `job-${process.pid}-${++jobCounter}`;
+
+class ExportWorker {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, PendingJob>();
+  private payload: PendingPayload | null = null;
+  busy = false;
+  restarting = false;
+  /** false si el último ping no respondió a tiempo */
+  healthy = true;
+
+  constructor(private readonly index: number, private readonly onIdle: () => void) {}
+
+  start() {
+    const child = spawn(PYTHON_BIN, [SCRIPT_PATH, '--worker']);
+    this.child = child;
+
+    // Una línea JSON por respuesta; si trae `bytes`, a continuación llegan
+    // esa cantidad de bytes del .xlsx (trabajos "inline")
+    let buffered = Buffer.alloc(0);
+    child.stdout.on('data', (chunk: Buffer) => {
+      buffered = buffered.length ? Buffer.concat([buffered, chunk]) : chunk;
+      while (buffered.length) {
+        if (this.payload) {
+          const part = buffered.subarray(0, this.payload.remaining);
+          buffered = buffered.subarray(part.length);
+          this.writePayload(child, this.payload.stream, part);
+          this.payload.remaining -= part.length;
+          if (this.payload.remaining === 0) {
+            this.payload.stream.end();
+            this.payload = null;
+          }
+          continue;
+        }
+        const newline = buffered.indexOf(0x0a);
+        if (newline === -1) break;
+        const line = buffered.subarray(0, newline).toString('utf8');
+        buffered = buffered.subarray(newline + 1);
+        this.handleResponse(line);
+      }
+    });
+
+    child.stdin.on('error', (error) => {
+      console.warn(`[EXPORT-WORKER ${this.index}] Error escribiendo al worker:`, error.message);
+    });
+
+    child.on('error', (error) => {
+      this.failPending(error);
+    });
+
+    child.stderr.on('data', (chunk) => {
+      console.log(`[EXPORT-WORKER ${this.index}]`, chunk.toString().trimEnd());
+    });
+
+    child.on('exit', (code) => {
+      if (this.child === child) this.child = null;
+      if (this.payload) {
+        this.payload.stream.destroy(new Error(`Worker de exportación terminó (código ${code})`));
+        this.payload = null;
+      }
+      this.failPending(new Error(`Worker de exportación terminó (código ${code})`));
+      this.busy = false;
+      if (code === RESTART_EXIT_CODE) {
+        // Reinicio ordenado solicitado: relanzar en caliente
+        this.start();
+      }
+      this.restarting = false;
+      this.onIdle();
+    });
+  }
+
+  /**
+   * Escribe bytes del .xlsx respetando la contrapresión: si quien lee el
+   * stream va más lento que el worker, se deja de leer su stdout hasta el
+   * 'drain'. También se retoma si el stream termina, falla o se cierra (el
+   * cliente cortó la descarga), para no trabar el worker; los bytes que
+   * quedan de un stream destruido se descartan.
+   */
+  private writePayload(child: ChildProcessWithoutNullStreams, stream: PassThrough, part: Buffer) {
+    if (stream.destroyed) return;
+    if (stream.write(part) || child.stdout.isPaused()) return;
+    child.stdout.pause();
+    const events = ['drain', 'finish', 'error', 'close'];
+    const resume = () => {
+      events.forEach((event) => stream.off(event, resume));
+      child.stdout.resume();
+    };
+    events.forEach((event) => stream.on(event, resume));
+  }
+
+  private handleResponse(line: string) {
+    let response: WorkerResponse;
+    try {
+      response = JSON.parse(line);
+    } catch {
+      console.warn(`[EXPORT-WORKER ${this.index}] Línea inválida:`, line);
+      return;
+    }
+
+    if (typeof response.bytes === 'number') {
+      const stream = new PassThrough();
+      response.stream = stream;
+      if (response.bytes > 0) {
+        this.payload = { stream, remaining: response.bytes };
+      } else {
+        stream.end();
+      }
+    }
+
+    const job = response.id ? this.pending.get(response.id) : undefined;
+    if (!job) {
+      // Nadie espera esta respuesta: descartar sus bytes
+      response.stream?.resume();
+      return;
+    }
+    clearTimeout(job.timer);
+    this.pending.delete(response.id as string);
+    job.resolve(response);
+  }
+
+  send(payload: Record<string, any>, options: SendOptions = {}): Promise<WorkerResponse> {
+    const { timeoutMs = JOB_TIMEOUT_MS, killOnTimeout = true } = options;
+    if (!this.child) this.start();
+    const id = payload.id || nextJobId();
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error('Tiempo de espera agotado en el worker de exportación'));
+        // Un worker colgado no se reutiliza
+        if (killOnTimeout) this.child?.kill();
+      }, timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      this.child!.stdin.write(JSON.stringify({ ...payload, id }) + '\n');
+    });
+  }
+
+  /**
+   * Estado del worker. Si está ocupado no se le envía nada (el ping esperaría
+   * detrás del trabajo en curso); si está libre se hace ping con un tiempo de
+   * espera corto que solo lo marca como no saludable, nunca lo mata.
+   */
+  async health(): Promise<WorkerResponse> {
+    if (this.busy || this.restarting) {
+      return { ok: true, cmd: 'ping', busy: true, restarting: this.restarting };
+    }
+    try {
+      const response = await this.send({ cmd: 'ping' }, { timeoutMs: PING_TIMEOUT_MS, killOnTimeout: false });
+      this.healthy = response.ok;
+      return { ...response, busy: false };
+    } catch (error) {
+      this.healthy = false;
+      return { ok: false, busy: false, error: (error as Error).message };
+    }
+  }
+
+  /**
+   * Reinicio ordenado: el worker termina el trabajo en curso, responde y
+   * sale con RESTART_EXIT_CODE; mientras tanto no recibe trabajos nuevos.
+   */
+  restart() {
+    if (!this.child) return Promise.resolve<WorkerResponse>({ ok: true, cmd: 'restart' });
+    this.restarting = true;
+    return this.send({ cmd: 'restart' });
+  }
+
+  /**
+   * Pide al worker que termine y resuelve cuando el proceso salió. Si no
+   * sale a tiempo (por ejemplo, colgado en un trabajo) se lo mata.
+   */
+  stop(): Promise<void> {
+    const child = this.child;
+    if (!child) return Promise.resolve();
+    return new Promise((resolve) => {
+      const timer = setTimeout(() => child.kill(), SHUTDOWN_TIMEOUT_MS);
+      child.once('exit', () => {
+        clearTimeout(timer);
+        resolve();
+      });
+      child.stdin.write(JSON.stringify({ cmd: 'shutdown' }) + '\n');
+      child.stdin.end();
+    });
+  }
+
+  private failPending(error: Error) {
+    this.pending.forEach((job) => {
+      clearTimeout(job.timer);
+      job.reject(error);
+    });
+    this.pending.clear();
+  }
+}
+
+/**
+ * Pool de workers Python persistentes para la exportación a Excel.
+ * Cada worker mantiene el libro AQUAM parseado en memoria entre trabajos.
+ */
+class ExcelExportWorkerPool {
+  private workers: ExportWorker[] = [];
+  private queue: QueuedJob[] = [];
+  private closed = false;
+  private closing: Promise<void> | null = null;
+
+  constructor(size: number) {
+    for (let i = 0; i < size; i += 1) {
+      this.workers.push(new ExportWorker(i, () => this.drain()));
+    }
+  }
+
+  run(payload: Record<string, any>): Promise<WorkerResponse> {
+    if (this.closed) {
+      return Promise.reject(new Error('El pool de exportación está cerrado'));
+    }
+    return new Promise((resolve, reject) => {
+      this.queue.push({ payload, resolve, reject });
+      this.drain();
+    });
+  }
+
+  /**
+   * Exporta un proyecto con un worker libre. Con `outputPath` se genera un
+   * libro independiente; sin él se agrega la hoja al libro maestro.
+   * `streaming` escribe la hoja en modo write-only (memoria constante).
+   * Con `inline` el libro no se escribe en disco: `response.stream` entrega
+   * sus `response.bytes` bytes (por ejemplo para hacer pipe a la respuesta HTTP).
+   */
+  async exportProject(projectData: Record<string, any>, options: ExportOptions = {}) {
+    const response = await this.run({ cmd: 'export', project: projectData, ...options });
+    if (!response.ok) {
+      throw new Error(response.error || 'Error desconocido en el worker de exportación');
+    }
+    return response;
+  }
+
+  /** Exporta varios proyectos en un solo libro (una carga y un guardado) */
+  async exportBatch(projects: Record<string, any>[], options: ExportOptions = {}) {
+    const response = await this.run({ cmd: 'batch', projects, ...options });
+    if (!response.ok) {
+      throw new Error(response.error || 'Error desconocido en el worker de exportación');
+    }
+    return response.results as Array<{ index: number; projectId?: string; ok: boolean; sheetName?: string; error?: string }>;
+  }
+
+  /** Estado de cada worker: `{ busy: true }` si está trabajando, si no un ping */
+  async health() {
+    if (this.closed) {
+      return this.workers.map(() => ({ ok: false, busy: false, error: 'El pool de exportación está cerrado' }));
+    }
+    return Promise.all(this.workers.map((worker) => worker.health()));
+  }
+
+  /** Reinicio ordenado: cada worker termina su trabajo actual y se relanza */
+  restart() {
+    return Promise.all(this.workers.map((worker) => worker.restart()));
+  }
+
+  /**
+   * Cierre ordenado: rechaza los trabajos en cola y los nuevos, y espera a
+   * que todos los workers terminen (se llama al apagar el servidor).
+   */
+  shutdown(): Promise<void> {
+    if (!this.closing) {
+      this.closed = true;
+      const error = new Error('El pool de exportación está cerrado');
+      this.queue.splice(0).forEach((job) => job.reject(error));
+      this.closing = Promise.all(this.workers.map((worker) => worker.stop())).then(() => undefined);
+    }
+    return this.closing;
+  }
+
+  private drain() {
+    for (const worker of this.workers) {
+      if (!this.queue.length) return;
+      if (worker.busy || worker.restarting) continue;
+
+      const job = this.queue.shift()!;
+      worker.busy = true;
+      worker
+        .send(job.payload)
+        .then(job.resolve, job.reject)
+        .finally(() => {
+          worker.busy = false;
+          this.drain();
+        });
+    }
+  }
+}
+
+export const excelExportPool = new ExcelExportWorkerPool(WORKER_COUNT);